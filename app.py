@@ -1,21 +1,40 @@
-from flask import Flask, render_template, jsonify, redirect, url_for, request, send_from_directory, session, flash
-import requests
-from bs4 import BeautifulSoup
+from flask import Flask, render_template, jsonify, redirect, url_for, request, send_from_directory, session, flash, stream_with_context
 import os
 from dotenv import load_dotenv
-import time
 import json
-import re
-from urllib.parse import urlencode
-from models import User, SolvedProblem
+import csv
+import io
+from models import SolvedRows, User
+from auth import AttemptThrottle, HashingBusyError, PasswordHasher
+from assets import AssetManifest
+from http_cache import cache_control, compress_response
+from metrics import MongoCommandMetrics, USER_LOADER_LATENCY, init_app as init_metrics, render_latest
+from profiling import SlowRequestProfiler
+from catalog import ProblemCatalog, CatalogSyncError, SORT_FIELDS, SYNC_FIELDS
+from versions import EPOCH
+from leetcode_client import (
+    LeetCodeClient,
+    ResponseCache,
+    UpstreamHTTPError,
+    make_session
+)
+from profiles import ProfileStore
+from resilience import CircuitBreaker, TokenBucket, UpstreamUnavailableError
+from history import StatsHistory, parse_range
+from progress import ProgressStore, ToggleBuffer
+from leaderboard import BOARDS, Leaderboard
+from crawler import ProblemCrawler
+from scheduler import LeaseLock, Scheduler
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from functools import wraps
 import math
-from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
+from database import Mongo, connect
 from bson.objectid import ObjectId
-from datetime import datetime
-import certifi
+from pymongo.errors import DuplicateKeyError
+from werkzeug.middleware.proxy_fix import ProxyFix
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+import threading
 
 # Get the absolute path to the current directory
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -28,30 +47,304 @@ app = Flask(__name__,
 # Load environment variables
 load_dotenv()
 
-# Configure MongoDB
+# Fingerprinted, precompressed CSS, JS and images built by `python -m assets`
+assets = AssetManifest(os.path.join(BASE_DIR, 'static', 'dist'))
+assets.load()
+app.jinja_env.globals['asset_url'] = assets.url
+
+# Request metrics go first so they time every other hook. Slow-request
+# profiling is opt-in: PROFILE_SLOW_REQUESTS_MS=0 leaves it off.
+PROFILE_SLOW_REQUESTS_MS = float(os.getenv('PROFILE_SLOW_REQUESTS_MS', 0))
+profiler = SlowRequestProfiler(
+    threshold=PROFILE_SLOW_REQUESTS_MS / 1000.0,
+    interval=float(os.getenv('PROFILE_INTERVAL_MS', 5)) / 1000.0,
+    output_dir=os.getenv('PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+) if PROFILE_SLOW_REQUESTS_MS > 0 else None
+init_metrics(app, profiler)
+
+# Configure MongoDB. The client is created on first use in each process, so
+# importing the app never connects and an unreachable server fails requests, not startup.
 uri = os.getenv('MONGODB_URI')
-client = MongoClient(
-    uri,
-    server_api=ServerApi('1'),
-    tls=True,
-    tlsCAFile=certifi.where()
+db = Mongo(lambda: connect(uri, [MongoCommandMetrics()]), 'leetcode_scraper')
+
+# Configure LeetCode upstream and the local problem catalog mirror
+LEETCODE_GRAPHQL_URL = os.getenv('LEETCODE_GRAPHQL_URL', 'https://leetcode.com/graphql')
+USER_PROFILE_TTL = int(os.getenv('USER_PROFILE_TTL', 300))
+# Upstream budget shared by every worker through MongoDB; 0 disables the limiter
+LEETCODE_RATE_LIMIT = float(os.getenv('LEETCODE_RATE_LIMIT', 5))
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', 30))
+leetcode = LeetCodeClient(
+    LEETCODE_GRAPHQL_URL,
+    session=make_session(
+        pool_size=int(os.getenv('LEETCODE_POOL_SIZE', 10)),
+        retries=int(os.getenv('LEETCODE_RETRIES', 2)),
+        backoff_factor=float(os.getenv('LEETCODE_RETRY_BACKOFF', 0.5)),
+        retry_after_max=int(os.getenv('LEETCODE_RETRY_AFTER_MAX', 5))
+    ),
+    timeout=(
+        float(os.getenv('LEETCODE_CONNECT_TIMEOUT', 3.05)),
+        float(os.getenv('LEETCODE_READ_TIMEOUT', 10))
+    ),
+    rate_limiter=TokenBucket(
+        db.rate_limits,
+        rate=LEETCODE_RATE_LIMIT,
+        capacity=int(os.getenv('LEETCODE_RATE_BURST', 10)),
+        max_wait=float(os.getenv('LEETCODE_RATE_MAX_WAIT', 2))
+    ) if LEETCODE_RATE_LIMIT > 0 else None,
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5)),
+        reset_timeout=BREAKER_RESET_TIMEOUT
+    )
+)
+# Bounded pool for concurrent upstream fan-out (bulk lookups and background refreshes)
+upstream_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('LEETCODE_FANOUT_WORKERS', 8)),
+    thread_name_prefix='leetcode'
+)
+BULK_STATS_MAX_USERS = int(os.getenv('BULK_STATS_MAX_USERS', 100))
+catalog = ProblemCatalog(db.problems, leetcode)
+history = StatsHistory(db.stats_history)
+HISTORY_MAX_USERS = int(os.getenv('HISTORY_MAX_USERS', 500))
+leaderboard = Leaderboard(db.leaderboard, overlap=int(os.getenv('LEADERBOARD_RELOAD_OVERLAP', 30)))
+LEADERBOARD_MAX_LIMIT = int(os.getenv('LEADERBOARD_MAX_LIMIT', 100))
+profiles = ProfileStore(
+    db.user_profiles,
+    leetcode,
+    upstream_executor,
+    ttl=USER_PROFILE_TTL,
+    watch_days=int(os.getenv('WATCHED_USER_DAYS', 7)),
+    history=history,
+    leaderboard=leaderboard
+)
+
+# Problem pages (statement text, examples, hints, starter code) crawled for offline use
+crawler = ProblemCrawler(
+    db.problem_details,
+    db.crawl_checkpoints,
+    leetcode,
+    catalog,
+    workers=int(os.getenv('CRAWLER_WORKERS', 4)),
+    min_interval=float(os.getenv('CRAWLER_MIN_INTERVAL', 0.5)),
+    max_age=int(os.getenv('CRAWLER_MAX_AGE', 7 * 86400))
+)
+CRAWLER_INTERVAL = int(os.getenv('CRAWLER_INTERVAL', 0))
+
+# Solved counts by difficulty per user, maintained by the toggle endpoints
+progress = ProgressStore(db.user_progress, db.solved_problems, catalog)
+
+# Background refresh: one leader (per Mongo lease) pulls from LeetCode,
+# every worker picks the results up from MongoDB
+scheduler = Scheduler(LeaseLock(db.leases))
+scheduler.add_job(
+    'sync_catalog',
+    catalog.sync,
+    int(os.getenv('CATALOG_REFRESH_INTERVAL', 3600)),
+    leader_only=True
+)
+scheduler.add_job(
+    'reload_catalog',
+    catalog.reload_if_stale,
+    int(os.getenv('CATALOG_RELOAD_INTERVAL', 60)),
+    run_immediately=True
+)
+scheduler.add_job(
+    'reload_leaderboard',
+    leaderboard.reload_changed,
+    int(os.getenv('LEADERBOARD_RELOAD_INTERVAL', 60)),
+    run_immediately=True
+)
+scheduler.add_job(
+    'refresh_watched_users',
+    profiles.refresh_watched,
+    int(os.getenv('WATCHED_USERS_REFRESH_INTERVAL', 900)),
+    leader_only=True
+)
+scheduler.add_job(
+    'reconcile_progress',
+    progress.reconcile,
+    int(os.getenv('PROGRESS_RECONCILE_INTERVAL', 86400)),
+    leader_only=True
 )
-db = client.leetcode_scraper
+if CRAWLER_INTERVAL:
+    # A full crawl takes minutes; on its own thread it doesn't hold up flushes and reloads
+    scheduler.add_job('crawl_problem_details', crawler.run, CRAWLER_INTERVAL, leader_only=True, own_thread=True)
+    # It can also outlast the lease; renewing it per page keeps another worker from starting one alongside
+    crawler.heartbeat = lambda: scheduler.renew('crawl_problem_details')
+SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true'
 
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
 app.config['API_KEY'] = os.getenv('API_KEY')
 
+# Proxies in front of the app whose X-Forwarded-For is trusted for the client
+# address (Heroku's router is one); the login throttle keys on that address
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', 1 if os.getenv('DYNO') else 0))
+if TRUSTED_PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT)
+
+# Password hashing runs in a process pool so a burst of logins can't stall
+# other requests. Attempts are throttled per client address, and failed
+# logins per username, before any hashing is done.
+passwords = PasswordHasher(
+    workers=int(os.getenv('PASSWORD_HASH_WORKERS', 2)),
+    max_pending=int(os.getenv('PASSWORD_HASH_MAX_PENDING', 32)),
+    timeout=float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+)
+ip_attempts = AttemptThrottle(
+    db.login_attempts,
+    limit=int(os.getenv('LOGIN_ATTEMPTS_PER_IP', 30)),
+    window=int(os.getenv('LOGIN_ATTEMPTS_WINDOW', 60))
+)
+login_failures = AttemptThrottle(
+    db.login_attempts,
+    limit=int(os.getenv('LOGIN_FAILURES_PER_USER', 10)),
+    window=int(os.getenv('LOGIN_FAILURES_WINDOW', 900))
+)
+
+def ensure_solved_index():
+    try:
+        db.solved_problems.create_index([('user_id', 1), ('problem_id', 1)], unique=True)
+    except DuplicateKeyError:
+        # Rows written before the index existed may repeat a (user, problem) pair
+        removed = progress.remove_duplicate_rows()
+        app.logger.warning('Removed %d duplicate solved rows to build their unique index', removed)
+        db.solved_problems.create_index([('user_id', 1), ('problem_id', 1)], unique=True)
+
+def ensure_indexes():
+    indexes = [
+        ('users.username', lambda: db.users.create_index('username', unique=True)),
+        ('users.email', lambda: db.users.create_index('email', unique=True)),
+        ('solved_problems.user_id_problem_id', ensure_solved_index),
+        ('solved_problems.user_id_updated_at',
+         lambda: db.solved_problems.create_index([('user_id', 1), ('updated_at', 1)])),
+        ('problems.questionId', lambda: db.problems.create_index('questionId', unique=True)),
+        ('problems.position', lambda: db.problems.create_index('position')),
+        ('problems.synced_at', lambda: db.problems.create_index('synced_at')),
+        ('user_profiles.last_requested_at',
+         lambda: db.user_profiles.create_index([('last_requested_at', 1), ('refreshed_at', 1)])),
+        ('stats_history', history.ensure_indexes),
+        ('leaderboard', leaderboard.ensure_indexes),
+        ('login_attempts', ip_attempts.ensure_indexes),
+    ]
+    # One at a time, so an index that can't be built doesn't skip the ones after it
+    for name, create in indexes:
+        try:
+            create()
+        except Exception as e:
+            app.logger.warning('Could not create MongoDB index %s: %s', name, e)
+
+# Background threads don't survive a fork, so they are started per process:
+# from gunicorn's post_worker_init hook, or else by the first request
+background_pid = None
+background_lock = threading.Lock()
+
+def start_background_tasks():
+    global background_pid
+    if background_pid == os.getpid():
+        return
+    with background_lock:
+        if background_pid == os.getpid():
+            return
+        background_pid = os.getpid()
+    # Create indexes in the background so startup doesn't wait on MongoDB
+    threading.Thread(target=ensure_indexes, daemon=True).start()
+    if SCHEDULER_ENABLED:
+        scheduler.start()
+
+def warm_up():
+    """Load the catalog and search index before workers fork, so they share it.
+
+    Meant for a preloading gunicorn master; the MongoDB client is closed
+    afterwards and each worker opens its own.
+    """
+    try:
+        catalog.load()
+    except Exception as e:
+        app.logger.warning('Could not preload the problem catalog: %s', e)
+    finally:
+        db.close()
+
+# Optional per-process cache of each user's solved set. Other workers only
+# see a toggle once their copy expires, so keep the TTL short.
+SOLVED_CACHE_TTL = int(os.getenv('SOLVED_CACHE_TTL', 0))
+solved_cache = ResponseCache(int(os.getenv('SOLVED_CACHE_SIZE', 1024)), name='solved')
+
+# Optional write-behind for /toggle-solved: toggles are held per process and
+# written in bulk every SOLVED_WRITE_INTERVAL seconds (0 writes each at
+# once). Other workers and the progress counts only see them after that.
+SOLVED_WRITE_INTERVAL = float(os.getenv('SOLVED_WRITE_INTERVAL', 0))
+if SOLVED_WRITE_INTERVAL and not SCHEDULER_ENABLED:
+    # Nothing would flush the buffer until it filled up or the worker exited
+    app.logger.warning('SOLVED_WRITE_INTERVAL needs the scheduler, which is disabled; writing toggles directly')
+    SOLVED_WRITE_INTERVAL = 0
+solved_writes = ToggleBuffer(
+    progress,
+    max_pending=int(os.getenv('SOLVED_WRITE_MAX_PENDING', 10000)),
+    on_flush=solved_cache.delete
+)
+if SOLVED_WRITE_INTERVAL:
+    scheduler.add_job('flush_solved_writes', solved_writes.flush, SOLVED_WRITE_INTERVAL)
+
+BULK_TOGGLE_MAX_PROBLEMS = int(os.getenv('BULK_TOGGLE_MAX_PROBLEMS', 5000))
+
+# How far before a client's solved version /sync re-reads, to cover clock skew between workers
+SYNC_SOLVED_OVERLAP = timedelta(seconds=int(os.getenv('SYNC_SOLVED_OVERLAP', 5)))
+
+# Rows per chunk written to a streamed export
+EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', 200))
+EXPORT_COLUMNS = ['id', 'title', 'difficulty', 'acceptance_rate', 'total_accepted',
+                  'total_submissions', 'paid_only', 'solved']
+
+def export_ndjson(rows, solved_ids):
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(dict(row, solved=row['id'] in solved_ids), separators=(',', ':')))
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+def export_csv(rows, solved_ids):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for n, row in enumerate(rows, 1):
+        writer.writerow([row[column] for column in EXPORT_COLUMNS[:-1]] + [row['id'] in solved_ids])
+        if n % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', export_ndjson),
+    'csv': ('text/csv', export_csv)
+}
+
+# Conditional GET and response compression for the JSON API
+PROBLEM_COUNTS_MAX_AGE = int(os.getenv('PROBLEM_COUNTS_MAX_AGE', 300))
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+
+@app.after_request
+def compress(response):
+    return compress_response(response, min_size=COMPRESSION_MIN_SIZE)
+
 # Initialize login manager
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+@app.before_request
+def ensure_background_tasks():
+    start_background_tasks()
+
 @app.before_request
 def before_request():
     # Check if user is authenticated
-    if not current_user.is_authenticated and request.endpoint and 'static' not in request.endpoint:
+    # Endpoint first: static files shouldn't read the session (that adds Vary: Cookie)
+    if request.endpoint and 'static' not in request.endpoint and not current_user.is_authenticated:
         # Allow access to these routes without authentication
-        public_routes = ['home', 'login', 'register', 'health']
+        public_routes = ['home', 'login', 'register', 'health', 'metrics']
         if request.endpoint.split('.')[-1] not in public_routes:
             return redirect(url_for('login'))
 
@@ -62,14 +355,52 @@ def inject_api_key():
 
 @login_manager.user_loader
 def load_user(user_id):
-    try:
-        user_data = db.users.find_one({'_id': ObjectId(user_id)})
-        if user_data:
-            return User.from_dict(user_data)
-    except Exception:
-        # If there's any error (invalid ObjectId, etc.), return None
+    # Rebuild the user from the signed session cookie to skip the database
+    cached_user = session.get('user')
+    if cached_user and cached_user.get('_id') == user_id:
+        with USER_LOADER_LATENCY.labels('session').time():
+            return User(
+                username=cached_user['username'],
+                email=cached_user['email'],
+                _id=ObjectId(user_id)
+            )
+
+    with USER_LOADER_LATENCY.labels('db').time():
+        try:
+            user_data = db.users.find_one({'_id': ObjectId(user_id)})
+            if user_data:
+                user = User.from_dict(user_data)
+                remember_user_in_session(user)
+                return user
+        except Exception:
+            # If there's any error (invalid ObjectId, etc.), return None
+            return None
         return None
-    return None
+
+def remember_user_in_session(user):
+    # Only non-secret fields: the session cookie is signed, not encrypted
+    session['user'] = {
+        '_id': user.get_id(),
+        'username': user.username,
+        'email': user.email
+    }
+
+def upstream_unavailable(error=None):
+    # Rate limited, throttled, timed out or circuit open: tell clients when to come back instead of a generic 500
+    response = jsonify({
+        'status': 'error',
+        'message': 'LeetCode is temporarily unavailable, please try again shortly'
+    })
+    retry_after = getattr(error, 'retry_after', None)
+    response.headers['Retry-After'] = str(int(BREAKER_RESET_TIMEOUT if retry_after is None else retry_after))
+    return response, 503
+
+def auth_unavailable(template, message, status):
+    # Throttled or hashing pool full: the form again, with a status and a hint of when to retry
+    flash(message)
+    response = app.make_response((render_template(template), status))
+    response.headers['Retry-After'] = str(ip_attempts.window if status == 429 else 5)
+    return response
 
 def login_required_json(f):
     @wraps(f)
@@ -88,6 +419,11 @@ def require_api_key(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Named like 'static' so the login check skips it
+@app.route('/assets/<path:filename>', endpoint='static_assets')
+def built_asset(filename):
+    return assets.send(filename)
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -101,19 +437,25 @@ def register():
         username = request.form.get('username')
         email = request.form.get('email')
         password = request.form.get('password')
-        
-        if db.users.find_one({'username': username}):
-            flash('Username already exists')
-            return redirect(url_for('register'))
-            
-        if db.users.find_one({'email': email}):
-            flash('Email already exists')
+
+        if ip_attempts.exceeded(f'ip:{request.remote_addr}'):
+            return auth_unavailable('register.html', 'Too many attempts, please try again in a minute', 429)
+        try:
+            user = User(username=username, email=email)
+            user.password_hash = passwords.hash(password)
+        except HashingBusyError:
+            return auth_unavailable('register.html', 'The server is busy, please try again shortly', 503)
+
+        # One insert; the unique indexes on username and email reject duplicates
+        try:
+            user._id = db.users.insert_one(user.to_dict()).inserted_id
+        except DuplicateKeyError as e:
+            key_pattern = (e.details or {}).get('keyPattern') or {}
+            if 'email' in key_pattern or 'email_1' in str(e):
+                flash('Email already exists')
+            else:
+                flash('Username already exists')
             return redirect(url_for('register'))
-            
-        user = User(username=username, email=email, password=password)
-        user_dict = user.to_dict()
-        result = db.users.insert_one(user_dict)
-        user._id = result.inserted_id
         
         flash('Registration successful! Please login.')
         return redirect(url_for('login'))
@@ -128,15 +470,25 @@ def login():
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
+
+        # Every attempt on a username counts until one succeeds, so concurrent guesses can't all slip under the limit
+        if ip_attempts.exceeded(f'ip:{request.remote_addr}') or login_failures.exceeded(f'user:{username}'):
+            return auth_unavailable('login.html', 'Too many login attempts, please try again later', 429)
         user_data = db.users.find_one({'username': username})
         
         if user_data:
             user = User.from_dict(user_data)
-            if user.check_password(password):
+            try:
+                valid = passwords.verify(user.password_hash, password)
+            except HashingBusyError:
+                return auth_unavailable('login.html', 'The server is busy, please try again shortly', 503)
+            if valid:
+                login_failures.reset(f'user:{username}')
                 login_user(user)
+                remember_user_in_session(user)
                 next_page = request.args.get('next')
                 return redirect(next_page or url_for('problems'))
-            
+
         flash('Invalid username or password')
         return redirect(url_for('login'))
         
@@ -146,6 +498,7 @@ def login():
 @login_required
 def logout():
     logout_user()
+    session.pop('user', None)
     return redirect(url_for('home'))
 
 @app.route('/problems')
@@ -153,6 +506,67 @@ def logout():
 def problems():
     return render_template('problems.html')
 
+def get_solved_ids(user_id, problem_ids=None):
+    solved = get_stored_solved_ids(user_id, problem_ids)
+    # Toggles still waiting in this process's write buffer
+    pending = solved_writes.pending(user_id)
+    if pending:
+        solved = {problem_id for problem_id in solved if pending.get(problem_id, True)}
+        solved.update(problem_id for problem_id, state in pending.items() if state)
+    return solved
+
+def get_stored_solved_ids(user_id, problem_ids=None):
+    # Returns the user's whole solved set when problem_ids is None or the cache is enabled
+    if SOLVED_CACHE_TTL:
+        hit, solved = solved_cache.get(user_id)
+        if not hit:
+            solved = frozenset(
+                sp['problem_id'] for sp in db.solved_problems.find(
+                    {'user_id': user_id, 'solved': True},
+                    {'problem_id': 1, '_id': 0}
+                )
+            )
+            solved_cache.set(user_id, solved, SOLVED_CACHE_TTL)
+        return solved
+
+    query = {'user_id': user_id, 'solved': True}
+    if problem_ids is not None:
+        # Only look up the problems on the current page
+        query['problem_id'] = {'$in': problem_ids}
+    return {
+        sp['problem_id'] for sp in db.solved_problems.find(
+            query,
+            {'problem_id': 1, '_id': 0}
+        )
+    }
+
+def get_solved_changes(user_id, since=0):
+    """Return ``(version, solved_ids, unsolved_ids)`` for flags changed after version ``since``.
+
+    ``since=0`` returns every solved problem. Versions are ``updated_at``
+    times, which each worker stamps with its own clock, so changes are
+    re-read from a little before ``since`` rather than risk missing one.
+    """
+    query = {'user_id': user_id}
+    if since:
+        query['updated_at'] = {'$gt': EPOCH + timedelta(milliseconds=since) - SYNC_SOLVED_OVERLAP}
+    else:
+        query['solved'] = True
+
+    rows = SolvedRows.from_docs(
+        db.solved_problems.find(query, {'problem_id': 1, 'solved': 1, 'updated_at': 1, '_id': 0})
+    )
+    solved, unsolved = rows.split()
+    pending = solved_writes.pending(user_id)
+    if pending:
+        # Buffered toggles aren't stamped yet; the next sync after the flush repeats them
+        changed = set(pending)
+        solved = [problem_id for problem_id in solved if problem_id not in changed]
+        unsolved = [problem_id for problem_id in unsolved if problem_id not in changed]
+        for problem_id, state in pending.items():
+            (solved if state else unsolved).append(problem_id)
+    return max(since, rows.version()), solved, unsolved
+
 @app.route('/toggle-solved', methods=['POST'])
 @login_required_json
 def toggle_solved():
@@ -164,30 +578,103 @@ def toggle_solved():
         if not problem_id:
             return jsonify({'status': 'error', 'message': 'Problem ID is required'}), 400
             
-        # Check if problem already exists for user
-        solved_problem = db.solved_problems.find_one({
-            'user_id': str(current_user._id),
-            'problem_id': problem_id
-        })
-        
-        if solved_problem:
-            db.solved_problems.update_one(
-                {'_id': solved_problem['_id']},
-                {'$set': {'solved': solved, 'updated_at': datetime.utcnow()}}
-            )
+        user_id = str(current_user._id)
+        if SOLVED_WRITE_INTERVAL:
+            solved_writes.add(user_id, problem_id, bool(solved))
         else:
-            problem = SolvedProblem(
-                user_id=str(current_user._id),
-                problem_id=problem_id,
-                solved=solved
-            )
-            db.solved_problems.insert_one(problem.to_dict())
+            # Single atomic upsert on the (user_id, problem_id) unique index; the
+            # previous state tells whether the user's progress counts change
+            progress.toggle(user_id, problem_id, bool(solved))
+            solved_cache.delete(user_id)
             
         return jsonify({'status': 'success'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/toggle-solved/bulk', methods=['POST'])
+@login_required_json
+def bulk_toggle_solved():
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'status': 'error', 'message': 'Request body must be a JSON object'}), 400
+        problem_ids = data.get('problem_ids')
+        solved = data.get('solved')
+
+        if not problem_ids or not isinstance(problem_ids, list):
+            return jsonify({'status': 'error', 'message': 'A list of problem IDs is required'}), 400
+        if not all(isinstance(problem_id, str) and problem_id for problem_id in problem_ids):
+            return jsonify({'status': 'error', 'message': 'Problem IDs must be non-empty strings'}), 400
+        if not isinstance(solved, bool):
+            return jsonify({'status': 'error', 'message': 'solved must be true or false'}), 400
+
+        if len(problem_ids) > BULK_TOGGLE_MAX_PROBLEMS:
+            return jsonify({
+                'status': 'error',
+                'message': f'At most {BULK_TOGGLE_MAX_PROBLEMS} problems per request'
+            }), 400
+
+        user_id = str(current_user._id)
+        # Through the buffer, so earlier buffered toggles of these problems can't land after it
+        updated = solved_writes.toggle_many(user_id, problem_ids, solved)
+        solved_cache.delete(user_id)
+
+        return jsonify({
+            'status': 'success',
+            'updated': updated
+        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+def parse_catalog_filters(paid_default='exclude'):
+    """Read the catalog's search, filter and sort arguments from the query string.
+
+    Returns ``(filters, status, error)``: keyword arguments for
+    ``catalog.query``, the solved/unsolved filter, and a message for a 400
+    when an argument is invalid.
+    """
+    sort = request.args.get('sort') or None
+    order = request.args.get('order', 'asc')
+    paid = request.args.get('paid', paid_default)
+    status = request.args.get('status', '')
+
+    if sort is not None and sort not in SORT_FIELDS:
+        return None, None, f'Invalid sort field: {sort}'
+    if order not in ('asc', 'desc'):
+        return None, None, 'Order must be asc or desc'
+    if paid not in ('exclude', 'include', 'only'):
+        return None, None, 'Paid filter must be exclude, include or only'
+    if status not in ('', 'solved', 'unsolved'):
+        return None, None, 'Status filter must be solved or unsolved'
+
+    bounds = []
+    for name in ('min_acceptance', 'max_acceptance'):
+        value = request.args.get(name) or None
+        if value is not None:
+            try:
+                value = float(value)
+            except ValueError:
+                value = math.nan
+            if not 0 <= value <= 100:
+                return None, None, f'{name} must be a number from 0 to 100'
+        bounds.append(value)
+    min_ac_rate, max_ac_rate = bounds
+    if min_ac_rate is not None and max_ac_rate is not None and min_ac_rate > max_ac_rate:
+        return None, None, 'min_acceptance must not be above max_acceptance'
+
+    filters = {
+        'search': request.args.get('search', ''),
+        'difficulty': request.args.get('difficulty', ''),
+        'sort': sort,
+        'descending': order == 'desc',
+        'min_ac_rate': min_ac_rate,
+        'max_ac_rate': max_ac_rate,
+        'paid': paid
+    }
+    return filters, status, None
+
 @app.route('/scrape-leetcode')
+@cache_control('private, no-cache')
 def scrape_leetcode():
     # For browser access, just render the template
     if request.headers.get('x-api-key') != app.config['API_KEY']:
@@ -197,89 +684,52 @@ def scrape_leetcode():
         # Get pagination parameters
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
-        search = request.args.get('search', '')
-        difficulty = request.args.get('difficulty', '')
+        if page < 1 or per_page < 1:
+            return jsonify({'status': 'error', 'message': 'page and per_page must be at least 1'}), 400
+
+        filters, status, error = parse_catalog_filters()
+        if error:
+            return jsonify({'status': 'error', 'message': error}), 400
 
         # Calculate offset for pagination
         offset = (page - 1) * per_page
 
-        # Prepare GraphQL variables
-        variables = {
-            "categorySlug": "",
-            "skip": offset,
-            "limit": per_page,
-            "filters": {}
-        }
-
-        if difficulty:
-            variables["filters"]["difficulty"] = difficulty.upper()
-
-        if search:
-            variables["searchQuery"] = search
-
-        # Make the request to LeetCode API
-        response = requests.post(
-            'https://leetcode.com/graphql',
-            json={
-                'query': '''
-                query problemsetQuestionList($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
-                    problemsetQuestionList: questionList(
-                        categorySlug: $categorySlug
-                        limit: $limit
-                        skip: $skip
-                        filters: $filters
-                    ) {
-                        total: totalNum
-                        questions: data {
-                            questionId
-                            title
-                            titleSlug
-                            difficulty
-                            acRate
-                            status
-                            stats
-                            isPaidOnly
-                        }
-                    }
-                }
-                ''',
-                'variables': variables
-            }
-        )
-
         # Check if user is authenticated
         user_id = None
         if current_user.is_authenticated:
             user_id = str(current_user._id)
 
-        data = response.json()
-        if 'errors' in data:
-            return jsonify({'status': 'error', 'message': 'Error fetching data from LeetCode API'}), 500
+        # The solved/unsolved filter needs the user's whole solved set before paginating
+        solved_filter = None
+        all_solved = None
+        if status:
+            if not user_id:
+                return jsonify({'status': 'error', 'message': 'Authentication required'}), 401
+            solved_filter = status == 'solved'
+            all_solved = get_solved_ids(user_id)
 
-        questions_data = data['data']['problemsetQuestionList']
-        total_questions = questions_data['total']
-        questions = questions_data['questions']
+        # Serve the page from the local catalog mirror
+        try:
+            total_questions, rows = catalog.query(
+                skip=offset,
+                limit=per_page,
+                solved_ids=all_solved,
+                solved=solved_filter,
+                **filters
+            )
+        except CatalogSyncError:
+            return jsonify({'status': 'error', 'message': 'Error fetching data from LeetCode API'}), 500
+        except UpstreamUnavailableError as e:
+            return upstream_unavailable(e)
 
-        # Get solved problems for the current user if authenticated
+        # Get solved problems on this page for the current user if authenticated
         solved_problems = set()
-        if user_id:
-            solved_problems = {sp['problem_id'] for sp in db.solved_problems.find({'user_id': user_id, 'solved': True})}
-
-        # Process each problem
-        processed_problems = []
-        for q in questions:
-            if not q['isPaidOnly']:
-                stats = json.loads(q['stats'])
-                processed_problem = {
-                    'id': q['questionId'],
-                    'title': q['title'],
-                    'difficulty': q['difficulty'],
-                    'acceptance_rate': round(float(q['acRate']), 1),
-                    'total_accepted': int(stats['totalAcceptedRaw']),
-                    'total_submissions': int(stats['totalSubmissionRaw']),
-                    'solved': q['questionId'] in solved_problems if user_id else False
-                }
-                processed_problems.append(processed_problem)
+        if all_solved is not None:
+            solved_problems = all_solved
+        elif user_id:
+            solved_problems = get_solved_ids(user_id, [row['id'] for row in rows])
+
+        processed_problems = [dict(row, solved=row['id'] in solved_problems) for row in rows]
 
         # Calculate total pages
         total_pages = math.ceil(total_questions / per_page)
@@ -294,6 +744,117 @@ def scrape_leetcode():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/progress')
+@login_required_json
+@cache_control('private, no-cache')
+def user_progress():
+    try:
+        return jsonify({'status': 'success', 'progress': progress.get(str(current_user._id))})
+    except CatalogSyncError:
+        return jsonify({'status': 'error', 'message': 'Error fetching data from LeetCode API'}), 500
+    except UpstreamUnavailableError as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/progress/reconcile', methods=['POST'])
+@require_api_key
+def reconcile_progress():
+    # Same recount the scheduler runs daily; ?fix=false only reports
+    fix = request.args.get('fix', 'true').lower() != 'false'
+    return jsonify({'status': 'success', 'report': progress.reconcile(fix=fix)})
+
+@app.route('/problems/<slug>/details')
+@login_required_json
+def problem_details(slug):
+    details = crawler.get(slug)
+    if details is None:
+        return jsonify({'status': 'error', 'message': 'No details crawled for this problem yet'}), 404
+    details['slug'] = details.pop('_id')
+    return jsonify(dict(details, status='success'))
+
+@app.route('/crawler-status')
+@require_api_key
+def crawler_status():
+    return jsonify({
+        'status': 'success',
+        'data': crawler.status()
+    })
+
+@app.route('/sync')
+@login_required_json
+@cache_control('private, no-cache')
+def sync_changes():
+    # Catalog rows and the caller's solved flags changed since the versions the client holds
+    catalog_since = request.args.get('catalog_version', 0, type=int)
+    solved_since = request.args.get('solved_version', 0, type=int)
+    try:
+        catalog_version, rows, removed = catalog.changes(catalog_since)
+        solved_version, solved, unsolved = get_solved_changes(str(current_user._id), solved_since)
+        counts = catalog.counts()
+    except CatalogSyncError:
+        return jsonify({'status': 'error', 'message': 'Error fetching data from LeetCode API'}), 500
+    except UpstreamUnavailableError as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+    return jsonify({
+        'status': 'success',
+        'catalog': {
+            'version': catalog_version,
+            'full': catalog_since == 0,
+            # Rows as arrays in this field order; a full catalog is a third the size of objects
+            'fields': SYNC_FIELDS,
+            'rows': [[row[field] for field in SYNC_FIELDS] for row in rows],
+            'removed': removed
+        },
+        'solved': {
+            'version': solved_version,
+            'full': solved_since == 0,
+            'solved': solved,
+            'unsolved': unsolved
+        },
+        'counts': counts
+    })
+
+@app.route('/export')
+@login_required_json
+def export_problems():
+    # The whole filtered catalog in one streamed response, each row with the caller's solved flag
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'status': 'error', 'message': 'Format must be ndjson or csv'}), 400
+
+    # Everything paid-only included by default, flagged in its own column
+    filters, status, error = parse_catalog_filters(paid_default='include')
+    if error:
+        return jsonify({'status': 'error', 'message': error}), 400
+
+    # Fail before the first byte is sent: errors can't change the status of a started stream
+    try:
+        solved_ids = get_solved_ids(str(current_user._id))
+        rows = catalog.iter_rows(
+            solved_ids=solved_ids,
+            solved=(status == 'solved') if status else None,
+            **filters
+        )
+    except CatalogSyncError:
+        return jsonify({'status': 'error', 'message': 'Error fetching data from LeetCode API'}), 500
+    except UpstreamUnavailableError as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+    mimetype, encode = EXPORT_FORMATS[export_format]
+    response = app.response_class(
+        stream_with_context(encode(rows, solved_ids)),
+        mimetype=mimetype
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=leetcode-problems.{export_format}'
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
+
 @app.route('/api')
 @login_required
 def api_docs():
@@ -304,7 +865,64 @@ def api_docs():
 def swagger_json():
     return send_from_directory(os.path.join(BASE_DIR, 'static', 'api-docs'), 'swagger.json')
 
+def build_user_stats(user_data, get_problem_counts):
+    if 'errors' in user_data:
+        error_message = user_data['errors'][0]['message'] if user_data['errors'] else 'Unknown error'
+        return {
+            'status': 'error',
+            'message': f'Error fetching user data: {error_message}'
+        }
+    
+    if not user_data.get('data'):
+        return {
+            'status': 'error',
+            'message': 'Invalid response from LeetCode API'
+        }
+    
+    if not user_data['data'].get('matchedUser'):
+        return {
+            'status': 'error',
+            'message': 'User not found'
+        }
+
+    # Totals come from the local catalog, only needed once the user is known to exist
+    counts = get_problem_counts()
+    difficulty_totals = counts['byDifficulty']
+    
+    # Combine the data
+    result = {
+        'status': 'success',
+        'data': {
+            'profile': user_data['data']['matchedUser']['profile'],
+            'submitStats': {
+                'acSubmissionNum': []
+            },
+            'totalProblems': {
+                'total': counts['total'],
+                'byDifficulty': difficulty_totals
+            }
+        }
+    }
+    
+    # Map user's submission stats from EASY/MEDIUM/HARD to Easy/Medium/Hard
+    difficulty_map = {
+        'EASY': 'Easy',
+        'MEDIUM': 'Medium',
+        'HARD': 'Hard',
+        'All': 'All'
+    }
+    
+    for stat in user_data['data']['matchedUser']['submitStats']['acSubmissionNum']:
+        mapped_difficulty = difficulty_map.get(stat['difficulty'], stat['difficulty'])
+        result['data']['submitStats']['acSubmissionNum'].append({
+            'difficulty': mapped_difficulty,
+            'count': stat['count']
+        })
+    
+    return result
+
 @app.route('/user-stats', methods=['GET', 'POST'])
+@cache_control('private, no-cache')
 def user_stats():
     if request.method == 'GET':
         # For browser access, just render the template
@@ -319,222 +937,145 @@ def user_stats():
         return jsonify({'status': 'error', 'message': 'Username is required'})
 
     try:
-        # Get user stats first
-        user_query = """
-        query getUserProfile($username: String!) {
-          matchedUser(username: $username) {
-            profile {
-              ranking
-              reputation
-              starRating
-            }
-            submitStats: submitStatsGlobal {
-              acSubmissionNum {
-                difficulty
-                count
-                submissions
-              }
-            }
-          }
-        }
-        """
-        
-        user_variables = {"username": username}
-        
-        user_response = requests.post(
-            'https://leetcode.com/graphql',
-            json={'query': user_query, 'variables': user_variables},
-            headers={
-                'Content-Type': 'application/json',
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-        )
-        
-        user_data = user_response.json()
-        
-        if 'errors' in user_data:
-            error_message = user_data['errors'][0]['message'] if user_data['errors'] else 'Unknown error'
-            return jsonify({
-                'status': 'error',
-                'message': f'Error fetching user data: {error_message}'
-            })
-        
-        if not user_data.get('data'):
-            return jsonify({
-                'status': 'error',
-                'message': 'Invalid response from LeetCode API'
-            })
-        
-        if not user_data['data'].get('matchedUser'):
-            return jsonify({
-                'status': 'error',
-                'message': 'User not found'
-            })
+        # Profiles are kept fresh in the background; counts are served from the catalog
+        user_data = profiles.get(username)
+        return jsonify(build_user_stats(user_data, catalog.counts))
 
-        # Get problem counts using the optimized query
-        problems_query = """
-        query problemsetQuestionList($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
-          all: questionList(categorySlug: $categorySlug, limit: $limit, skip: $skip, filters: $filters) {
-            totalNum
-          }
-          easy: questionList(categorySlug: $categorySlug, filters: {difficulty: EASY}) {
-            totalNum
-          }
-          medium: questionList(categorySlug: $categorySlug, filters: {difficulty: MEDIUM}) {
-            totalNum
-          }
-          hard: questionList(categorySlug: $categorySlug, filters: {difficulty: HARD}) {
-            totalNum
-          }
-        }
-        """
-        
-        problems_variables = {
-            "categorySlug": "",
-            "skip": 0,
-            "limit": 1,  # We only need the count
-            "filters": {}
-        }
+    except UpstreamUnavailableError as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': 'An error occurred while fetching user statistics'
+        })
 
-        problems_response = requests.post(
-            'https://leetcode.com/graphql',
-            json={'query': problems_query, 'variables': problems_variables},
-            headers={
-                'Content-Type': 'application/json',
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-        )
-        
-        problems_data = problems_response.json()
-        
-        if 'errors' in problems_data:
-            error_message = problems_data['errors'][0]['message'] if problems_data['errors'] else 'Unknown error'
-            return jsonify({
+@app.route('/user-stats/bulk', methods=['POST'])
+@require_api_key
+def bulk_user_stats():
+    data = request.get_json(silent=True) or {}
+    usernames = data.get('usernames')
+    if not usernames or not isinstance(usernames, list):
+        return jsonify({'status': 'error', 'message': 'A list of usernames is required'}), 400
+
+    # Drop duplicates while keeping the requested order
+    usernames = list(dict.fromkeys(str(username) for username in usernames if username))
+    if len(usernames) > BULK_STATS_MAX_USERS:
+        return jsonify({
+            'status': 'error',
+            'message': f'At most {BULK_STATS_MAX_USERS} usernames per request'
+        }), 400
+
+    profile_futures = [upstream_executor.submit(profiles.get, username) for username in usernames]
+
+    results = []
+    for username, future in zip(usernames, profile_futures):
+        try:
+            result = build_user_stats(future.result(), catalog.counts)
+        except UpstreamUnavailableError:
+            result = {
                 'status': 'error',
-                'message': f'Error fetching problem data: {error_message}'
-            })
-        
-        if not problems_data.get('data'):
-            return jsonify({
+                'message': 'LeetCode is temporarily unavailable, please try again shortly'
+            }
+        except Exception:
+            result = {
                 'status': 'error',
-                'message': 'Invalid response from LeetCode API for problems'
-            })
-        
-        result_data = problems_data['data']
-        
-        # Map the difficulty levels from LeetCode's API response (EASY, MEDIUM, HARD)
-        # to our frontend format (Easy, Medium, Hard)
-        difficulty_totals = {
-            'Easy': result_data['easy']['totalNum'],
-            'Medium': result_data['medium']['totalNum'],
-            'Hard': result_data['hard']['totalNum']
-        }
-        
-        # Combine the data
-        result = {
-            'status': 'success',
-            'data': {
-                'profile': user_data['data']['matchedUser']['profile'],
-                'submitStats': {
-                    'acSubmissionNum': []
-                },
-                'totalProblems': {
-                    'total': result_data['all']['totalNum'],
-                    'byDifficulty': difficulty_totals
-                }
+                'message': 'An error occurred while fetching user statistics'
             }
-        }
-        
-        # Map user's submission stats from EASY/MEDIUM/HARD to Easy/Medium/Hard
-        difficulty_map = {
-            'EASY': 'Easy',
-            'MEDIUM': 'Medium',
-            'HARD': 'Hard',
-            'All': 'All'
-        }
-        
-        for stat in user_data['data']['matchedUser']['submitStats']['acSubmissionNum']:
-            mapped_difficulty = difficulty_map.get(stat['difficulty'], stat['difficulty'])
-            result['data']['submitStats']['acSubmissionNum'].append({
-                'difficulty': mapped_difficulty,
-                'count': stat['count']
-            })
-        
-        return jsonify(result)
-        
-    except Exception as e:
+        results.append(dict(result, username=username))
+
+    return jsonify({
+        'status': 'success',
+        'results': results
+    })
+
+@app.route('/user-stats/history')
+@require_api_key
+def user_stats_history():
+    usernames = [u.strip() for u in request.args.get('usernames', '').split(',') if u.strip()]
+    if not usernames:
+        return jsonify({'status': 'error', 'message': 'At least one username is required'}), 400
+    if len(usernames) > HISTORY_MAX_USERS:
         return jsonify({
             'status': 'error',
-            'message': 'An error occurred while fetching user statistics'
-        })
+            'message': f'At most {HISTORY_MAX_USERS} usernames per request'
+        }), 400
+
+    try:
+        start, end = parse_range(request.args.get('start'), request.args.get('end'))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'start and end must be ISO dates'}), 400
+    if start > end:
+        return jsonify({'status': 'error', 'message': 'start must not be after end'}), 400
+
+    return jsonify({
+        'status': 'success',
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'data': history.progression(list(dict.fromkeys(usernames)), start, end)
+    })
+
+@app.route('/leaderboard')
+@require_api_key
+def leaderboard_top():
+    board = request.args.get('board', 'total')
+    limit = request.args.get('limit', 10, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    if board not in BOARDS:
+        return jsonify({'status': 'error', 'message': f'Board must be one of {", ".join(BOARDS)}'}), 400
+    if not 0 < limit <= LEADERBOARD_MAX_LIMIT or offset < 0:
+        return jsonify({'status': 'error', 'message': f'Limit must be 1-{LEADERBOARD_MAX_LIMIT}, offset at least 0'}), 400
+
+    return jsonify({
+        'status': 'success',
+        'board': board,
+        'total': len(leaderboard),
+        'entries': leaderboard.top(board, limit, offset)
+    })
+
+@app.route('/leaderboard/<username>')
+@require_api_key
+def leaderboard_position(username):
+    board = request.args.get('board', 'total')
+    neighbours = request.args.get('neighbours', 5, type=int)
+    if board not in BOARDS:
+        return jsonify({'status': 'error', 'message': f'Board must be one of {", ".join(BOARDS)}'}), 400
+    if not 0 <= neighbours <= LEADERBOARD_MAX_LIMIT:
+        return jsonify({'status': 'error', 'message': f'Neighbours must be 0-{LEADERBOARD_MAX_LIMIT}'}), 400
+
+    position = leaderboard.position(board, username, neighbours)
+    if position is None:
+        # Looking a user up through /user-stats adds them to the cohort
+        return jsonify({'status': 'error', 'message': f'{username} is not on the leaderboard'}), 404
+    return jsonify(dict(position, status='success', board=board))
 
 @app.route('/problem-counts')
+@cache_control(f'private, max-age={PROBLEM_COUNTS_MAX_AGE}')
 def problem_counts():
     # For browser access, just render the template
     if request.headers.get('x-api-key') != app.config['API_KEY']:
         return jsonify({'status': 'error', 'message': 'Invalid API key'}), 401
         
     try:
-        # Query to get total count and counts by difficulty
-        problems_query = """
-        query problemsetQuestionList($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
-          all: questionList(categorySlug: $categorySlug, limit: $limit, skip: $skip, filters: $filters) {
-            totalNum
-          }
-          easy: questionList(categorySlug: $categorySlug, filters: {difficulty: EASY}) {
-            totalNum
-          }
-          medium: questionList(categorySlug: $categorySlug, filters: {difficulty: MEDIUM}) {
-            totalNum
-          }
-          hard: questionList(categorySlug: $categorySlug, filters: {difficulty: HARD}) {
-            totalNum
-          }
-        }
-        """
-        
-        variables = {
-            "categorySlug": "",
-            "skip": 0,
-            "limit": 1,  # We only need the count, so limit to 1
-            "filters": {}
-        }
-
-        response = requests.post(
-            'https://leetcode.com/graphql',
-            json={'query': problems_query, 'variables': variables},
-            headers={
-                'Content-Type': 'application/json',
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-        )
-        
-        if not response.ok:
+        # Counts come from the local catalog, which is refreshed in the background
+        try:
+            counts = catalog.counts()
+        except UpstreamUnavailableError as e:
+            # Before UpstreamHTTPError: a throttled response is both
+            return upstream_unavailable(e)
+        except UpstreamHTTPError as e:
             return jsonify({
                 'status': 'error',
-                'message': f'HTTP Error: {response.status_code}'
+                'message': f'HTTP Error: {e.status_code}'
             })
-
-        data = response.json()
-        
-        if 'errors' in data:
+        except CatalogSyncError:
             return jsonify({
                 'status': 'error',
                 'message': 'Error fetching problem data'
             })
         
-        result_data = data['data']
-        
         return jsonify({
             'status': 'success',
-            'data': {
-                'total': result_data['all']['totalNum'],
-                'byDifficulty': {
-                    'Easy': result_data['easy']['totalNum'],
-                    'Medium': result_data['medium']['totalNum'],
-                    'Hard': result_data['hard']['totalNum']
-                }
-            }
+            'data': counts
         })
         
     except Exception as e:
@@ -543,11 +1084,45 @@ def problem_counts():
             'message': 'An error occurred while fetching problem counts'
         })
 
+@app.route('/upstream-stats')
+@require_api_key
+def upstream_stats():
+    return jsonify({
+        'status': 'success',
+        'data': leetcode.stats()
+    })
+
+@app.route('/solved-write-stats')
+@require_api_key
+def solved_write_stats():
+    return jsonify({
+        'status': 'success',
+        'data': solved_writes.stats()
+    })
+
+@app.route('/scheduler-status')
+@require_api_key
+def scheduler_status():
+    return jsonify({
+        'status': 'success',
+        'data': scheduler.status()
+    })
+
+@app.route('/metrics')
+def metrics():
+    # Scrapers have no session, so this route is public and checks the key itself;
+    # Prometheus can send it as a bearer token
+    api_key = request.headers.get('x-api-key') or request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not api_key or api_key != app.config['API_KEY']:
+        return jsonify({'status': 'error', 'message': 'Invalid API key'}), 401
+    body, content_type = render_latest()
+    return body, 200, {'Content-Type': content_type, 'Cache-Control': 'no-store'}
+
 @app.route('/health')
 def health():
     try:
         # Check MongoDB connection
-        client.admin.command('ping')
+        db.client.admin.command('ping')
         mongodb_status = 'healthy'
     except Exception as e:
         mongodb_status = 'unhealthy'
@@ -571,7 +1146,4 @@ def health():
     }), 200 if mongodb_status == 'healthy' else 503
 
 if __name__ == '__main__':
-    with app.app_context():
-        db.users.create_index('username', unique=True)
-        db.users.create_index('email', unique=True)
     app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,162 @@
+import gzip
+import hashlib
+import io
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import sys
+
+from flask import abort, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DIRS = ('css', 'js', 'images')
+TEXT_TYPES = ('text/css', 'text/javascript', 'application/javascript', 'image/svg+xml')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Precompressed bodies, best first, by the Accept-Encoding token that selects them
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def fingerprint(name, data):
+    root, ext = os.path.splitext(name)
+    return f'{root}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def to_webp(path):
+    """Animated WebP bytes for a GIF, or None without Pillow."""
+    try:
+        from PIL import Image, ImageSequence
+    except ImportError:
+        return None
+    with Image.open(path) as im:
+        if not getattr(im, 'is_animated', False):
+            return None
+        frames, durations = [], []
+        for frame in ImageSequence.Iterator(im):
+            durations.append(frame.info.get('duration', 100))
+            frames.append(frame.convert('RGBA'))
+    out = io.BytesIO()
+    frames[0].save(out, 'WEBP', save_all=True, append_images=frames[1:], duration=durations,
+                   loop=0, quality=75, method=4, allow_mixed=True, minimize_size=True)
+    return out.getvalue()
+
+
+def build(static_dir, out_dir=None):
+    """Rebuild ``out_dir`` (``static/dist``) from ``static_dir``; returns the manifest.
+
+    Each CSS, JS and image file is copied under a name containing a hash of
+    its content, so it can be cached forever. Text assets get ``.br`` and
+    ``.gz`` siblings, and animated GIFs an animated WebP (with Pillow
+    installed). ``manifest.json`` maps source names to what was built.
+    """
+    out_dir = out_dir or os.path.join(static_dir, 'dist')
+    shutil.rmtree(out_dir, ignore_errors=True)
+    manifest = {'assets': {}, 'files': {}}
+
+    def write(name, data, mimetype):
+        path = fingerprint(name, data)
+        target = os.path.join(out_dir, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+        encodings = []
+        if mimetype in TEXT_TYPES:
+            compressed = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed['br'] = brotli.compress(data, quality=11)
+            for encoding, suffix in ENCODINGS:
+                body = compressed.get(encoding)
+                # Tiny files can come out larger compressed
+                if body is not None and len(body) < len(data):
+                    with open(target + suffix, 'wb') as f:
+                        f.write(body)
+                    encodings.append(encoding)
+        manifest['files'][path] = {'type': mimetype, 'encodings': encodings}
+        return path
+
+    for directory in SOURCE_DIRS:
+        for root, _, files in os.walk(os.path.join(static_dir, directory)):
+            for filename in sorted(files):
+                source = os.path.join(root, filename)
+                name = os.path.relpath(source, static_dir).replace(os.sep, '/')
+                mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                with open(source, 'rb') as f:
+                    data = f.read()
+                entry = {'path': write(name, data, mimetype), 'variants': {}}
+                if mimetype == 'image/gif':
+                    webp = to_webp(source)
+                    # Only worth offering when it is actually smaller
+                    if webp is not None and len(webp) < len(data):
+                        entry['variants']['webp'] = write(os.path.splitext(name)[0] + '.webp', webp, 'image/webp')
+                manifest['assets'][name] = entry
+
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class AssetManifest:
+    """Resolves asset names to built files and serves them, precompressed, with an immutable Cache-Control.
+
+    Without a manifest (an unbuilt checkout) names resolve to the plain
+    files under ``static/``.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.assets = {}
+        self.files = {}
+
+    def load(self):
+        try:
+            with open(os.path.join(self.directory, 'manifest.json')) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            logger.info('No built assets in %s, serving static files as they are', self.directory)
+            manifest = {}
+        self.assets = manifest.get('assets', {})
+        self.files = manifest.get('files', {})
+        return len(self.assets)
+
+    def url(self, name, variant=None):
+        """URL of an asset, or of one of its variants (None when it wasn't built)."""
+        entry = self.assets.get(name)
+        if variant is not None:
+            path = entry and entry['variants'].get(variant)
+            return url_for('static_assets', filename=path) if path else None
+        if entry is None:
+            return url_for('static', filename=name)
+        return url_for('static_assets', filename=entry['path'])
+
+    def send(self, filename):
+        info = self.files.get(filename)
+        if info is None:
+            abort(404)
+        accepted = request.accept_encodings
+        encoding, suffix = next(
+            ((encoding, suffix) for encoding, suffix in ENCODINGS
+             if encoding in info['encodings'] and encoding in accepted),
+            (None, '')
+        )
+        response = send_from_directory(self.directory, filename + suffix, mimetype=info['type'])
+        if info['encodings']:
+            response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    static_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    built = build(static_dir)
+    for name, entry in sorted(built['assets'].items()):
+        print(name, '->', entry['path'], *entry['variants'].values())
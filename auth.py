@@ -0,0 +1,146 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+class HashingBusyError(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Hashes and checks passwords in a small process pool instead of the request worker.
+
+    Password hashes (scrypt) take tens of milliseconds of CPU each; run
+    inline they stall every other request on a gevent worker. At most
+    ``max_pending`` hashes are queued or running per process; past that
+    :class:`HashingBusyError` is raised at once rather than queueing logins
+    the client will have given up on. ``workers=0`` hashes inline.
+
+    The pool is started on first use in each process, as it can't be
+    shared across a fork. It uses ``spawn``, so workers don't inherit the
+    app's sockets or gevent's patched threads.
+    """
+
+    def __init__(self, workers=2, max_pending=32, timeout=10.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.hashed = 0
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        if self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool_pid != os.getpid():
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                    )
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def _run(self, func, *args):
+        if not self.workers:
+            self.hashed += 1
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingBusyError('Too many password checks in progress')
+        try:
+            pool = self._get_pool()
+            result = pool.submit(func, *args).result(timeout=self.timeout)
+        except BrokenProcessPool:
+            # A killed pool process breaks the pool; start a fresh one next time
+            with self._lock:
+                if self._pool is pool:
+                    self._pool_pid = None
+            raise HashingBusyError('Password hashing pool restarted')
+        except TimeoutError:
+            raise HashingBusyError('Password check timed out')
+        finally:
+            self._slots.release()
+        self.hashed += 1
+        return result
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+            self._pool_pid = None
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'hashed': self.hashed,
+            'rejected': self.rejected
+        }
+
+
+class AttemptThrottle:
+    """Counts attempts per key (a client IP, a username) in fixed windows of ``window`` seconds.
+
+    Counters live in ``collection``, one document per key and window, so
+    every worker shares them; a TTL index drops them once their window has
+    passed. ``limit=0`` disables the throttle. As with the upstream rate
+    limiter, attempts are let through if MongoDB can't be reached.
+    """
+
+    def __init__(self, collection, limit, window):
+        self.collection = collection
+        self.limit = limit
+        self.window = window
+
+    def ensure_indexes(self):
+        self.collection.create_index('expires_at', expireAfterSeconds=0)
+
+    def _window(self, key):
+        start = int(time.time() // self.window * self.window)
+        return f'{key}:{start}', datetime.utcfromtimestamp(start + self.window)
+
+    def hit(self, key):
+        """Count one attempt; returns the attempts in this window, this one included."""
+        window_id, expires_at = self._window(key)
+        try:
+            doc = self.collection.find_one_and_update(
+                {'_id': window_id},
+                {'$inc': {'count': 1}, '$setOnInsert': {'expires_at': expires_at}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except PyMongoError as e:
+            logger.warning('Attempt throttle unavailable, letting the attempt through: %s', e)
+            return 0
+        return doc['count']
+
+    def exceeded(self, key):
+        """Count one attempt and return whether it is over the limit."""
+        return bool(self.limit) and self.hit(key) > self.limit
+
+    def reset(self, key):
+        window_id, _ = self._window(key)
+        try:
+            self.collection.delete_one({'_id': window_id})
+        except PyMongoError:
+            pass
@@ -0,0 +1,162 @@
+"""Requests and bytes per problems-page session: server paging versus the local catalog copy.
+
+    python -m benchmarks.bench_browse_session --problems 3000
+
+Runs the app in-process on the stub upstream and in-memory MongoDB (as
+``benchmarks.suite`` does) and replays one browsing session - open the
+page, page forward, search, sort, toggle a few problems - the way each
+version of the page's script issues requests. Bytes are response bodies
+as sent with ``Accept-Encoding: gzip``.
+
+``server paging`` is the previous page: counts and a page of results on
+every view. ``paging fallback`` is the page without IndexedDB: counts once,
+each view from the server plus a prefetch of the next page. ``cold cache``
+is a first visit with IndexedDB (one full /sync), ``warm cache`` a return
+visit after a catalog refresh changed a few problems (one delta /sync).
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+from benchmarks.suite import API_KEY, build_app, login_clients
+
+HEADERS = {'x-api-key': API_KEY, 'Accept-Encoding': 'gzip'}
+
+# (page, search, sort, order) for each view, then problems toggled along the way
+SESSION = [
+    (1, '', 'id', 'asc'),
+    (2, '', 'id', 'asc'),
+    (3, '', 'id', 'asc'),
+    (4, '', 'id', 'asc'),
+    (1, 'tree', 'id', 'asc'),
+    (1, 'binary tree', 'id', 'asc'),
+    (2, 'binary tree', 'id', 'asc'),
+    (1, '', 'difficulty', 'desc'),
+    (2, '', 'difficulty', 'desc'),
+    (1, '', 'acceptance', 'desc'),
+    (1, '', 'id', 'asc'),
+    (5, '', 'id', 'asc'),
+]
+TOGGLES = 4
+
+SORT_PARAMS = {'id': 'id', 'difficulty': 'difficulty', 'acceptance': 'acceptance_rate'}
+
+
+class Recorder:
+    def __init__(self, client):
+        self.client = client
+        self.requests = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def request(self, method, url, **kwargs):
+        start = time.perf_counter()
+        response = getattr(self.client, method)(url, headers=HEADERS, **kwargs)
+        self.seconds += time.perf_counter() - start
+        self.requests += 1
+        body = response.get_data()
+        self.bytes += len(body)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url}: {response.status_code}')
+        if response.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return json.loads(body)
+
+    def page_url(self, page, search, sort, order):
+        url = f'/scrape-leetcode?page={page}&per_page=50'
+        if search:
+            url += f'&search={search}'
+        if (sort, order) != ('id', 'asc'):
+            url += f'&sort={SORT_PARAMS[sort]}&order={order}'
+        return url
+
+    def toggles(self, rng, problems):
+        for _ in range(TOGGLES):
+            self.request('post', '/toggle-solved', json={'problem_id': str(rng.randint(1, problems)), 'solved': True})
+
+
+def server_paging(recorder, rng, problems):
+    for view in SESSION:
+        recorder.request('get', '/problem-counts')
+        recorder.request('get', recorder.page_url(*view))
+    recorder.toggles(rng, problems)
+
+
+def paging_fallback(recorder, rng, problems):
+    recorder.request('get', '/problem-counts')
+    fetched = set()
+    for view in SESSION:
+        page, rest = view[0], view[1:]
+        for url in (recorder.page_url(page, *rest), recorder.page_url(page + 1, *rest)):
+            if url not in fetched:
+                fetched.add(url)
+                recorder.request('get', url)
+    recorder.toggles(rng, problems)
+
+
+def cached(recorder, rng, problems, versions):
+    body = recorder.request(
+        'get', f"/sync?catalog_version={versions['catalog']}&solved_version={versions['solved']}"
+    )
+    versions.update(catalog=body['catalog']['version'], solved=body['solved']['version'])
+    # Every view is served from the local copy
+    recorder.toggles(rng, problems)
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--problems', type=int, default=3000)
+    parser.add_argument('--changed', type=int, default=20, help='problems changed upstream between visits')
+    parser.add_argument('--mongo-latency-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = create_app(args.problems, 0.0)
+    server, upstream_url = serve_in_thread(stub)
+    try:
+        app_module = build_app(args, upstream_url)
+        client, = login_clients(app_module, 1, args.problems, random.Random(0))
+        # Solved history is older than the window /sync re-reads
+        app_module.db.solved_problems.update_many({}, {'$set': {'updated_at': datetime.utcnow() - timedelta(days=1)}})
+
+        results = []
+        for name, run in (('server paging', server_paging), ('paging fallback', paging_fallback)):
+            recorder = Recorder(client)
+            run(recorder, random.Random(1), args.problems)
+            results.append((name, recorder))
+
+        versions = {'catalog': 0, 'solved': 0}
+        recorder = Recorder(client)
+        cold = cached(recorder, random.Random(1), args.problems, versions)
+        results.append(('cold cache', recorder))
+
+        # Acceptance rates drift, one problem is added and one withdrawn
+        questions = stub.config['PROBLEMS']
+        for question in random.Random(2).sample(questions, args.changed):
+            question['acRate'] += 1.0
+        questions.append(dict(questions[0], questionId=str(args.problems + 1), frontendQuestionId=str(args.problems + 1),
+                              title='New Problem', titleSlug='new-problem'))
+        questions.pop(1)
+        app_module.catalog.sync()
+
+        recorder = Recorder(client)
+        warm = cached(recorder, random.Random(1), args.problems, versions)
+        results.append(('warm cache', recorder))
+    finally:
+        server.shutdown()
+
+    print(f'One session of {len(SESSION)} views and {TOGGLES} toggles over {args.problems} problems')
+    print(f"  {'flow':<20}{'requests':>10}{'KiB sent':>10}{'server ms':>11}")
+    for name, recorder in results:
+        print(f'  {name:<20}{recorder.requests:>10}{recorder.bytes / 1024:>10.1f}{recorder.seconds * 1000:>11.1f}')
+    print(f"\ncold /sync: {len(cold['catalog']['rows'])} rows, {len(cold['solved']['solved'])} solved; "
+          f"warm /sync: {len(warm['catalog']['rows'])} changed rows, {len(warm['catalog']['removed'])} removed, "
+          f"{len(warm['solved']['solved'])} solved flags")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Page-view latency with and without the local problem catalog mirror.
+
+    python -m benchmarks.bench_catalog --latency-ms 120 --iterations 200
+"""
+import argparse
+import json
+
+import requests
+
+from benchmarks.common import print_table, summarize, timed
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+from catalog import CATALOG_QUERY, ProblemCatalog
+from leetcode_client import LeetCodeClient
+
+SEARCH_TERMS = ['', 'tree', 'sum', 'palindrome', '12']
+DIFFICULTIES = ['', 'EASY', 'MEDIUM', 'HARD']
+
+
+def request_args(i, per_page, pages):
+    return {
+        'skip': (i % pages) * per_page,
+        'limit': per_page,
+        'search': SEARCH_TERMS[i % len(SEARCH_TERMS)],
+        'difficulty': DIFFICULTIES[i % len(DIFFICULTIES)],
+    }
+
+
+def process(questions):
+    # Same per-row work scrape_leetcode does after fetching a page
+    for q in questions:
+        stats = json.loads(q['stats'])
+        round(float(q['acRate']), 1)
+        int(stats['totalAcceptedRaw'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--problems', type=int, default=3000)
+    parser.add_argument('--latency-ms', type=float, default=120.0)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--per-page', type=int, default=50)
+    args = parser.parse_args()
+
+    server, url = serve_in_thread(create_app(args.problems, args.latency_ms / 1000.0))
+    pages = max(1, args.problems // args.per_page)
+
+    def upstream(i):
+        kwargs = request_args(i, args.per_page, pages)
+        variables = {
+            'categorySlug': '',
+            'skip': kwargs['skip'],
+            'limit': kwargs['limit'],
+            'filters': {'difficulty': kwargs['difficulty']} if kwargs['difficulty'] else {}
+        }
+        if kwargs['search']:
+            variables['searchQuery'] = kwargs['search']
+        data = requests.post(url, json={'query': CATALOG_QUERY, 'variables': variables}).json()
+        process(data['data']['problemsetQuestionList']['questions'])
+
+    catalog = ProblemCatalog(None, LeetCodeClient(url))
+    catalog.ensure_loaded()
+
+    def mirrored(i):
+        # Rows come back pre-parsed, so there is no per-row work left to do
+        catalog.query(**request_args(i, args.per_page, pages))
+
+    try:
+        print_table(
+            f'{args.iterations} page views, {args.problems} problems, '
+            f'{args.latency_ms:.0f} ms upstream latency',
+            [
+                ('upstream per request', summarize(timed(upstream, args.iterations))),
+                ('local catalog mirror', summarize(timed(mirrored, args.iterations))),
+            ]
+        )
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
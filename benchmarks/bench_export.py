@@ -0,0 +1,85 @@
+"""Exporting a user's whole problem list: paging through /scrape-leetcode versus one /export stream.
+
+    python -m benchmarks.bench_export --problems 3000 --iterations 20
+
+Runs the app in-process on the stub upstream and in-memory MongoDB (as
+``benchmarks.suite`` does) with a logged-in user who has solved a fifth of
+the catalog. Peak memory is what tracemalloc sees allocated during one
+export. For /export it only covers consuming the body chunk by chunk, as a
+client reading the socket would: the view's solved-set query runs before
+the first chunk, and the MongoDB stand-in copies whole result sets where
+pymongo would stream them in batches.
+"""
+import argparse
+import random
+import tracemalloc
+
+from benchmarks.common import print_table, summarize, timed
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+from benchmarks.suite import API_KEY, build_app, login_clients
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--problems', type=int, default=3000)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--per-page', type=int, default=50)
+    parser.add_argument('--mongo-latency-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, upstream_url = serve_in_thread(create_app(args.problems, 0.0))
+    try:
+        app_module = build_app(args, upstream_url)
+        client, = login_clients(app_module, 1, args.problems, random.Random(0))
+
+        def paged(i):
+            page, rows = 1, 0
+            while True:
+                body = client.get(
+                    f'/scrape-leetcode?page={page}&per_page={args.per_page}&paid=include',
+                    headers={'x-api-key': API_KEY}
+                ).get_json()
+                rows += len(body['problems'])
+                if page >= body['total_pages']:
+                    return rows
+                page += 1
+
+        def streamed(export_format):
+            def run(i):
+                response = client.get(f'/export?format={export_format}')
+                if tracemalloc.is_tracing():
+                    # Count only what the body adds on top of the view's own state
+                    tracemalloc.reset_peak()
+                    baseline[0] = tracemalloc.get_traced_memory()[0]
+                size = sum(len(chunk) for chunk in response.response)
+                response.close()
+                return size
+            return run
+
+        cases = [
+            (f'paged, {args.per_page} per request', paged),
+            ('/export ndjson', streamed('ndjson')),
+            ('/export csv', streamed('csv')),
+        ]
+        rows = []
+        peaks = []
+        baseline = [0]
+        for name, func in cases:
+            func(0)
+            rows.append((name, summarize(timed(func, args.iterations))))
+            tracemalloc.start()
+            baseline[0] = 0
+            func(0)
+            peaks.append((name, tracemalloc.get_traced_memory()[1] - baseline[0]))
+            tracemalloc.stop()
+    finally:
+        server.shutdown()
+
+    print_table(f'Full export of {args.problems} problems, {args.iterations} runs', rows)
+    print('Peak allocated during one export')
+    for name, peak in peaks:
+        print(f'  {name:<28}{peak / 1024:>10.1f} KB')
+
+
+if __name__ == '__main__':
+    main()
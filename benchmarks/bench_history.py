@@ -0,0 +1,102 @@
+"""Stats history query cost over hundreds of thousands of synthetic snapshots.
+
+    MONGODB_URI=mongodb://127.0.0.1:27017 python -m benchmarks.bench_history --users 500 --days 400
+
+Seeds a scratch database with the bucket layout StatsHistory writes, then
+times single-user and cohort progression queries and reports how many
+bucket documents each one examined.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+from benchmarks.common import print_table, summarize, timed
+from history import StatsHistory, day_bucket
+
+
+def seed(collection, users, days, refreshes_per_day, change_probability):
+    # Builds the same bucket layout StatsHistory.record writes, in bulk
+    rng = random.Random(0)
+    start = datetime(2025, 1, 1)
+    snapshots = 0
+    for u in range(users):
+        username = f'user-{u}'
+        values = None
+        buckets = []
+        for day in range(days):
+            bucket_day = start + timedelta(days=day)
+            bucket = {'username': username, 'bucket': bucket_day, 'prev_values': values, 'samples': [], 'count': 0}
+            for refresh in range(refreshes_per_day):
+                ts = bucket_day + timedelta(hours=refresh * 24 / refreshes_per_day)
+                bucket.setdefault('first', ts)
+                if values is None or rng.random() < change_probability:
+                    values = dict(values or {'a': 0, 'e': 0, 'm': 0, 'h': 0, 'r': 5000000})
+                    key = rng.choice('emh')
+                    values[key] += 1
+                    values['a'] += 1
+                    values['r'] -= rng.randint(1, 500)
+                    bucket['samples'].append(dict(values, t=ts))
+                    bucket['count'] += 1
+                    bucket['last'] = ts
+            bucket['last_values'] = values
+            snapshots += bucket['count']
+            buckets.append(bucket)
+        collection.insert_many(buckets, ordered=False)
+    return start, snapshots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--days', type=int, default=400)
+    parser.add_argument('--refreshes-per-day', type=int, default=4)
+    parser.add_argument('--change-probability', type=float, default=0.3)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv('MONGODB_URI', 'mongodb://127.0.0.1:27017'))
+    db = client.leetcode_scraper_bench
+    db.stats_history.drop()
+    history = StatsHistory(db.stats_history)
+    history.ensure_indexes()
+
+    seed_start = time.perf_counter()
+    start, snapshots = seed(db.stats_history, args.users, args.days, args.refreshes_per_day, args.change_probability)
+    print(f'seeded {snapshots} change snapshots in {db.stats_history.count_documents({})} buckets '
+          f'({time.perf_counter() - seed_start:.1f} s)')
+
+    range_start = start + timedelta(days=args.days - 60)
+    range_end = start + timedelta(days=args.days - 30)
+    cohort = [f'user-{u}' for u in range(min(100, args.users))]
+
+    def examined(usernames):
+        explain = db.command('explain', {
+            'aggregate': db.stats_history.name,
+            'pipeline': [{'$match': {
+                'username': {'$in': usernames},
+                'bucket': {'$gte': day_bucket(range_start), '$lte': day_bucket(range_end)}
+            }}],
+            'cursor': {}
+        }, verbosity='executionStats')
+        stats = explain.get('executionStats') or explain['stages'][0]['$cursor']['executionStats']
+        return stats['totalDocsExamined']
+
+    try:
+        print_table(
+            f'30-day progression queries over {args.users} users x {args.days} days',
+            [
+                ('one user', summarize(timed(lambda i: history.progression(['user-1'], range_start, range_end), args.iterations))),
+                (f'cohort of {len(cohort)}', summarize(timed(lambda i: history.progression(cohort, range_start, range_end), args.iterations))),
+            ]
+        )
+        print(f'  docs examined: one user {examined(["user-1"])}, cohort {examined(cohort)}')
+    finally:
+        client.drop_database(db.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Bytes on the wire and server time for cold, compressed and revalidated API requests.
+
+    python -m benchmarks.bench_http_cache
+
+Runs the real app through Flask's test client, logged in as a user with a
+solved set, against the stub upstream and in-memory MongoDB (as
+``benchmarks.suite`` does). Each endpoint is fetched plain, with
+``Accept-Encoding`` and with the ETag of the plain response, and the
+status and encoding each of those should get is checked.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+from benchmarks.suite import API_KEY, build_app, login_clients
+
+ENDPOINTS = [
+    '/scrape-leetcode?page=1&per_page=50',
+    '/scrape-leetcode?page=3&per_page=50&difficulty=MEDIUM&sort=acceptance_rate',
+    '/problem-counts',
+]
+
+
+def measure(client, url, headers, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        response = client.get(url, headers=headers)
+    return response, (time.perf_counter() - start) / iterations * 1000
+
+
+def check(response, url, status, encoding=None):
+    if response.status_code != status or response.headers.get('Content-Encoding') != encoding:
+        raise RuntimeError(f'{url}: got {response.status_code} {response.headers.get("Content-Encoding")}, '
+                           f'expected {status} {encoding}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--problems', type=int, default=3000)
+    parser.add_argument('--mongo-latency-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, upstream_url = serve_in_thread(create_app(args.problems, 0.0))
+    try:
+        app_module = build_app(args, upstream_url)
+        client, = login_clients(app_module, 1, args.problems, random.Random(0))
+
+        print(f"  {'request':<72}{'status':>7}{'bytes':>8}{'ms':>8}")
+        for url in ENDPOINTS:
+            base = {'x-api-key': API_KEY}
+            cold, ms = measure(client, url, base, args.iterations)
+            check(cold, url, 200)
+            print(f'  {"cold  " + url:<72}{cold.status_code:>7}{len(cold.get_data()):>8}{ms:>8.3f}')
+            compressed, ms = measure(client, url, dict(base, **{'Accept-Encoding': 'gzip'}), args.iterations)
+            # Bodies under the threshold go out as they are
+            check(compressed, url, 200, 'gzip' if len(cold.get_data()) >= app_module.COMPRESSION_MIN_SIZE else None)
+            print(f'  {"gzip  " + url:<72}{compressed.status_code:>7}{len(compressed.get_data()):>8}{ms:>8.3f}')
+            warm, ms = measure(client, url, dict(base, **{'If-None-Match': cold.headers['ETag']}), args.iterations)
+            check(warm, url, 304)
+            print(f'  {"warm  " + url:<72}{warm.status_code:>7}{len(warm.get_data()):>8}{ms:>8.3f}')
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
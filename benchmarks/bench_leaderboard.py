@@ -0,0 +1,95 @@
+"""Leaderboard queries over a large tracked cohort versus sorting the cohort per query.
+
+    python -m benchmarks.bench_leaderboard --users 10000
+    MONGODB_URI=mongodb://127.0.0.1:27017 python -m benchmarks.bench_leaderboard
+
+Uses the in-memory MongoDB stand-in unless MONGODB_URI is set. Users get
+skewed solved counts, so the boards have long runs of ties like real ones.
+"""
+import argparse
+import os
+import random
+import time
+
+from benchmarks.common import print_table, summarize, timed
+from benchmarks.fake_mongo import FakeMongoClient
+from leaderboard import BOARDS, Leaderboard, score_key
+
+
+def make_values(rng):
+    easy = min(900, int(rng.paretovariate(1.1) * 20))
+    medium = min(1800, int(easy * rng.uniform(0.5, 1.8)))
+    hard = min(800, int(medium * rng.uniform(0.05, 0.4)))
+    return {'a': easy + medium + hard, 'e': easy, 'm': medium, 'h': hard, 'r': rng.randint(1, 5000000)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    if os.getenv('MONGODB_URI'):
+        from pymongo import MongoClient
+        client = MongoClient(os.environ['MONGODB_URI'])
+        client.drop_database('leetcode_scraper_bench')
+    else:
+        client = FakeMongoClient()
+    collection = client.leetcode_scraper_bench.leaderboard
+
+    rng = random.Random(0)
+    usernames = [f'user-{u}' for u in range(args.users)]
+    board = Leaderboard(collection)
+    board.ensure_indexes()
+    board.load()
+    start = time.perf_counter()
+    for username in usernames:
+        board.record(username, make_values(rng))
+    ingest_s = time.perf_counter() - start
+
+    # A second worker starting up
+    other = Leaderboard(collection)
+    start = time.perf_counter()
+    other.load()
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f'ingest: {args.users / ingest_s:.0f} users/s, cold load of {args.users} users: {load_ms:.0f} ms')
+
+    def scan_top(i):
+        key, higher_is_better = BOARDS['total']
+        return sorted(board.values, key=lambda u: score_key(board.values[u], key, higher_is_better))[:10]
+
+    def scan_rank(i):
+        key, higher_is_better = BOARDS['total']
+        mine = score_key(board.values[usernames[i % args.users]], key, higher_is_better)
+        return 1 + sum(1 for values in board.values.values() if score_key(values, key, higher_is_better) < mine)
+
+    def update(i):
+        # Refreshes mostly add a few solved problems
+        username = usernames[rng.randrange(args.users)]
+        values = dict(board.values[username])
+        gained = rng.randint(1, 3)
+        values['a'] += gained
+        values['m'] += gained
+        board.record(username, values)
+
+    print_table(
+        f'{args.iterations} queries over {args.users} users',
+        [
+            ('top 10 (sort per query)', summarize(timed(scan_top, max(1, args.iterations // 20)))),
+            ('rank (scan per query)', summarize(timed(scan_rank, max(1, args.iterations // 20)))),
+            ('top 10', summarize(timed(lambda i: board.top('total', 10), args.iterations))),
+            ('page 50 at offset 5000', summarize(timed(lambda i: board.top('hard', 50, 5000), args.iterations))),
+            ('position + 5 neighbours', summarize(timed(
+                lambda i: board.position('ranking', usernames[i % args.users], 5), args.iterations))),
+            ('incremental update', summarize(timed(update, args.iterations))),
+        ]
+    )
+
+    start = time.perf_counter()
+    read = other.reload_changed()
+    print(f'second worker picking up those updates: {read} documents in '
+          f'{(time.perf_counter() - start) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
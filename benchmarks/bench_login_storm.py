@@ -0,0 +1,124 @@
+"""API latency while a burst of logins arrives: password hashing inline versus in the process pool.
+
+    python -m benchmarks.bench_login_storm --logins 200 --login-concurrency 20
+
+Runs the app in-process under gevent, as a gunicorn gevent worker does, on
+the stub upstream and in-memory MongoDB. /scrape-leetcode requests arrive
+at a steady rate, timed from when each was due, so a stalled event loop
+shows up as latency, while login greenlets post /login, each from its own
+client address. The last case has every login guess one
+account's password, so the per-username throttle turns them away before
+any hashing.
+"""
+# Patched first, so the app's locks and sleeps are gevent's as in a worker
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+import random
+import time
+
+import gevent
+import gevent.event
+import gevent.pool
+from werkzeug.security import generate_password_hash
+
+from benchmarks.common import summarize
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+from benchmarks.suite import API_KEY, PASSWORD, build_app, login_clients
+
+
+def run_case(app_module, browser, args, logins, usernames, password):
+    outcomes = {}
+    samples = []
+    done = gevent.event.Event()
+
+    requests = gevent.pool.Group()
+
+    def fetch(due, page):
+        browser.get(f'/scrape-leetcode?page={page}&per_page=50', headers={'x-api-key': API_KEY})
+        samples.append(time.perf_counter() - due)
+
+    def browse():
+        rng = random.Random(0)
+        due = time.perf_counter()
+        while not done.is_set():
+            gevent.sleep(max(0.0, due - time.perf_counter()))
+            # Clients keep arriving while the loop is stalled; they queue up, as on a socket
+            while due <= time.perf_counter():
+                requests.spawn(fetch, due, rng.randint(1, 20))
+                due += 1.0 / args.browse_rate
+
+    def login(worker):
+        for n in range(worker, logins, args.login_concurrency):
+            client = app_module.app.test_client()
+            response = client.post(
+                '/login',
+                data={'username': usernames[n % len(usernames)], 'password': password},
+                environ_base={'REMOTE_ADDR': f'10.0.{n // 250}.{n % 250 + 1}'}
+            )
+            key = 'ok' if response.status_code == 302 and '/login' not in response.location else response.status_code
+            outcomes[key] = outcomes.get(key, 0) + 1
+
+    browser_loop = gevent.spawn(browse)
+    start = time.perf_counter()
+    if logins:
+        gevent.joinall([gevent.spawn(login, worker) for worker in range(args.login_concurrency)])
+    else:
+        gevent.sleep(2)
+    seconds = time.perf_counter() - start
+    done.set()
+    browser_loop.join()
+    requests.join()
+    return summarize(samples), max(samples) * 1000, logins / seconds, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--problems', type=int, default=3000)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--login-concurrency', type=int, default=20)
+    parser.add_argument('--browse-rate', type=float, default=50.0, help='page requests per second')
+    parser.add_argument('--workers', type=int, default=2, help='password hashing processes')
+    parser.add_argument('--mongo-latency-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    from auth import PasswordHasher
+
+    server, upstream_url = serve_in_thread(create_app(args.problems, 0.0))
+    pool = PasswordHasher(workers=args.workers)
+    try:
+        app_module = build_app(args, upstream_url)
+        browser, = login_clients(app_module, 1, args.problems, random.Random(0))
+        # Hashed once and shared, so setup doesn't take longer than the storm
+        password_hash = generate_password_hash(PASSWORD)
+        usernames = [f'storm-{n}' for n in range(50)]
+        app_module.db.users.insert_many([
+            {'username': name, 'email': f'{name}@example.com', 'password_hash': password_hash} for name in usernames
+        ])
+
+        # Start the pool's processes before timing anything
+        pool.verify(password_hash, PASSWORD)
+        cases = [
+            ('browse only', None, usernames, PASSWORD, 0),
+            ('logins, hashing inline', PasswordHasher(workers=0), usernames, PASSWORD, args.logins),
+            (f'logins, pool of {args.workers}', pool, usernames, PASSWORD, args.logins),
+            ('guessing one password', pool, usernames[:1], 'wrong', args.logins),
+        ]
+        print(f'{args.browse_rate:.0f} page requests/s, {args.logins} logins from {args.login_concurrency} greenlets')
+        print(f"  {'case':<26}{'pages':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'logins/s':>10}  outcomes")
+        for name, hasher, names, password, logins in cases:
+            if hasher is not None:
+                app_module.passwords = hasher
+            app_module.db.login_attempts.delete_many({})
+            stats, worst, rate, outcomes = run_case(app_module, browser, args, logins, names, password)
+            print(f"  {name:<26}{stats['count']:>7}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}"
+                  f"{worst:>9.1f}{rate:>10.1f}  {outcomes}")
+        print(f'pool: {pool.stats()}')
+    finally:
+        pool.shutdown()
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
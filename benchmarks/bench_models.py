@@ -0,0 +1,205 @@
+"""Memory and throughput of solved rows as dicts, objects and columns, and of buffered toggles.
+
+    python -m benchmarks.bench_models --rows 100000
+
+Rows are decoded from BSON with ``bson.decode_iter``, which is what a
+pymongo cursor does with each batch it receives, and the representation
+built from them is measured with tracemalloc once the cursor is done.
+``dict-backed objects`` is the previous ``SolvedProblem``. Encoding turns
+every row back into a document and BSON, as ``insert_many`` does.
+
+The toggle part replays bursts of toggles on the in-memory MongoDB with
+``--mongo-latency-ms`` per round trip, written one at a time and through
+a ``ToggleBuffer`` flushed once, and checks both leave the same rows and counts.
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import bson
+from bson.objectid import ObjectId
+
+from benchmarks.fake_leetcode import make_problems
+from benchmarks.fake_mongo import FakeMongoClient
+from catalog import ProblemCatalog
+from models import SolvedProblem, SolvedRows
+from progress import ProgressStore, ToggleBuffer
+
+
+class DictBackedSolvedProblem:
+    """``SolvedProblem`` as it was: an instance dict, timestamps set and then overwritten."""
+
+    def __init__(self, user_id, problem_id, solved=False, _id=None):
+        self.user_id = user_id
+        self.problem_id = problem_id
+        self.solved = solved
+        self._id = _id
+        self.created_at = datetime.utcnow()
+        self.updated_at = datetime.utcnow()
+
+    @staticmethod
+    def from_dict(data):
+        problem = DictBackedSolvedProblem(
+            user_id=data['user_id'],
+            problem_id=data['problem_id'],
+            solved=data['solved'],
+            _id=data['_id']
+        )
+        problem.created_at = data['created_at']
+        problem.updated_at = data['updated_at']
+        return problem
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'problem_id': self.problem_id,
+            'solved': self.solved,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
+
+
+class StubClient:
+    """Serves the catalog sync from a fixed problem list."""
+
+    def __init__(self, problems):
+        self.problems = problems
+
+    def query(self, query, variables):
+        skip, limit = variables['skip'], variables['limit']
+        return {'data': {'problemsetQuestionList': {
+            'total': len(self.problems),
+            'questions': self.problems[skip:skip + limit]
+        }}}
+
+
+def make_bson(rows, users, problems):
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    docs = []
+    for n in range(rows):
+        # Millisecond timestamps, as MongoDB stores them
+        created = start + timedelta(milliseconds=rng.randrange(10 ** 10))
+        docs.append(bson.encode({
+            '_id': ObjectId(),
+            'user_id': f'{n % users:024x}',
+            'problem_id': str(rng.randint(1, problems)),
+            'solved': rng.random() < 0.8,
+            'created_at': created,
+            'updated_at': created + timedelta(milliseconds=rng.randrange(10 ** 8))
+        }))
+    return b''.join(docs)
+
+
+DECODERS = [
+    ('dicts', lambda data: list(bson.decode_iter(data))),
+    ('dict-backed objects', lambda data: [DictBackedSolvedProblem.from_dict(d) for d in bson.decode_iter(data)]),
+    ('slotted objects', lambda data: [SolvedProblem.from_dict(d) for d in bson.decode_iter(data)]),
+    ('SolvedRows columns', lambda data: SolvedRows.from_docs(bson.decode_iter(data))),
+]
+
+ENCODERS = {
+    'dicts': lambda rows: [bson.encode(doc) for doc in rows],
+    'dict-backed objects': lambda rows: [bson.encode(row.to_dict()) for row in rows],
+    'slotted objects': lambda rows: [bson.encode(row.to_dict()) for row in rows],
+    'SolvedRows columns': lambda rows: [bson.encode(doc) for doc in rows.to_docs()],
+}
+
+
+def best_of(func, arg, repeat):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func(arg)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def held_bytes(func, data):
+    gc.collect()
+    tracemalloc.start()
+    result = func(data)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def bench_representations(args):
+    data = make_bson(args.rows, args.users, args.problems)
+    print(f'{args.rows} solved rows of {args.users} users, {len(data) / 1024:.0f} KiB of BSON')
+    print(f"  {'representation':<22}{'held MiB':>10}{'B/row':>8}{'decode rows/s':>15}{'encode rows/s':>15}")
+    for name, decode in DECODERS:
+        size = held_bytes(decode, data)
+        decode_seconds, rows = best_of(decode, data, args.repeat)
+        encode_seconds, _ = best_of(ENCODERS[name], rows, args.repeat)
+        print(f'  {name:<22}{size / 2 ** 20:>10.1f}{size / args.rows:>8.0f}'
+              f'{args.rows / decode_seconds:>15,.0f}{args.rows / encode_seconds:>15,.0f}')
+
+
+def bench_toggles(args):
+    catalog = ProblemCatalog(None, StubClient(make_problems(args.problems)))
+    catalog.sync()
+    rng = random.Random(1)
+    # Each user clicks around a handful of problems, several times each
+    toggles = []
+    for u in range(args.toggle_users):
+        picks = [str(rng.randint(1, args.problems)) for _ in range(args.toggle_problems)]
+        toggles += [(f'user-{u}', rng.choice(picks), rng.random() < 0.6) for _ in range(args.toggles_per_user)]
+
+    results = []
+    for name in ('one write per toggle', 'buffered, one flush'):
+        db = FakeMongoClient(latency=args.mongo_latency_ms / 1000.0).bench
+        db.solved_problems.create_index([('user_id', 1), ('problem_id', 1)], unique=True)
+        store = ProgressStore(db.user_progress, db.solved_problems, catalog)
+        buffer = ToggleBuffer(store)
+        db.client.commands.clear()
+        start = time.perf_counter()
+        if name == 'buffered, one flush':
+            for user_id, problem_id, solved in toggles:
+                buffer.add(user_id, problem_id, solved)
+            buffer.flush()
+        else:
+            for user_id, problem_id, solved in toggles:
+                store.toggle(user_id, problem_id, solved)
+        seconds = time.perf_counter() - start
+        round_trips = sum(db.client.commands.values())
+        # Stored rows and non-zero counts, which must come out the same either way
+        state = (
+            {(doc['user_id'], doc['problem_id']): doc['solved'] for doc in db.solved_problems.find({})},
+            {doc['_id']: {k: n for k, n in doc['counts'].items() if n} for doc in db.user_progress.find({})}
+        )
+        results.append((name, seconds, round_trips, state))
+
+    print(f'\n{len(toggles)} toggles from {args.toggle_users} users over {args.toggle_problems} problems each, '
+          f'{args.mongo_latency_ms:g} ms per round trip')
+    print(f"  {'writes':<24}{'seconds':>9}{'round trips':>13}")
+    for name, seconds, trips, _ in results:
+        print(f'  {name:<24}{seconds:>9.3f}{trips:>13}')
+    print(f"  same rows and counts: {results[0][3] == results[1][3]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--problems', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--toggle-users', type=int, default=50)
+    parser.add_argument('--toggle-problems', type=int, default=5)
+    parser.add_argument('--toggles-per-user', type=int, default=20)
+    parser.add_argument('--mongo-latency-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    bench_representations(args)
+    bench_toggles(args)
+
+
+if __name__ == '__main__':
+    main()
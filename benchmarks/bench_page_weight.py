@@ -0,0 +1,150 @@
+"""Page weight on first and repeat visits, with and without the built asset pipeline.
+
+    python -m benchmarks.bench_page_weight
+
+Runs the app in-process (as ``benchmarks.suite`` does) and loads each page
+the way a browser with an HTTP cache would: the HTML, then every
+same-origin stylesheet, script and image it references, preferring a
+``<picture>``'s WebP source. A repeat visit skips anything cached as
+immutable or still fresh, and revalidates the rest with If-None-Match.
+Bytes are response bodies as sent with ``Accept-Encoding: br, gzip``.
+Third-party CSS and JS (Bootstrap, fonts, Swagger UI) are left out.
+
+``unbuilt`` serves the files under ``static/`` as they are, which is what
+an unbuilt checkout does; ``built`` runs ``assets.build`` first.
+"""
+import argparse
+import gzip
+import os
+import random
+import re
+import tempfile
+from html.parser import HTMLParser
+
+import brotli
+
+import assets
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+from benchmarks.suite import build_app, login_clients
+
+HEADERS = {'Accept-Encoding': 'br, gzip', 'Accept': 'text/html,image/webp,*/*'}
+PAGES = [('/', False), ('/login', False), ('/register', False), ('/problems', True), ('/user-stats', True), ('/api', True)]
+
+
+class AssetLinks(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+        self.picked = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'picture':
+            self.picked = False
+        elif tag == 'source' and self.picked is False and attrs.get('type') == 'image/webp':
+            self.add(attrs.get('srcset'))
+            self.picked = True
+        elif tag == 'img' and not self.picked:
+            self.add(attrs.get('src'))
+        elif tag == 'script':
+            self.add(attrs.get('src'))
+        elif tag == 'link' and attrs.get('rel') == 'stylesheet':
+            self.add(attrs.get('href'))
+
+    def handle_endtag(self, tag):
+        if tag == 'picture':
+            self.picked = None
+
+    def add(self, url):
+        if url and url.startswith('/') and not url.startswith('//'):
+            self.urls.append(url)
+
+
+class Browser:
+    def __init__(self, client):
+        self.client = client
+        self.cache = {}
+
+    def get(self, url):
+        """Returns ``(requests, bytes, body)``; the body is None for assets."""
+        cached = self.cache.get(url)
+        headers = dict(HEADERS)
+        if cached:
+            policy = cached.get('Cache-Control') or ''
+            if 'immutable' in policy or re.search(r'max-age=[1-9]', policy):
+                return 0, 0, None
+            if cached.get('ETag'):
+                headers['If-None-Match'] = cached['ETag']
+        response = self.client.get(url, headers=headers)
+        data = response.get_data()
+        if response.status_code == 200:
+            self.cache[url] = response.headers
+        return 1, len(data), response
+
+    def visit(self, path):
+        requests, size, response = self.get(path)
+        self.cache.pop(path, None)  # pages are never reused from cache
+        parser = AssetLinks()
+        parser.feed(decode(response))
+        html_size = size
+        for url in parser.urls:
+            n, b, _ = self.get(url)
+            requests += n
+            size += b
+        return requests, html_size, size
+
+
+def decode(response):
+    data = response.get_data()
+    encoding = response.headers.get('Content-Encoding')
+    if encoding == 'br':
+        data = brotli.decompress(data)
+    elif encoding == 'gzip':
+        data = gzip.decompress(data)
+    return data.decode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-latency-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, upstream_url = serve_in_thread(create_app(200, 0.0))
+    try:
+        app_module = build_app(args, upstream_url)
+        logged_in, = login_clients(app_module, 1, 200, random.Random(0))
+        anonymous = app_module.app.test_client()
+
+        results = {}
+        with tempfile.TemporaryDirectory() as out_dir:
+            for mode in ('unbuilt', 'built'):
+                if mode == 'built':
+                    assets.build(app_module.app.static_folder, out_dir)
+                    app_module.assets.directory = out_dir
+                else:
+                    app_module.assets.directory = os.path.join(out_dir, 'missing')
+                app_module.assets.load()
+                browsers = {False: Browser(anonymous), True: Browser(logged_in)}
+                for path, needs_login in PAGES:
+                    browser = browsers[needs_login]
+                    first = browser.visit(path)
+                    repeat = browser.visit(path)
+                    results[mode, path] = first, repeat
+    finally:
+        server.shutdown()
+
+    print(f"  {'page':<13}{'mode':<9}{'HTML KiB':>9}{'first reqs':>12}{'first KiB':>11}{'repeat reqs':>13}{'repeat KiB':>12}")
+    totals = {}
+    for (mode, path), (first, repeat) in sorted(results.items(), key=lambda item: (item[0][1], item[0][0] == 'built')):
+        print(f'  {path:<13}{mode:<9}{first[1] / 1024:>9.1f}{first[0]:>12}{first[2] / 1024:>11.1f}'
+              f'{repeat[0]:>13}{repeat[2] / 1024:>12.1f}')
+        total = totals.setdefault(mode, [0, 0, 0, 0])
+        for i, value in enumerate((first[0], first[2], repeat[0], repeat[2])):
+            total[i] += value
+    for mode, (first_requests, first_size, repeat_requests, repeat_size) in totals.items():
+        print(f'  {"all pages":<13}{mode:<9}{"":>9}{first_requests:>12}{first_size / 1024:>11.1f}'
+              f'{repeat_requests:>13}{repeat_size / 1024:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Per-user progress: maintained counters versus joining the solved set against the catalog.
+
+    python -m benchmarks.bench_progress --users 200 --solved 800
+    MONGODB_URI=mongodb://127.0.0.1:27017 python -m benchmarks.bench_progress
+
+Uses the in-memory MongoDB stand-in unless MONGODB_URI is set, in which
+case a scratch database on that server is seeded. Also times toggles with
+counter maintenance and one full reconciliation pass.
+"""
+import argparse
+import os
+import random
+import time
+
+from benchmarks.common import print_table, summarize, timed
+from benchmarks.fake_leetcode import make_problems
+from benchmarks.fake_mongo import FakeMongoClient
+from catalog import ProblemCatalog
+from models import SolvedProblem
+from progress import DIFFICULTIES, ProgressStore
+
+
+class StubClient:
+    """Serves the catalog sync from a fixed problem list."""
+
+    def __init__(self, problems):
+        self.problems = problems
+
+    def query(self, query, variables):
+        skip, limit = variables['skip'], variables['limit']
+        return {'data': {'problemsetQuestionList': {
+            'total': len(self.problems),
+            'questions': self.problems[skip:skip + limit]
+        }}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--solved', type=int, default=800)
+    parser.add_argument('--problems', type=int, default=3000)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    if os.getenv('MONGODB_URI'):
+        from pymongo import MongoClient
+        client = MongoClient(os.environ['MONGODB_URI'])
+        client.drop_database('leetcode_scraper_bench')
+    else:
+        client = FakeMongoClient()
+    db = client.leetcode_scraper_bench
+    db.solved_problems.create_index([('user_id', 1), ('problem_id', 1)], unique=True)
+
+    catalog = ProblemCatalog(None, StubClient(make_problems(args.problems)))
+    catalog.sync()
+    store = ProgressStore(db.user_progress, db.solved_problems, catalog)
+
+    rng = random.Random(0)
+    for u in range(args.users):
+        ids = rng.sample(range(1, args.problems + 1), args.solved)
+        db.solved_problems.bulk_write([SolvedProblem.upsert(f'user-{u}', str(i), True) for i in ids], ordered=False)
+
+    start = time.perf_counter()
+    report = store.reconcile()
+    print(f"reconcile: {report['checked']} users, {args.users * args.solved} solved rows, "
+          f"{report['fixed']} summaries written in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def joined(i):
+        # What a progress view costs without the counters
+        counts = dict.fromkeys(DIFFICULTIES, 0)
+        for doc in db.solved_problems.find({'user_id': f'user-{i % args.users}', 'solved': True},
+                                           {'problem_id': 1, '_id': 0}):
+            difficulty = store.difficulty_of(doc['problem_id'])
+            if difficulty in counts:
+                counts[difficulty] += 1
+        return counts
+
+    def maintained(i):
+        return store.get(f'user-{i % args.users}')
+
+    def toggle(i):
+        store.toggle(f'user-{i % args.users}', str(rng.randint(1, args.problems)), rng.random() < 0.5)
+
+    def bulk_toggle(i):
+        ids = [str(rng.randint(1, args.problems)) for _ in range(100)]
+        store.toggle_many(f'user-{i % args.users}', ids, rng.random() < 0.5)
+
+    print_table(
+        f'{args.users} users with {args.solved} solved of {args.problems}',
+        [
+            ('join solved set x catalog', summarize(timed(joined, args.iterations))),
+            ('maintained counters', summarize(timed(maintained, args.iterations))),
+            ('toggle + counter update', summarize(timed(toggle, args.iterations))),
+            ('bulk toggle of 100', summarize(timed(bulk_toggle, max(1, args.iterations // 10)))),
+        ]
+    )
+
+    report = store.reconcile(fix=False)
+    print(f"drift after the toggles: {report['drifted']} of {report['checked']} users")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Client behaviour during an upstream outage, with and without the circuit breaker.
+
+    python -m benchmarks.bench_resilience --calls 300 --fault 429
+    python -m benchmarks.bench_resilience --calls 300 --fault timeout
+    MONGODB_URI=mongodb://127.0.0.1:27017 python -m benchmarks.bench_resilience --rate 20 --threads 8
+
+Each run sends healthy traffic, then the same traffic while the stub
+injects 429s or hung requests, then again after it recovers, counting how
+many requests reached the stub and how long callers waited. With
+MONGODB_URI set it also checks that the shared token bucket holds threads
+to the configured rate.
+"""
+import argparse
+import os
+import threading
+import time
+
+from pymongo import MongoClient
+
+from benchmarks.common import print_table, summarize
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+from leetcode_client import USER_PROFILE_QUERY, LeetCodeClient, make_session
+from resilience import CircuitBreaker, TokenBucket, UpstreamUnavailableError
+
+
+def run_phase(client, calls):
+    samples = []
+    outcomes = {'ok': 0, 'failed': 0, 'fail_fast': 0}
+    for i in range(calls):
+        start = time.perf_counter()
+        try:
+            client.query(USER_PROFILE_QUERY, {'username': f'user-{i % 50}'})
+            outcomes['ok'] += 1
+        except UpstreamUnavailableError:
+            outcomes['fail_fast'] += 1
+        except Exception:
+            outcomes['failed'] += 1
+        samples.append(time.perf_counter() - start)
+    return samples, outcomes
+
+
+def outage(stub, url, args, breaker):
+    # No urllib3 retries, so every upstream request is one the client chose to make
+    client = LeetCodeClient(url, session=make_session(retries=0), timeout=(1, args.read_timeout), breaker=breaker)
+    rows = []
+    for phase in ('healthy', 'outage', 'recovered'):
+        if phase == 'outage':
+            stub.config['ERROR_RATE' if args.fault == '429' else 'TIMEOUT_RATE'] = 1.0
+        elif phase == 'recovered':
+            stub.config['ERROR_RATE'] = stub.config['TIMEOUT_RATE'] = 0.0
+            # Let the breaker's reset timeout elapse so a probe can close it
+            time.sleep(breaker.reset_timeout)
+        before = stub.config['REQUESTS']
+        samples, outcomes = run_phase(client, args.calls)
+        rows.append((phase, summarize(samples), outcomes, stub.config['REQUESTS'] - before))
+    return rows, breaker.stats()
+
+
+def rate_limit(url, args):
+    collection = MongoClient(os.environ['MONGODB_URI']).bench_resilience.rate_limits
+    collection.drop()
+    # Separate clients stand in for separate gunicorn workers sharing one bucket
+    clients = [
+        LeetCodeClient(url, rate_limiter=TokenBucket(collection, rate=args.rate, capacity=args.rate, max_wait=30))
+        for _ in range(args.threads)
+    ]
+    per_thread = args.calls // args.threads
+
+    def worker(client):
+        for i in range(per_thread):
+            client.query(USER_PROFILE_QUERY, {'username': f'user-{i}'})
+
+    # Drain the initial burst so the measurement sees the steady-state rate
+    TokenBucket(collection, rate=args.rate, capacity=args.rate).try_acquire()
+    collection.update_one({'_id': 'leetcode'}, {'$set': {'tokens': 0}})
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f'{per_thread * args.threads} calls from {args.threads} limiter instances in {elapsed:.2f}s: '
+          f'{per_thread * args.threads / elapsed:.1f}/s (limit {args.rate}/s), '
+          f'{sum(c.rate_limiter.waited for c in clients)} calls waited')
+    collection.drop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--fault', choices=['429', 'timeout'], default='429')
+    parser.add_argument('--read-timeout', type=float, default=0.5)
+    parser.add_argument('--threshold', type=int, default=5)
+    parser.add_argument('--reset-timeout', type=float, default=2.0)
+    parser.add_argument('--rate', type=float, default=20)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    stub = create_app(problem_count=100, hang_seconds=args.read_timeout * 2)
+    server, url = serve_in_thread(stub)
+    try:
+        cases = [
+            ('no breaker', CircuitBreaker(failure_threshold=10 ** 9, reset_timeout=args.reset_timeout)),
+            ('breaker', CircuitBreaker(failure_threshold=args.threshold, reset_timeout=args.reset_timeout)),
+        ]
+        for name, breaker in cases:
+            rows, breaker_stats = outage(stub, url, args, breaker)
+            print_table(f'{name}: {args.calls} calls per phase, fault={args.fault}',
+                        [(phase, stats) for phase, stats, _, _ in rows])
+            for phase, _, outcomes, upstream in rows:
+                print(f'  {phase:<12}upstream requests={upstream:<6}{outcomes}')
+            print(f'  breaker {breaker_stats}\n')
+
+        if os.getenv('MONGODB_URI'):
+            rate_limit(url, args)
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Typeahead latency of the local search index over a full-size catalog.
+
+    python -m benchmarks.bench_search --problems 3000
+"""
+import argparse
+import time
+
+from benchmarks.common import print_table, summarize, timed
+from benchmarks.fake_leetcode import make_problems
+from search import SearchIndex
+
+# Successive keystrokes, as the problems page would send them without debounce
+TYPEAHEAD = ['t', 'tw', 'two', 'two ', 'two s', 'two su', 'two sum']
+QUERIES = {
+    'typeahead prefixes': TYPEAHEAD,
+    'multi-term / tags': ['binary tree', 'sliding window', 'dynamic prog', 'linked list reverse'],
+    'problem ids': ['1', '42', '1234'],
+    'fuzzy typos': ['palindrom', 'parenthesis', 'substrng', 'intervall'],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--problems', type=int, default=3000)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    problems = make_problems(args.problems)
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.update(problems)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    # Incremental rebuild after a handful of upstream changes
+    changed = [dict(q) for q in problems]
+    for q in changed[:10]:
+        q['title'] = q['title'] + ' II'
+    start = time.perf_counter()
+    touched = index.update(changed)
+    update_ms = (time.perf_counter() - start) * 1000
+
+    print(f'full build: {build_ms:.1f} ms, incremental update of 10 problems: '
+          f'{update_ms:.2f} ms ({touched} posting lists)')
+
+    rows = []
+    for name, queries in QUERIES.items():
+        rows.append((name, summarize(timed(lambda i: index.search(queries[i % len(queries)]), args.iterations))))
+    print_table(f'{args.iterations} searches per case over {args.problems} problems', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Connections opened and per-call latency: one-shot requests.post versus the pooled keep-alive session.
+
+    python -m benchmarks.bench_session --iterations 500
+
+The stub runs with keep-alive (werkzeug's own server closes every
+connection) and counts the TCP connections it accepts, which shows the
+pooled session reusing one socket where requests.post opens one per call.
+It listens on plain loopback HTTP, so the latency columns only cover local
+TCP setup and are mostly noise. TLS savings are not measured: against
+leetcode.com every avoided connection also skips a handshake and a network
+round trip or two, which is where pooling actually pays off.
+"""
+import argparse
+
+import requests
+
+from benchmarks.common import print_table, summarize, timed
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+from leetcode_client import make_session
+
+PROBLEM_COUNTS_QUERY = """
+query problemsetQuestionList($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
+  all: questionList(categorySlug: $categorySlug, limit: $limit, skip: $skip, filters: $filters) {
+    totalNum
+  }
+  easy: questionList(categorySlug: $categorySlug, filters: {difficulty: EASY}) {
+    totalNum
+  }
+  medium: questionList(categorySlug: $categorySlug, filters: {difficulty: MEDIUM}) {
+    totalNum
+  }
+  hard: questionList(categorySlug: $categorySlug, filters: {difficulty: HARD}) {
+    totalNum
+  }
+}
+"""
+
+PROBLEM_COUNTS_VARIABLES = {
+    "categorySlug": "",
+    "skip": 0,
+    "limit": 1,  # We only need the count
+    "filters": {}
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    server, url = serve_in_thread(create_app(problem_count=100), keep_alive=True)
+    payload = {'query': PROBLEM_COUNTS_QUERY, 'variables': PROBLEM_COUNTS_VARIABLES}
+    session = make_session()
+
+    def one_shot(i):
+        requests.post(url, json=payload, timeout=(3.05, 10)).json()
+
+    def pooled(i):
+        session.post(url, json=payload, timeout=(3.05, 10)).json()
+
+    def run(call):
+        before = server.connections
+        samples = timed(call, args.iterations)
+        return server.connections - before, summarize(samples)
+
+    try:
+        cases = [('requests.post (new conn)', run(one_shot)), ('pooled session', run(pooled))]
+        print_table(
+            f'{args.iterations} sequential upstream calls',
+            [(name, stats) for name, (_, stats) in cases]
+        )
+        print('  connections opened: ' + ', '.join(f'{name} {opened}' for name, (opened, _) in cases))
+    finally:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
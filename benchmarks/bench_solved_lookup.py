@@ -0,0 +1,104 @@
+"""Per-page solved lookup cost for users with thousands of solved problems.
+
+    python -m benchmarks.bench_solved_lookup --solved 3000
+    MONGODB_URI=mongodb://127.0.0.1:27017 python -m benchmarks.bench_solved_lookup
+
+Seeds synthetic users into a scratch database and compares loading the
+whole solved history, the projected per-page ``$in`` lookup, and the
+in-memory solved-set cache. Uses the in-memory MongoDB stand-in, with
+``--mongo-latency-ms`` per round trip, unless MONGODB_URI is set; the
+stand-in also reports how many round trips each strategy made.
+"""
+import argparse
+import os
+import random
+
+from benchmarks.common import print_table, summarize, timed
+from benchmarks.fake_mongo import FakeMongoClient
+from leetcode_client import ResponseCache
+from models import SolvedProblem
+
+PER_PAGE = 50
+
+
+def seed(collection, users, solved, problems):
+    collection.drop()
+    collection.create_index([('user_id', 1), ('problem_id', 1)], unique=True)
+    rng = random.Random(0)
+    for u in range(users):
+        ids = rng.sample(range(1, problems + 1), solved)
+        collection.bulk_write([SolvedProblem.upsert(f'user-{u}', str(i), True) for i in ids], ordered=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--solved', type=int, default=3000)
+    parser.add_argument('--problems', type=int, default=3500)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--mongo-latency-ms', type=float, default=0.5)
+    args = parser.parse_args()
+
+    if os.getenv('MONGODB_URI'):
+        from pymongo import MongoClient
+        client = MongoClient(os.environ['MONGODB_URI'])
+    else:
+        client = FakeMongoClient(latency=args.mongo_latency_ms / 1000.0)
+    db = client.leetcode_scraper_bench
+    collection = db.solved_problems
+    seed(collection, args.users, args.solved, args.problems)
+    pages = args.problems // PER_PAGE
+    cache = ResponseCache()
+
+    def page(i):
+        start = (i % pages) * PER_PAGE
+        return f'user-{i % args.users}', [str(n) for n in range(start + 1, start + PER_PAGE + 1)]
+
+    def full_history(i):
+        user_id, ids = page(i)
+        solved = {sp['problem_id'] for sp in collection.find({'user_id': user_id, 'solved': True})}
+        return [pid in solved for pid in ids]
+
+    def projected_page(i):
+        user_id, ids = page(i)
+        solved = {sp['problem_id'] for sp in collection.find(
+            {'user_id': user_id, 'solved': True, 'problem_id': {'$in': ids}},
+            {'problem_id': 1, '_id': 0}
+        )}
+        return [pid in solved for pid in ids]
+
+    def cached_set(i):
+        user_id, ids = page(i)
+        hit, solved = cache.get(user_id)
+        if not hit:
+            solved = frozenset(sp['problem_id'] for sp in collection.find(
+                {'user_id': user_id, 'solved': True}, {'problem_id': 1, '_id': 0}
+            ))
+            cache.set(user_id, solved, 60)
+        return [pid in solved for pid in ids]
+
+    cases = [
+        ('full solved history', full_history),
+        ('projected $in per page', projected_page),
+        ('in-memory solved set', cached_set),
+    ]
+    try:
+        rows = []
+        round_trips = []
+        # Only the stand-in counts its round trips
+        counted = isinstance(client, FakeMongoClient)
+        for name, lookup in cases:
+            if counted:
+                client.commands.clear()
+            rows.append((name, summarize(timed(lookup, args.iterations))))
+            if counted:
+                round_trips.append(f'{name}: {sum(client.commands.values())}')
+        print_table(f'{args.iterations} page lookups, {args.users} users x {args.solved} solved', rows)
+        if round_trips:
+            print('  round trips: ' + ', '.join(round_trips))
+    finally:
+        client.drop_database(db.name)
+
+
+if __name__ == '__main__':
+    main()
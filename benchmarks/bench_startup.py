@@ -0,0 +1,91 @@
+"""Cold-start cost of the app: time to import it and to serve the first request.
+
+    python -m benchmarks.bench_startup --runs 10
+    python -m benchmarks.bench_startup --importtime 15
+
+Every run is a fresh interpreter, like a new gunicorn worker without
+preloading. MongoDB points at a closed local port and the scheduler is off,
+so the numbers cover the app's own startup work and nothing on the network.
+``--importtime`` also lists the slowest modules from ``python -X importtime``.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import print_table, summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get('/login')
+served = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({'import': imported - start, 'first_request': served - imported}))
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    env.update(
+        MONGODB_URI='mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=500',
+        SECRET_KEY='bench',
+        API_KEY='bench',
+        SCHEDULER_ENABLED='false',
+        PYTHONPATH=ROOT
+    )
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    return env
+
+
+def run_once():
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=ROOT, env=child_env(),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(top):
+    """Return ``(cumulative_us, module)`` for the ``top`` slowest imports of the app."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT, env=child_env(),
+        capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), module.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--importtime', type=int, default=0, metavar='N', help='also list the N slowest imports')
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    print_table(
+        f'{args.runs} cold starts',
+        [
+            ('import app', summarize([run['import'] for run in runs])),
+            ('first request (GET /login)', summarize([run['first_request'] for run in runs])),
+        ]
+    )
+
+    if args.importtime:
+        print('Slowest imports (cumulative ms)')
+        for cumulative, module in slowest_imports(args.importtime):
+            print(f'  {cumulative / 1000:>9.1f}  {module}')
+
+
+if __name__ == '__main__':
+    main()
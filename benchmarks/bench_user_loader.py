@@ -0,0 +1,50 @@
+"""Count Mongo operations per authenticated request.
+
+    python -m benchmarks.bench_user_loader
+
+Runs the real app through Flask's test client against the stub upstream
+and in-memory MongoDB (as ``benchmarks.suite`` does), logs a user in and
+counts the commands the stand-in serves while rendering an authenticated
+page, once with the user cached in the session and once with the cache
+removed from the cookie (the previous behaviour: one users lookup per
+request).
+"""
+import argparse
+import random
+
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+from benchmarks.suite import build_app, login_clients
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--problems', type=int, default=300)
+    parser.add_argument('--mongo-latency-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, upstream_url = serve_in_thread(create_app(args.problems, 0.0))
+    try:
+        app_module = build_app(args, upstream_url)
+        client, = login_clients(app_module, 1, args.problems, random.Random(0))
+        commands = app_module.db.client.commands
+
+        for label, keep_cache in (('before (no session cache)', False), ('after (session cache)', True)):
+            commands.clear()
+            for _ in range(args.requests):
+                if not keep_cache:
+                    with client.session_transaction() as sess:
+                        sess.pop('user', None)
+                response = client.get('/api')
+                if response.status_code != 200:
+                    raise RuntimeError(f'/api returned {response.status_code}')
+            total = sum(commands.values())
+            print(f'{label}: {total / args.requests:.2f} Mongo ops per request')
+            for (command, collection), count in sorted(commands.items()):
+                print(f'  {command} {collection}: {count}')
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import json
+import os
+import statistics
+import time
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Summarize latency samples (seconds) as milliseconds."""
+    return {
+        'count': len(samples),
+        'mean_ms': statistics.fmean(samples) * 1000 if samples else 0.0,
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+    }
+
+
+def timed(func, iterations):
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def print_table(title, rows):
+    print(title)
+    print(f"  {'case':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, stats in rows:
+        print(f"  {name:<28}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}"
+              f"{stats['p99_ms']:>10.3f}{stats['mean_ms']:>10.3f}")
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_results(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def compare_results(baseline, current, threshold=0.15):
+    """Flag scenarios whose p95 latency rose, or throughput fell, by more than ``threshold``.
+
+    Returns ``[(scenario, metric, baseline, current, change)]``; ``change``
+    is relative and signed so that positive always means worse.
+    """
+    regressions = []
+    for name, stats in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if not before:
+            continue
+        for metric, worse_when_higher in (('p95_ms', True), ('throughput_rps', False)):
+            old, new = before.get(metric), stats.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old if worse_when_higher else (old - new) / old
+            if change > threshold:
+                regressions.append((name, metric, old, new, change))
+    return regressions
@@ -0,0 +1,275 @@
+"""Offline stand-in for https://leetcode.com/graphql.
+
+Serves synthetic ``problemsetQuestionList``, difficulty count, ``matchedUser``
+and problem-page ``question`` payloads in the same shape as LeetCode so the
+app can run without network access::
+
+    python -m benchmarks.fake_leetcode --port 5001 --latency-ms 150
+    LEETCODE_GRAPHQL_URL=http://127.0.0.1:5001/graphql flask run
+
+``--error-rate`` and ``--timeout-rate`` inject 429 responses and hung
+requests, to exercise the client's rate limiter and circuit breaker.
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+DIFFICULTIES = ['EASY', 'MEDIUM', 'HARD']
+WORDS = [
+    'two', 'sum', 'array', 'string', 'tree', 'binary', 'search', 'linked', 'list',
+    'reverse', 'merge', 'interval', 'path', 'graph', 'matrix', 'window', 'substring',
+    'palindrome', 'number', 'maximum', 'minimum', 'subarray', 'valid', 'parentheses',
+    'stack', 'queue', 'heap', 'k', 'closest', 'points', 'course', 'schedule'
+]
+TAGS = [
+    'Array', 'String', 'Hash Table', 'Dynamic Programming', 'Math', 'Sorting', 'Greedy',
+    'Depth-First Search', 'Binary Search', 'Tree', 'Breadth-First Search', 'Two Pointers',
+    'Sliding Window', 'Heap (Priority Queue)', 'Graph', 'Linked List', 'Stack', 'Backtracking'
+]
+
+
+def make_problems(count, seed=0):
+    rng = random.Random(seed)
+    problems = []
+    for i in range(1, count + 1):
+        title = ' '.join(w.capitalize() for w in rng.sample(WORDS, rng.randint(2, 4)))
+        title = f'{title} {i}'
+        submissions = rng.randint(1000, 5000000)
+        accepted = int(submissions * rng.uniform(0.15, 0.85))
+        problems.append({
+            'questionId': str(i),
+            'title': title,
+            'titleSlug': title.lower().replace(' ', '-'),
+            'difficulty': rng.choice(DIFFICULTIES).capitalize(),
+            'acRate': accepted * 100.0 / submissions,
+            'status': None,
+            'stats': json.dumps({
+                'totalAccepted': f'{accepted}',
+                'totalSubmission': f'{submissions}',
+                'totalAcceptedRaw': accepted,
+                'totalSubmissionRaw': submissions,
+                'acRate': f'{accepted * 100.0 / submissions:.1f}%'
+            }),
+            'isPaidOnly': rng.random() < 0.1,
+            'topicTags': [
+                {'name': tag, 'slug': tag.lower().replace(' ', '-').replace('(', '').replace(')', '')}
+                for tag in rng.sample(TAGS, rng.randint(1, 3))
+            ]
+        })
+    return problems
+
+
+def make_user_stats(username):
+    rng = random.Random(zlib.crc32(username.encode()))
+    counts = {d: rng.randint(0, 400) for d in DIFFICULTIES}
+    ac_submissions = [{
+        'difficulty': 'All',
+        'count': sum(counts.values()),
+        'submissions': sum(counts.values()) * 2
+    }]
+    for difficulty, count in counts.items():
+        ac_submissions.append({
+            'difficulty': difficulty.capitalize(),
+            'count': count,
+            'submissions': count * 2
+        })
+    return {
+        'profile': {
+            'ranking': rng.randint(1, 5000000),
+            'reputation': rng.randint(0, 500),
+            'starRating': rng.choice([1, 1.5, 2, 2.5, 3])
+        },
+        'submitStats': {'acSubmissionNum': ac_submissions}
+    }
+
+
+def make_question_detail(problem, revision=0):
+    """A canned ``question`` payload for ``problem``, shaped like LeetCode's problem page."""
+    rng = random.Random(zlib.crc32(problem['titleSlug'].encode()))
+    words = ' '.join(rng.choice(WORDS) for _ in range(60))
+    examples = ''.join(
+        f'<p><strong class="example">Example {n}:</strong></p>\n'
+        f'<pre>\n<strong>Input:</strong> nums = [{", ".join(str(rng.randint(-9, 9)) for _ in range(6))}], k = {n}\n'
+        f'<strong>Output:</strong> {rng.randint(0, 99)}\n</pre>\n'
+        for n in range(1, 4)
+    )
+    content = (
+        f'<p>Given an integer array <code>nums</code>, {words}.</p>\n'
+        f'<p>&nbsp;</p>\n{examples}<p>&nbsp;</p>\n'
+        f'<p><strong>Constraints:</strong></p>\n<ul>\n'
+        f'\t<li><code>1 &lt;= nums.length &lt;= 10<sup>{rng.randint(3, 5)}</sup></code></li>\n'
+        f'\t<li><code>-10<sup>4</sup> &lt;= nums[i] &lt;= 10<sup>4</sup></code></li>\n</ul>\n'
+    )
+    if revision:
+        content += f'<p><em>Updated (revision {revision}).</em></p>\n'
+    return {
+        'questionId': problem['questionId'],
+        'title': problem['title'],
+        'titleSlug': problem['titleSlug'],
+        'content': None if problem['isPaidOnly'] else content,
+        'difficulty': problem['difficulty'],
+        'isPaidOnly': problem['isPaidOnly'],
+        'hints': [f'Try a <b>{rng.choice(TAGS).lower()}</b> approach.'],
+        'topicTags': problem['topicTags'],
+        'codeSnippets': [
+            {'lang': 'Python3', 'langSlug': 'python3',
+             'code': 'class Solution:\n    def solve(self, nums: List[int]) -> int:\n        '},
+            {'lang': 'C++', 'langSlug': 'cpp',
+             'code': 'class Solution {\npublic:\n    int solve(vector<int>& nums) {\n        \n    }\n};'}
+        ]
+    }
+
+
+def create_app(problem_count=3000, latency=0.0, seed=0, error_rate=0.0, timeout_rate=0.0, hang_seconds=15.0):
+    app = Flask(__name__)
+    app.config['LATENCY'] = latency
+    app.config['PROBLEMS'] = make_problems(problem_count, seed)
+    # Fault injection; adjustable while the server runs
+    app.config['ERROR_RATE'] = error_rate
+    app.config['TIMEOUT_RATE'] = timeout_rate
+    app.config['HANG_SECONDS'] = hang_seconds
+    app.config['REQUESTS'] = 0
+    # titleSlug -> revision; bump one to make that problem's page change
+    app.config['REVISIONS'] = {}
+    faults = random.Random(seed)
+
+    @app.route('/graphql', methods=['POST'])
+    def graphql():
+        app.config['REQUESTS'] += 1
+        roll = faults.random()
+        if roll < app.config['ERROR_RATE']:
+            return jsonify({'errors': [{'message': 'Too many requests'}]}), 429, {'Retry-After': '1'}
+        if roll < app.config['ERROR_RATE'] + app.config['TIMEOUT_RATE']:
+            time.sleep(app.config['HANG_SECONDS'])
+
+        if app.config['LATENCY']:
+            time.sleep(app.config['LATENCY'])
+
+        payload = request.get_json()
+        query = payload.get('query', '')
+        variables = payload.get('variables') or {}
+        problems = app.config['PROBLEMS']
+
+        if 'matchedUser' in query:
+            username = variables.get('username', '')
+            if username.startswith('missing'):
+                return jsonify({'data': {'matchedUser': None}})
+            return jsonify({'data': {'matchedUser': make_user_stats(username)}})
+
+        if 'question(titleSlug' in query:
+            slug = variables.get('titleSlug')
+            problem = next((p for p in problems if p['titleSlug'] == slug), None)
+            if problem is None:
+                return jsonify({'data': {'question': None}})
+            return jsonify({'data': {'question': make_question_detail(problem, app.config['REVISIONS'].get(slug, 0))}})
+
+        if 'easy: questionList' in query:
+            totals = {d.lower(): {'totalNum': sum(1 for p in problems if p['difficulty'].upper() == d)}
+                      for d in DIFFICULTIES}
+            return jsonify({'data': dict(totals, all={'totalNum': len(problems)})})
+
+        difficulty = (variables.get('filters') or {}).get('difficulty')
+        if difficulty:
+            problems = [p for p in problems if p['difficulty'].upper() == difficulty]
+        search = variables.get('searchQuery')
+        if search:
+            problems = [p for p in problems if search.lower() in p['title'].lower()]
+
+        skip = variables.get('skip') or 0
+        limit = variables.get('limit') or 50
+        return jsonify({
+            'data': {
+                'problemsetQuestionList': {
+                    'total': len(problems),
+                    'questions': problems[skip:skip + limit]
+                }
+            }
+        })
+
+    return app
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Hands each request to the app in-process, keeping the connection open."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; with Nagle on, a reused
+    # connection waits out the client's delayed ACK on every response
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        headers = [(k, v) for k, v in self.headers.items() if k.lower() != 'content-length']
+        response = self.server.app.test_client(use_cookies=False).open(
+            self.path, method=self.command, data=body, headers=headers
+        )
+        data = response.get_data()
+        self.send_response(response.status_code)
+        for name, value in response.headers.items():
+            if name.lower() not in ('content-length', 'connection'):
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_in_thread(app, host='127.0.0.1', port=0, keep_alive=False):
+    """Start ``app`` on a background thread, returning ``(server, graphql_url)``.
+
+    werkzeug's server closes every connection after one response, so
+    ``keep_alive=True`` serves through ``http.server`` instead, for
+    measuring connection reuse. ``server.connections`` counts the TCP
+    connections accepted so far.
+    """
+    if keep_alive:
+        server = ThreadingHTTPServer((host, port), KeepAliveHandler)
+        server.daemon_threads = True
+        server.app = app
+    else:
+        # Per-request access logs would drown out the benchmark output
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        server = make_server(host, port, app, threaded=True)
+    server.connections = 0
+    accept = server.get_request
+
+    def get_request():
+        # Only serve_forever's thread accepts, so no lock is needed
+        request = accept()
+        server.connections += 1
+        return request
+
+    server.get_request = get_request
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://{host}:{server.server_port}/graphql'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--problems', type=int, default=3000)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='fraction of requests that hang')
+    args = parser.parse_args()
+
+    create_app(
+        args.problems,
+        args.latency_ms / 1000.0,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate
+    ).run(host=args.host, port=args.port, threaded=True)
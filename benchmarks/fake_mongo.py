@@ -0,0 +1,678 @@
+"""In-memory stand-in for the parts of pymongo the app uses.
+
+Lets benchmarks run the real app without a MongoDB server. It covers the
+filters, updates, bulk writes, index behaviour and aggregation stages this
+codebase issues, not the whole query language. ``latency`` adds a fixed
+delay per round trip, to model a remote database; without it timings show
+app-side cost only. ``clock`` is what ``$$NOW`` reads in pipeline updates,
+so tests can move server time by hand.
+
+Unsupported operators raise ``NotImplementedError`` rather than silently
+matching nothing.
+"""
+import copy
+import itertools
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+MISSING = object()
+
+
+def get_path(doc, path):
+    value = doc
+    for part in path.split('.'):
+        if isinstance(value, dict):
+            value = value.get(part, MISSING)
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return MISSING
+        if value is MISSING:
+            return MISSING
+    return value
+
+
+def set_path(doc, path, value):
+    parts = path.split('.')
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def unset_path(doc, path):
+    parts = path.split('.')
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+def sort_key(value):
+    # Missing and null sort first, as in MongoDB
+    if value is MISSING or value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (3, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (4, value)
+
+
+def compare(value, op, operand):
+    if value is MISSING or value is None:
+        return False
+    try:
+        if op == '$gt':
+            return value > operand
+        if op == '$gte':
+            return value >= operand
+        if op == '$lt':
+            return value < operand
+        return value <= operand
+    except TypeError:
+        return False
+
+
+def equals(value, expected):
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    if value is MISSING:
+        return expected is None
+    return value == expected
+
+
+def match_condition(value, condition):
+    if not (isinstance(condition, dict) and condition and all(k.startswith('$') for k in condition)):
+        return equals(value, condition)
+    for op, operand in condition.items():
+        if op == '$eq':
+            ok = equals(value, operand)
+        elif op == '$ne':
+            ok = not equals(value, operand)
+        elif op == '$in':
+            ok = any(equals(value, candidate) for candidate in operand)
+        elif op == '$nin':
+            ok = not any(equals(value, candidate) for candidate in operand)
+        elif op in ('$gt', '$gte', '$lt', '$lte'):
+            ok = compare(value, op, operand)
+        elif op == '$exists':
+            ok = (value is not MISSING) == bool(operand)
+        else:
+            raise NotImplementedError(f'Query operator {op}')
+        if not ok:
+            return False
+    return True
+
+
+def matches(doc, query):
+    for key, condition in query.items():
+        if key == '$or':
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == '$and':
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif key.startswith('$'):
+            raise NotImplementedError(f'Query operator {key}')
+        elif not match_condition(get_path(doc, key), condition):
+            return False
+    return True
+
+
+def project(doc, projection):
+    if not projection:
+        return doc
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+    include = {k for k, v in projection.items() if v and k != '_id'}
+    if include:
+        result = {}
+        for field in include:
+            value = get_path(doc, field)
+            if value is not MISSING:
+                set_path(result, field, value)
+        if projection.get('_id', 1) and '_id' in doc:
+            result['_id'] = doc['_id']
+        return result
+    result = dict(doc)
+    for field, value in projection.items():
+        if not value:
+            unset_path(result, field)
+    return result
+
+
+def apply_update(doc, update, inserting, now=None):
+    if isinstance(update, list):
+        for stage in update:
+            (op, fields), = stage.items()
+            if op != '$set':
+                raise NotImplementedError(f'Pipeline update stage {op}')
+            # Every expression in a stage sees the document as it was before the stage
+            values = {path: evaluate(expression, doc, now) for path, expression in fields.items()}
+            for path, value in values.items():
+                set_path(doc, path, value)
+        return
+    if not any(key.startswith('$') for key in update):
+        replacement = copy.deepcopy(update)
+        replacement['_id'] = doc['_id']
+        doc.clear()
+        doc.update(replacement)
+        return
+    for op, fields in update.items():
+        if op == '$setOnInsert' and not inserting:
+            continue
+        for path, value in fields.items():
+            value = copy.deepcopy(value)
+            current = get_path(doc, path)
+            if op in ('$set', '$setOnInsert'):
+                set_path(doc, path, value)
+            elif op == '$unset':
+                unset_path(doc, path)
+            elif op == '$inc':
+                set_path(doc, path, (0 if current is MISSING else current) + value)
+            elif op == '$min':
+                if current is MISSING or value < current:
+                    set_path(doc, path, value)
+            elif op == '$max':
+                if current is MISSING or value > current:
+                    set_path(doc, path, value)
+            elif op in ('$push', '$addToSet'):
+                items = value['$each'] if isinstance(value, dict) and '$each' in value else [value]
+                target = [] if current is MISSING else current
+                for item in items:
+                    if op == '$push' or item not in target:
+                        target.append(item)
+                set_path(doc, path, target)
+            else:
+                raise NotImplementedError(f'Update operator {op}')
+
+
+def subtract(a, b):
+    value = a - b
+    # Date minus date is milliseconds, as in MongoDB
+    return value.total_seconds() * 1000 if isinstance(value, timedelta) else value
+
+
+OPERATORS = {
+    '$add': lambda args: sum(args),
+    '$subtract': lambda args: subtract(*args),
+    '$multiply': lambda args: args[0] * args[1],
+    '$divide': lambda args: args[0] / args[1],
+    '$min': lambda args: min(args),
+    '$max': lambda args: max(args),
+    '$gte': lambda args: sort_key(args[0]) >= sort_key(args[1]),
+    '$ifNull': lambda args: next((arg for arg in args if arg is not None), None),
+    '$cond': lambda args: args[1] if args[0] else args[2],
+}
+
+
+def evaluate(expression, doc, now=None):
+    if expression == '$$NOW':
+        return now if now is not None else datetime.utcnow()
+    if isinstance(expression, str) and expression.startswith('$'):
+        value = get_path(doc, expression[1:])
+        return None if value is MISSING else value
+    if isinstance(expression, dict):
+        if len(expression) == 1:
+            (key, args), = expression.items()
+            if key.startswith('$'):
+                if key not in OPERATORS:
+                    raise NotImplementedError(f'Expression operator {key}')
+                return OPERATORS[key]([evaluate(arg, doc, now) for arg in args])
+        return {key: evaluate(value, doc, now) for key, value in expression.items()}
+    return expression
+
+
+def group(docs, spec):
+    groups = {}
+    for doc in docs:
+        key = evaluate(spec['_id'], doc)
+        hashable = repr(key)
+        if hashable not in groups:
+            groups[hashable] = {'_id': key}
+            for field, accumulator in spec.items():
+                if field == '_id':
+                    continue
+                (op, _), = accumulator.items()
+                groups[hashable][field] = [] if op == '$push' else MISSING
+        result = groups[hashable]
+        for field, accumulator in spec.items():
+            if field == '_id':
+                continue
+            (op, expression), = accumulator.items()
+            value = evaluate(expression, doc)
+            current = result[field]
+            if op == '$push':
+                current.append(value)
+            elif op == '$first':
+                if current is MISSING:
+                    result[field] = value
+            elif op == '$last':
+                result[field] = value
+            elif op == '$sum':
+                result[field] = (0 if current is MISSING else current) + (value or 0)
+            elif op == '$max':
+                if current is MISSING or (value is not None and value > current):
+                    result[field] = value
+            elif op == '$min':
+                if current is MISSING or (value is not None and value < current):
+                    result[field] = value
+            else:
+                raise NotImplementedError(f'Accumulator {op}')
+    return [
+        {field: (None if value is MISSING else value) for field, value in result.items()}
+        for result in groups.values()
+    ]
+
+
+def project_stage(doc, spec):
+    result = {'_id': doc['_id']} if spec.get('_id', 1) and '_id' in doc else {}
+    for field, value in spec.items():
+        if field == '_id' or value in (0, False):
+            continue
+        if value in (1, True):
+            value = get_path(doc, field)
+            if value is not MISSING:
+                result[field] = value
+        else:
+            result[field] = evaluate(value, doc)
+    return result
+
+
+def sort_docs(docs, spec):
+    if isinstance(spec, dict):
+        spec = list(spec.items())
+    # Stable sorts applied last key first give a multi-key sort with mixed directions
+    for field, direction in reversed(spec):
+        docs.sort(key=lambda doc: sort_key(get_path(doc, field)), reverse=direction < 0)
+    return docs
+
+
+def lookup_values(condition):
+    """Values an index lookup must try for ``condition``, or None if an index can't serve it."""
+    if condition is MISSING or isinstance(condition, list):
+        return None
+    if isinstance(condition, dict):
+        return list(condition['$in']) if list(condition) == ['$in'] else None
+    return [condition]
+
+
+def normalize_keys(keys):
+    if isinstance(keys, str):
+        return [keys]
+    return [key for key, _ in keys]
+
+
+class FakeCursor:
+    def __init__(self, collection, query, projection):
+        self.collection = collection
+        self.query = query
+        self.projection = projection
+        self._sort = None
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=1):
+        self._sort = [(key, direction)] if isinstance(key, str) else list(key)
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def __iter__(self):
+        docs = self.collection._select(self.query, self._sort, self._skip, self._limit)
+        return iter([project(doc, self.projection) for doc in docs])
+
+
+class FakeCollection:
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self._docs = {}
+        # Insertion order, so index lookups return documents in natural order like a scan
+        self._seq = {}
+        self._next_seq = 0
+        self._indexes = {}
+        # Equality lookups on all fields of an index, or on its leading field, skip the full scan
+        self._lookups = {}
+        self._lock = threading.RLock()
+
+    def _round_trip(self, command):
+        client = self.database.client
+        client.commands[(command, self.name)] += 1
+        if client.latency:
+            time.sleep(client.latency)
+
+    # Indexes
+
+    def create_index(self, keys, unique=False, **kwargs):
+        fields = tuple(normalize_keys(keys))
+        name = kwargs.get('name') or '_'.join(f'{field}_1' for field in fields)
+        with self._lock:
+            self._round_trip('createIndexes')
+            self._indexes[name] = (fields, unique)
+            for lookup in {fields, fields[:1]}:
+                if lookup not in self._lookups:
+                    self._lookups[lookup] = {}
+                    for doc in self._docs.values():
+                        self._index_doc(lookup, doc)
+        return name
+
+    def _index_key(self, fields, doc):
+        return tuple(None if value is MISSING else value for value in (get_path(doc, f) for f in fields))
+
+    def _index_doc(self, fields, doc):
+        try:
+            self._lookups[fields].setdefault(self._index_key(fields, doc), set()).add(doc['_id'])
+        except TypeError:
+            # Unhashable values (arrays) are left to full scans
+            self._lookups.pop(fields, None)
+
+    def _unindex_doc(self, doc):
+        for fields, entries in self._lookups.items():
+            try:
+                ids = entries.get(self._index_key(fields, doc))
+            except TypeError:
+                continue
+            if ids:
+                ids.discard(doc['_id'])
+
+    def _reindex(self, doc):
+        for fields in list(self._lookups):
+            self._index_doc(fields, doc)
+
+    def _check_unique(self, doc):
+        for name, (fields, unique) in self._indexes.items():
+            if not unique:
+                continue
+            query = dict(zip(fields, self._index_key(fields, doc)))
+            if any(other['_id'] != doc['_id'] for other in self._candidates(query)
+                   if self._index_key(fields, other) == tuple(query.values())):
+                raise DuplicateKeyError(f'E11000 duplicate key error collection: {self.name} index: {name}')
+
+    def _candidates(self, query):
+        if '_id' in query and not isinstance(query['_id'], dict):
+            doc = self._docs.get(query['_id'])
+            return [doc] if doc is not None else []
+        usable = [
+            fields for fields in self._lookups
+            if all(lookup_values(query.get(f, MISSING)) is not None for f in fields)
+        ]
+        if not usable:
+            return list(self._docs.values())
+        fields = max(usable, key=len)
+        entries = self._lookups[fields]
+        ids = set()
+        try:
+            for key in itertools.product(*(lookup_values(query[f]) for f in fields)):
+                ids.update(entries.get(key, ()))
+        except TypeError:
+            return list(self._docs.values())
+        return sorted((self._docs[_id] for _id in ids), key=lambda doc: self._seq[doc['_id']])
+
+    def _select(self, query, sort=None, skip=0, limit=0, command='find'):
+        with self._lock:
+            self._round_trip(command)
+            docs = [doc for doc in self._candidates(query or {}) if matches(doc, query or {})]
+            if sort:
+                sort_docs(docs, sort)
+            docs = docs[skip:]
+            if limit:
+                docs = docs[:limit]
+            return [copy.deepcopy(doc) for doc in docs]
+
+    # Reads
+
+    def find(self, filter=None, projection=None, sort=None, skip=0, limit=0):
+        cursor = FakeCursor(self, filter or {}, projection)
+        if sort:
+            cursor.sort(sort)
+        return cursor.skip(skip).limit(limit)
+
+    def find_one(self, filter=None, projection=None, sort=None):
+        if filter is not None and not isinstance(filter, dict):
+            filter = {'_id': filter}
+        docs = self._select(filter or {}, sort, limit=1)
+        return project(docs[0], projection) if docs else None
+
+    def count_documents(self, filter):
+        with self._lock:
+            self._round_trip('count')
+            return sum(1 for doc in self._candidates(filter) if matches(doc, filter))
+
+    def aggregate(self, pipeline, **kwargs):
+        docs = self._select({}, command='aggregate')
+        for stage in pipeline:
+            (op, spec), = stage.items()
+            if op == '$match':
+                docs = [doc for doc in docs if matches(doc, spec)]
+            elif op == '$sort':
+                docs = sort_docs(docs, spec)
+            elif op == '$skip':
+                docs = docs[spec:]
+            elif op == '$limit':
+                docs = docs[:spec]
+            elif op == '$group':
+                docs = group(docs, spec)
+            elif op == '$project':
+                docs = [project_stage(doc, spec) for doc in docs]
+            elif op == '$count':
+                docs = [{spec: len(docs)}]
+            else:
+                raise NotImplementedError(f'Aggregation stage {op}')
+        return iter(docs)
+
+    # Writes
+
+    def _insert(self, doc):
+        doc = copy.deepcopy(doc)
+        doc.setdefault('_id', ObjectId())
+        if doc['_id'] in self._docs:
+            raise DuplicateKeyError(f'E11000 duplicate key error collection: {self.name} index: _id_')
+        self._check_unique(doc)
+        self._docs[doc['_id']] = doc
+        self._seq[doc['_id']] = self._next_seq
+        self._next_seq += 1
+        self._reindex(doc)
+        return doc['_id']
+
+    def _update(self, query, update, upsert, multi):
+        """Returns ``(matched, modified, upserted_id)``."""
+        targets = [doc for doc in self._candidates(query) if matches(doc, query)]
+        if not multi:
+            targets = targets[:1]
+        modified = 0
+        for doc in targets:
+            before = copy.deepcopy(doc)
+            self._unindex_doc(doc)
+            apply_update(doc, update, inserting=False, now=self.database.client.clock())
+            try:
+                self._check_unique(doc)
+            except DuplicateKeyError:
+                doc.clear()
+                doc.update(before)
+                self._reindex(doc)
+                raise
+            self._reindex(doc)
+            modified += doc != before
+        if targets or not upsert:
+            return len(targets), modified, None
+
+        doc = {
+            key: value for key, value in query.items()
+            if not key.startswith('$') and not (isinstance(value, dict) and any(k.startswith('$') for k in value))
+        }
+        doc.setdefault('_id', ObjectId())
+        apply_update(doc, update, inserting=True, now=self.database.client.clock())
+        return 0, 0, self._insert(doc)
+
+    def insert_one(self, document):
+        with self._lock:
+            self._round_trip('insert')
+            inserted_id = self._insert(document)
+        document.setdefault('_id', inserted_id)
+        return InsertOneResult(inserted_id, True)
+
+    def insert_many(self, documents, ordered=True):
+        with self._lock:
+            self._round_trip('insert')
+            ids = [self._insert(document) for document in documents]
+        return InsertManyResult(ids, True)
+
+    def update_one(self, filter, update, upsert=False):
+        with self._lock:
+            self._round_trip('update')
+            matched, modified, upserted = self._update(filter, update, upsert, multi=False)
+        return UpdateResult({'n': matched or int(upserted is not None), 'nModified': modified, 'upserted': upserted}, True)
+
+    def update_many(self, filter, update, upsert=False):
+        with self._lock:
+            self._round_trip('update')
+            matched, modified, upserted = self._update(filter, update, upsert, multi=True)
+        return UpdateResult({'n': matched or int(upserted is not None), 'nModified': modified, 'upserted': upserted}, True)
+
+    def replace_one(self, filter, replacement, upsert=False):
+        with self._lock:
+            self._round_trip('update')
+            matched, modified, upserted = self._update(filter, replacement, upsert, multi=False)
+        return UpdateResult({'n': matched or int(upserted is not None), 'nModified': modified, 'upserted': upserted}, True)
+
+    def _delete(self, filter, multi):
+        targets = [doc for doc in self._candidates(filter) if matches(doc, filter)]
+        if not multi:
+            targets = targets[:1]
+        for doc in targets:
+            self._unindex_doc(doc)
+            del self._docs[doc['_id']]
+            del self._seq[doc['_id']]
+        return len(targets)
+
+    def delete_one(self, filter):
+        with self._lock:
+            self._round_trip('delete')
+            return DeleteResult({'n': self._delete(filter, multi=False)}, True)
+
+    def delete_many(self, filter):
+        with self._lock:
+            self._round_trip('delete')
+            return DeleteResult({'n': self._delete(filter, multi=True)}, True)
+
+    def find_one_and_update(self, filter, update, projection=None, sort=None, upsert=False,
+                            return_document=ReturnDocument.BEFORE):
+        with self._lock:
+            self._round_trip('findAndModify')
+            targets = [doc for doc in self._candidates(filter) if matches(doc, filter)]
+            if sort:
+                sort_docs(targets, sort)
+            before = copy.deepcopy(targets[0]) if targets else None
+            if targets:
+                filter = {'_id': targets[0]['_id']}
+            _, _, upserted = self._update(filter, update, upsert, multi=False)
+            if return_document == ReturnDocument.BEFORE:
+                result = before
+            else:
+                result = copy.deepcopy(self._docs.get(upserted if upserted is not None else filter.get('_id')))
+        return project(result, projection) if result is not None else None
+
+    def bulk_write(self, requests, ordered=True):
+        result = {
+            'writeErrors': [], 'writeConcernErrors': [], 'nInserted': 0, 'nUpserted': 0,
+            'nMatched': 0, 'nModified': 0, 'nRemoved': 0, 'upserted': []
+        }
+        with self._lock:
+            self._round_trip('bulkWrite')
+            for index, op in enumerate(requests):
+                if isinstance(op, InsertOne):
+                    self._insert(op._doc)
+                    result['nInserted'] += 1
+                elif isinstance(op, (UpdateOne, UpdateMany, ReplaceOne)):
+                    matched, modified, upserted = self._update(
+                        op._filter, op._doc, op._upsert,
+                        multi=isinstance(op, UpdateMany)
+                    )
+                    result['nMatched'] += matched
+                    result['nModified'] += modified
+                    if upserted is not None:
+                        result['nUpserted'] += 1
+                        result['upserted'].append({'index': index, '_id': upserted})
+                elif isinstance(op, (DeleteOne, DeleteMany)):
+                    result['nRemoved'] += self._delete(op._filter, multi=isinstance(op, DeleteMany))
+                else:
+                    raise NotImplementedError(f'Bulk operation {type(op).__name__}')
+        return BulkWriteResult(result, True)
+
+    def drop(self):
+        with self._lock:
+            self._docs.clear()
+            self._seq.clear()
+            self._indexes.clear()
+            self._lookups.clear()
+
+
+class FakeDatabase:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = FakeCollection(self, name)
+            return self._collections[name]
+
+    def command(self, command, *args, **kwargs):
+        if command == 'ping':
+            return {'ok': 1.0}
+        raise NotImplementedError(f'Command {command}')
+
+
+class FakeMongoClient:
+    """Drop-in for ``MongoClient(uri, ...)``; connection options are accepted and ignored."""
+
+    def __init__(self, *args, latency=0.0, clock=datetime.utcnow, **kwargs):
+        self.latency = latency
+        self.clock = clock
+        # Round trips by (command, collection), like a pymongo CommandListener would see them
+        self.commands = Counter()
+        self._databases = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._databases:
+                self._databases[name] = FakeDatabase(self, name)
+            return self._databases[name]
+
+    def drop_database(self, name):
+        with self._lock:
+            self._databases.pop(name, None)
+
+    def close(self):
+        pass
@@ -0,0 +1,116 @@
+"""Load test gunicorn sync workers against gevent workers on upstream-bound endpoints.
+
+    python -m benchmarks.loadtest --latency-ms 200 --requests 400 --concurrency 100
+
+Each mode runs ``gunicorn -c gunicorn.conf.py app:app`` with the same worker
+count against the local stub upstream and reports requests/sec and latency
+percentiles for /user-stats (distinct usernames, so every call goes upstream).
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.common import summarize
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+
+API_KEY = 'loadtest'
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(worker_class, workers, upstream_url):
+    port = free_port()
+    env = dict(
+        os.environ,
+        API_KEY=API_KEY,
+        SECRET_KEY='loadtest',
+        LEETCODE_GRAPHQL_URL=upstream_url,
+        GUNICORN_WORKER_CLASS=worker_class,
+        WEB_CONCURRENCY=str(workers),
+        MONGODB_URI=os.getenv('MONGODB_URI', 'mongodb://127.0.0.1:27017'),
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}', 'app:app'],
+        cwd=BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'{base_url}/', timeout=1)
+            return process, base_url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'gunicorn ({worker_class}) did not start')
+
+
+def run_load(base_url, total, concurrency):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+
+    def call(i):
+        start = time.perf_counter()
+        response = session.post(
+            f'{base_url}/user-stats',
+            data={'username': f'loadtest-{time.monotonic_ns()}-{i}'},
+            headers={'x-api-key': API_KEY},
+            timeout=120
+        )
+        elapsed = time.perf_counter() - start
+        return elapsed, response.ok and response.json().get('status') == 'success'
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, range(total)))
+    wall = time.perf_counter() - start
+
+    stats = summarize([elapsed for elapsed, _ in results])
+    stats['errors'] = sum(1 for _, ok in results if not ok)
+    stats['rps'] = total / wall
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency-ms', type=float, default=200.0)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    server, upstream_url = serve_in_thread(create_app(problem_count=100, latency=args.latency_ms / 1000.0))
+    print(f'{args.requests} POST /user-stats, concurrency {args.concurrency}, '
+          f'{args.workers} workers, {args.latency_ms:.0f} ms upstream latency')
+    print(f"  {'mode':<10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    try:
+        for worker_class in ('sync', 'gevent'):
+            process, base_url = start_gunicorn(worker_class, args.workers, upstream_url)
+            try:
+                stats = run_load(base_url, args.requests, args.concurrency)
+            finally:
+                process.terminate()
+                process.wait()
+            print(f"  {worker_class:<10}{stats['rps']:>10.1f}{stats['p50_ms']:>10.1f}"
+                  f"{stats['p99_ms']:>10.1f}{stats['errors']:>8}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""Scenario benchmarks for the whole app, recorded to JSON for run-to-run comparison.
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --ops 1000 --concurrency 4 --output benchmarks/results/after.json \\
+        --compare benchmarks/results/before.json
+
+Runs the real app through Flask's test client with the stub upstream
+(``fake_leetcode``) and the in-memory MongoDB stand-in (``fake_mongo``), so
+it needs no network or database. Each scenario records throughput,
+p50/p95/p99 latency, errors and the peak memory allocated while it runs.
+With ``--compare``, scenarios whose p95 rose or throughput fell by more than
+``--threshold`` are reported as regressions and the exit status is 1.
+
+Runs are reproducible: problem data, users and every scenario's request
+sequence come from fixed seeds.
+"""
+import argparse
+import functools
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.common import compare_results, load_results, summarize, write_results
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+from benchmarks.fake_mongo import FakeMongoClient
+
+API_KEY = 'bench'
+PASSWORD = 'bench-password'
+DIFFICULTIES = ['', '', 'EASY', 'MEDIUM', 'HARD']
+SORTS = ['', '', 'acceptance_rate', 'total_accepted', 'title']
+SEARCH_PHRASES = ['two sum', 'binary search tree', 'linked list', 'sliding window maximum',
+                  'valid parentheses', 'merge interval', 'course schedule', 'palindrome substring']
+KEYSTROKES = [phrase[:end] for phrase in SEARCH_PHRASES for end in range(1, len(phrase) + 1)
+              if not phrase[:end].endswith(' ')]
+
+
+def browse(client, rng, i, ctx):
+    page = rng.randint(1, ctx['pages'])
+    return client.get(
+        f"/scrape-leetcode?page={page}&per_page=50&difficulty={rng.choice(DIFFICULTIES)}"
+        f"&sort={rng.choice(SORTS)}&order={rng.choice(['asc', 'desc'])}",
+        headers={'x-api-key': API_KEY}
+    )
+
+
+def search_typing(client, rng, i, ctx):
+    return client.get(
+        f'/scrape-leetcode?page=1&per_page=50&search={KEYSTROKES[i % len(KEYSTROKES)]}',
+        headers={'x-api-key': API_KEY}
+    )
+
+
+def toggle_storm(client, rng, i, ctx):
+    if i % 20 == 19:
+        problem_ids = [str(rng.randint(1, ctx['problems'])) for _ in range(100)]
+        return client.post('/toggle-solved/bulk', json={'problem_ids': problem_ids, 'solved': rng.random() < 0.5})
+    return client.post('/toggle-solved', json={'problem_id': str(rng.randint(1, ctx['problems'])), 'solved': rng.random() < 0.7})
+
+
+def stats_lookup(client, rng, i, ctx):
+    # Skewed towards a few popular users, like a leaderboard; 5% don't exist and count as errors
+    if rng.random() < 0.05:
+        username = f'missing-{rng.randint(1, 1000)}'
+    else:
+        username = f'user-{min(int(rng.paretovariate(1.2)), ctx["stats_users"])}'
+    return client.post('/user-stats', data={'username': username}, headers={'x-api-key': API_KEY})
+
+
+SCENARIOS = {
+    'browse': browse,
+    'search_typing': search_typing,
+    'toggle_storm': toggle_storm,
+    'stats_lookup': stats_lookup,
+}
+
+
+def is_error(response):
+    if response.status_code >= 400:
+        return True
+    return response.is_json and (response.get_json(silent=True) or {}).get('status') == 'error'
+
+
+def build_app(args, upstream_url):
+    os.environ.update(
+        API_KEY=API_KEY,
+        SECRET_KEY='bench',
+        LEETCODE_GRAPHQL_URL=upstream_url,
+        SCHEDULER_ENABLED='false',
+        # The stand-in can't run the limiter's pipeline update, and the stub needs no protecting
+        LEETCODE_RATE_LIMIT='0'
+    )
+    import app as app_module
+    # The app connects on first use, so the stand-in can be swapped in after import
+    app_module.db.factory = functools.partial(FakeMongoClient, latency=args.mongo_latency_ms / 1000.0)
+    app_module.catalog.sync()
+    return app_module
+
+
+def login_clients(app_module, count, problems, rng):
+    from models import SolvedProblem, User
+
+    clients = []
+    for n in range(count):
+        user = User(username=f'bench-{n}', email=f'bench-{n}@example.com', password=PASSWORD)
+        user._id = app_module.db.users.insert_one(user.to_dict()).inserted_id
+        # Start every user with a realistic solved set
+        app_module.db.solved_problems.bulk_write([
+            SolvedProblem.upsert(str(user._id), str(problem_id), True)
+            for problem_id in rng.sample(range(1, problems + 1), problems // 5)
+        ])
+        client = app_module.app.test_client()
+        response = client.post('/login', data={'username': user.username, 'password': PASSWORD})
+        if response.status_code != 302:
+            raise RuntimeError(f'Could not log in {user.username}')
+        clients.append(client)
+    return clients
+
+
+def run_ops(scenario, clients, ops, seed, ctx):
+    """Run ``ops`` requests spread across the clients, one thread each; returns (samples, errors, seconds)."""
+    samples = [[] for _ in clients]
+    errors = [0 for _ in clients]
+
+    def worker(w):
+        rng = random.Random(f'{seed}-{w}')
+        for i in range(w, ops, len(clients)):
+            start = time.perf_counter()
+            response = scenario(clients[w], rng, i, ctx)
+            samples[w].append(time.perf_counter() - start)
+            errors[w] += is_error(response)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(len(clients))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [s for worker_samples in samples for s in worker_samples], sum(errors), time.perf_counter() - start
+
+
+def run_scenario(name, clients, args, ctx):
+    scenario = SCENARIOS[name]
+    run_ops(scenario, clients[:1], args.warmup, f'{name}-warmup', ctx)
+    samples, errors, seconds = run_ops(scenario, clients, args.ops, name, ctx)
+
+    # Separate pass for memory: tracemalloc slows everything down too much to time under it
+    tracemalloc.start()
+    run_ops(scenario, clients[:1], args.memory_ops, f'{name}-memory', ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = summarize(samples)
+    stats.update(
+        errors=errors,
+        seconds=round(seconds, 3),
+        throughput_rps=round(len(samples) / seconds, 1) if seconds else 0.0,
+        peak_alloc_kb=round(peak / 1024, 1),
+        max_rss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    )
+    return stats
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(results):
+    print(f"  {'scenario':<16}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'peak KB':>10}")
+    for name, stats in results['scenarios'].items():
+        print(f"  {name:<16}{stats['throughput_rps']:>9.1f}{stats['p50_ms']:>9.3f}{stats['p95_ms']:>9.3f}"
+              f"{stats['p99_ms']:>9.3f}{stats['errors']:>8}{stats['peak_alloc_kb']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated subset to run')
+    parser.add_argument('--ops', type=int, default=500, help='timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--memory-ops', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=1, help='logged-in clients, one thread each')
+    parser.add_argument('--problems', type=int, default=3000)
+    parser.add_argument('--stats-users', type=int, default=500)
+    parser.add_argument('--upstream-latency-ms', type=float, default=50.0)
+    parser.add_argument('--mongo-latency-ms', type=float, default=0.0)
+    parser.add_argument('--output', default=os.path.join(
+        'benchmarks', 'results', f'{datetime.utcnow():%Y%m%d-%H%M%S}.json'))
+    parser.add_argument('--compare', help='earlier results JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.15, help='relative change that counts as a regression')
+    args = parser.parse_args()
+
+    names = [name for name in args.scenarios.split(',') if name]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+
+    server, upstream_url = serve_in_thread(create_app(args.problems, args.upstream_latency_ms / 1000.0))
+    try:
+        app_module = build_app(args, upstream_url)
+        clients = login_clients(app_module, args.concurrency, args.problems, random.Random(0))
+        ctx = {'problems': args.problems, 'pages': -(-args.problems // 50), 'stats_users': args.stats_users}
+        results = {
+            'meta': {
+                'timestamp': datetime.utcnow().isoformat(),
+                'git_revision': git_revision(),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'args': vars(args)
+            },
+            'scenarios': {}
+        }
+        for name in names:
+            results['scenarios'][name] = run_scenario(name, clients, args, ctx)
+    finally:
+        server.shutdown()
+
+    write_results(args.output, results)
+    print_summary(results)
+    print(f'Results written to {args.output}')
+
+    if args.compare:
+        regressions = compare_results(load_results(args.compare), results, args.threshold)
+        for name, metric, old, new, change in regressions:
+            print(f'REGRESSION {name} {metric}: {old:.3f} -> {new:.3f} ({change:+.0%} worse)')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions beyond {args.threshold:.0%} against {args.compare}')
+
+
+if __name__ == '__main__':
+    main()
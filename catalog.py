@@ -0,0 +1,368 @@
+import json
+import threading
+from array import array
+from datetime import datetime
+
+from pymongo import ReplaceOne
+
+from search import SearchIndex
+from versions import to_version
+
+CATALOG_QUERY = '''
+query problemsetQuestionList($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
+    problemsetQuestionList: questionList(
+        categorySlug: $categorySlug
+        limit: $limit
+        skip: $skip
+        filters: $filters
+    ) {
+        total: totalNum
+        questions: data {
+            questionId
+            title
+            titleSlug
+            difficulty
+            acRate
+            status
+            stats
+            isPaidOnly
+            topicTags {
+                name
+                slug
+            }
+        }
+    }
+}
+'''
+
+# Number of questions requested per upstream call while syncing
+SYNC_PAGE_SIZE = 500
+
+
+DIFFICULTY_CODES = {'EASY': 0, 'MEDIUM': 1, 'HARD': 2}
+
+# Sortable fields, as named in the API, and the column each one sorts by
+SORT_FIELDS = {
+    'id': 'number',
+    'title': 'title',
+    'difficulty': 'difficulty',
+    'acceptance_rate': 'ac_rate',
+    'total_accepted': 'total_accepted',
+    'total_submissions': 'total_submissions'
+}
+
+
+# Row fields sent to clients that mirror the catalog (see ProblemCatalog.changes)
+SYNC_FIELDS = ('id', 'title', 'slug', 'difficulty', 'acceptance_rate', 'paid_only')
+
+
+class CatalogSyncError(Exception):
+    pass
+
+
+def sync_fingerprint(q):
+    # Submission totals move on every sync; only a change a client would show makes a row new
+    return (q['title'], q['titleSlug'], q['difficulty'], round(float(q['acRate']), 1), q['isPaidOnly'])
+
+
+def process_question(q):
+    stats = json.loads(q['stats'])
+    return {
+        'id': q['questionId'],
+        'title': q['title'],
+        'slug': q['titleSlug'],
+        'difficulty': q['difficulty'],
+        'acceptance_rate': round(float(q['acRate']), 1),
+        'total_accepted': int(stats['totalAcceptedRaw']),
+        'total_submissions': int(stats['totalSubmissionRaw']),
+        'paid_only': q['isPaidOnly']
+    }
+
+
+class ProblemTable:
+    """Pre-parsed, column-oriented copy of the catalog.
+
+    Rows are parsed once per sync. Filters scan compact typed columns and
+    every sort order is precomputed, so a page request is a single pass
+    over row numbers with no parsing or sorting.
+    """
+
+    def __init__(self, questions):
+        self.rows = [process_question(q) for q in questions]
+        self.row_of = {row['id']: i for i, row in enumerate(self.rows)}
+        self.ids = [row['id'] for row in self.rows]
+        self.number = array('q', (int(row['id']) if row['id'].isdigit() else 0 for row in self.rows))
+        self.title = [row['title'].lower() for row in self.rows]
+        self.difficulty = array('b', (DIFFICULTY_CODES.get(row['difficulty'].upper(), -1) for row in self.rows))
+        self.ac_rate = array('d', (row['acceptance_rate'] for row in self.rows))
+        self.total_accepted = array('q', (row['total_accepted'] for row in self.rows))
+        self.total_submissions = array('q', (row['total_submissions'] for row in self.rows))
+        self.paid = array('b', (row['paid_only'] for row in self.rows))
+        self.versions = array('q', (to_version(q.get('changed_at')) for q in questions))
+
+        self.counts = {
+            'total': len(self.rows),
+            'byDifficulty': {
+                name: sum(1 for code in self.difficulty if code == DIFFICULTY_CODES[name.upper()])
+                for name in ('Easy', 'Medium', 'Hard')
+            }
+        }
+
+        # Catalog (upstream) order is the default; the others are sorted once here
+        self.orders = {None: array('l', range(len(self.rows)))}
+        for field, column in SORT_FIELDS.items():
+            values = getattr(self, column)
+            self.orders[field] = array('l', sorted(range(len(self.rows)), key=values.__getitem__))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def select(self, order, difficulty='', min_ac_rate=None, max_ac_rate=None,
+               paid='exclude', solved_ids=None, solved=None):
+        """Filter ``order`` (row numbers) and return the surviving rows in order."""
+        rows = order
+        if difficulty:
+            code = DIFFICULTY_CODES.get(difficulty.upper(), -1)
+            column = self.difficulty
+            rows = [r for r in rows if column[r] == code]
+        if paid != 'include':
+            wanted = 1 if paid == 'only' else 0
+            column = self.paid
+            rows = [r for r in rows if column[r] == wanted]
+        if min_ac_rate is not None:
+            column = self.ac_rate
+            rows = [r for r in rows if column[r] >= min_ac_rate]
+        if max_ac_rate is not None:
+            column = self.ac_rate
+            rows = [r for r in rows if column[r] <= max_ac_rate]
+        if solved is not None:
+            ids = self.ids
+            solved_ids = solved_ids or ()
+            rows = [r for r in rows if (ids[r] in solved_ids) == solved]
+        return rows
+
+
+class ProblemCatalog:
+    """Local mirror of LeetCode's problemsetQuestionList.
+
+    The full list is pulled from upstream once, persisted in the ``problems``
+    collection and kept in memory so pagination, search and difficulty
+    filtering never leave the process. Refreshing is left to the caller
+    (see the scheduler jobs in ``app.py``). Pass ``collection=None`` for a
+    memory-only mirror.
+    """
+
+    def __init__(self, collection, client):
+        self.collection = collection
+        self.client = client
+        self.last_synced = None
+        # questionId -> when it disappeared upstream, so clients can drop it too
+        self.removed = {}
+        self._questions = []
+        self.table = ProblemTable([])
+        self.search_index = SearchIndex()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._questions)
+
+    def load(self):
+        # Load the persisted snapshot, keeping upstream ordering
+        if self.collection is None:
+            return 0
+        questions = []
+        removed = {}
+        last_synced = None
+        for doc in self.collection.find({}, {'_id': 0}).sort('position', 1):
+            doc.pop('position', None)
+            synced_at = doc.pop('synced_at', None)
+            if synced_at is not None and (last_synced is None or synced_at > last_synced):
+                last_synced = synced_at
+            removed_at = doc.pop('removed_at', None)
+            if removed_at is not None:
+                removed[doc['questionId']] = removed_at
+                continue
+            # Snapshots from before change tracking count as changed when synced
+            doc.setdefault('changed_at', synced_at)
+            questions.append(doc)
+        with self._lock:
+            self._replace(questions)
+            self.removed = removed
+            self.last_synced = last_synced
+        return len(questions)
+
+    def fetch_all(self):
+        questions = []
+        total = None
+        while total is None or len(questions) < total:
+            data = self.client.query(CATALOG_QUERY, {
+                'categorySlug': '',
+                'skip': len(questions),
+                'limit': SYNC_PAGE_SIZE,
+                'filters': {}
+            })
+            if 'errors' in data:
+                raise CatalogSyncError('Error fetching data from LeetCode API')
+
+            page = data['data']['problemsetQuestionList']
+            total = page['total']
+            if not page['questions']:
+                break
+            questions.extend(page['questions'])
+        return questions
+
+    def sync(self):
+        fetched = self.fetch_all()
+        synced_at = datetime.utcnow()
+
+        # Rows keep the time they last changed, so clients can ask for changes since a version
+        if not self._questions:
+            self.load()
+        previous = {q['questionId']: q for q in self._questions}
+        questions = []
+        for q in fetched:
+            old = previous.pop(q['questionId'], None)
+            unchanged = old is not None and old.get('changed_at') and sync_fingerprint(old) == sync_fingerprint(q)
+            questions.append(dict(q, changed_at=old['changed_at'] if unchanged else synced_at))
+        # A problem that comes back is a changed row again, not a removal
+        fetched_ids = {q['questionId'] for q in fetched}
+        removed = {qid: ts for qid, ts in self.removed.items() if qid not in fetched_ids}
+        for question_id in previous:
+            removed[question_id] = synced_at
+
+        if self.collection is not None:
+            operations = [
+                ReplaceOne(
+                    {'questionId': q['questionId']},
+                    dict(q, position=position, synced_at=synced_at),
+                    upsert=True
+                )
+                for position, q in enumerate(questions)
+            ]
+            if operations:
+                self.collection.bulk_write(operations, ordered=False)
+            # Problems that no longer exist upstream stay behind as tombstones
+            self.collection.update_many(
+                {'synced_at': {'$lt': synced_at}, 'removed_at': None},
+                {'$set': {'removed_at': synced_at}}
+            )
+
+        with self._lock:
+            self._replace(questions)
+            self.removed = removed
+            self.last_synced = synced_at
+        return len(questions)
+
+    def _replace(self, questions):
+        # Index first so a search never sees questions the index doesn't know about
+        self.search_index.update(questions)
+        self.table = ProblemTable(questions)
+        self._questions = questions
+
+    def ensure_loaded(self):
+        if not self._questions:
+            with self._lock:
+                if not self._questions:
+                    self.load()
+                if not self._questions:
+                    self.sync()
+
+    def reload_if_stale(self):
+        """Pick up a snapshot another process synced into the collection."""
+        if self.collection is None:
+            return False
+        latest = self.collection.find_one({}, {'synced_at': 1}, sort=[('synced_at', -1)])
+        if latest is None or (self.last_synced is not None and latest['synced_at'] <= self.last_synced):
+            return False
+        with self._lock:
+            self.load()
+        return True
+
+    def questions(self):
+        """The raw upstream questions, in catalog order; treat as read-only."""
+        self.ensure_loaded()
+        return self._questions
+
+    def changes(self, since=0):
+        """Return ``(version, rows, removed_ids)`` for everything that changed after version ``since``.
+
+        ``since=0`` gives the whole catalog. A client that already holds a
+        newer version than this process (another worker synced first) gets
+        nothing back and keeps its version.
+        """
+        self.ensure_loaded()
+        with self._lock:
+            table = self.table
+            removed = self.removed
+            version = to_version(self.last_synced)
+        if since >= version:
+            return since, [], []
+
+        rows = table.rows
+        versions = table.versions
+        changed = [rows[r] for r in range(len(rows)) if versions[r] > since]
+        return version, changed, [qid for qid, ts in removed.items() if to_version(ts) > since]
+
+    def counts(self):
+        """Problem totals by difficulty, paid-only problems included, as LeetCode reports them."""
+        self.ensure_loaded()
+        return self.table.counts
+
+    def query(self, skip=0, limit=50, search='', difficulty='', sort=None, descending=False,
+              min_ac_rate=None, max_ac_rate=None, paid='exclude', solved_ids=None, solved=None):
+        """Return ``(total, rows)`` for one page of the filtered, sorted catalog.
+
+        Rows are the pre-parsed dicts from :func:`process_question`. Search
+        results are ranked by relevance unless an explicit ``sort`` is given.
+        """
+        table, selected = self._select(
+            search, difficulty, sort, descending, min_ac_rate, max_ac_rate, paid, solved_ids, solved
+        )
+        rows = table.rows
+        # A negative skip would slice from the end of the list
+        skip = max(skip, 0)
+        return len(selected), [rows[r] for r in selected[skip:skip + max(limit, 0)]]
+
+    def iter_rows(self, search='', difficulty='', sort=None, descending=False,
+                  min_ac_rate=None, max_ac_rate=None, paid='exclude', solved_ids=None, solved=None):
+        """Return an iterator over every row :meth:`query` would page through.
+
+        Filtering happens (and errors are raised) in this call; the table is
+        captured here too, so a sync finishing midway doesn't mix snapshots.
+        """
+        table, selected = self._select(
+            search, difficulty, sort, descending, min_ac_rate, max_ac_rate, paid, solved_ids, solved
+        )
+        rows = table.rows
+        return (rows[r] for r in selected)
+
+    def _select(self, search, difficulty, sort, descending, min_ac_rate, max_ac_rate, paid, solved_ids, solved):
+        self.ensure_loaded()
+        table = self.table
+
+        if sort is not None and sort not in SORT_FIELDS:
+            raise ValueError(f'Cannot sort by {sort}')
+
+        if search:
+            row_of = table.row_of
+            matches = [row_of[qid] for qid in self.search_index.search(search) if qid in row_of]
+            if sort is None:
+                order = matches
+            else:
+                matched = set(matches)
+                order = [r for r in table.orders[sort] if r in matched]
+        else:
+            order = table.orders[sort]
+
+        if descending:
+            order = order[::-1]
+
+        return table, table.select(
+            order,
+            difficulty=difficulty,
+            min_ac_rate=min_ac_rate,
+            max_ac_rate=max_ac_rate,
+            paid=paid,
+            solved_ids=solved_ids,
+            solved=solved
+        )
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+from resilience import UpstreamUnavailableError
+
+logger = logging.getLogger(__name__)
+
+QUESTION_DETAIL_QUERY = '''
+query questionData($titleSlug: String!) {
+    question(titleSlug: $titleSlug) {
+        questionId
+        title
+        titleSlug
+        content
+        difficulty
+        isPaidOnly
+        hints
+        topicTags {
+            name
+            slug
+        }
+        codeSnippets {
+            lang
+            langSlug
+            code
+        }
+    }
+}
+'''
+
+# Catalog fields that say a problem's page may have changed; stats and acRate change constantly
+LIST_FIELDS = ('questionId', 'title', 'difficulty', 'isPaidOnly', 'topicTags')
+
+
+class CrawlError(Exception):
+    pass
+
+
+def digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+def html_to_text(html):
+    """Plain text of a problem's HTML, plus the text of its ``<pre>`` blocks (the examples)."""
+    # Imported here so only the crawler pays for bs4, not every app startup
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html or '', 'html.parser')
+    examples = [pre.get_text().strip() for pre in soup.find_all('pre')]
+    # 10<sup>4</sup> would otherwise read as 104
+    for sup in soup.find_all('sup'):
+        sup.replace_with(f'^{sup.get_text()}')
+    text = soup.get_text().replace('\xa0', ' ')
+    text = re.sub(r'[ \t]+\n', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip(), examples
+
+
+def parse_question(question):
+    text, examples = html_to_text(question.get('content'))
+    return {
+        'question_id': question['questionId'],
+        'title': question['title'],
+        'difficulty': question['difficulty'],
+        'paid_only': question['isPaidOnly'],
+        'text': text,
+        'examples': examples,
+        'hints': [html_to_text(hint)[0] for hint in question.get('hints') or []],
+        'topic_tags': [tag['name'] for tag in question.get('topicTags') or []],
+        'code_snippets': {
+            snippet['langSlug']: snippet['code'] for snippet in question.get('codeSnippets') or []
+        }
+    }
+
+
+class HostThrottle:
+    """Spaces requests to each host at least ``min_interval`` seconds apart, across threads."""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        # Reserve the next slot under the lock, sleep outside it
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ProblemCrawler:
+    """Fetches every catalog problem's detail page into ``collection``, keyed by slug.
+
+    A problem is fetched when it has no stored page, when its catalog entry
+    (title, difficulty, tags...) changed, or when its page was last checked
+    more than ``max_age`` seconds ago. Each stored page keeps a hash of the
+    upstream payload; a refetch that hashes the same only updates
+    ``checked_at``.
+
+    Runs are checkpointed in ``checkpoints``: a run that stops early
+    (process killed, LeetCode unavailable, ``limit`` reached) stays open,
+    and the next run resumes it, skipping every page checked since it
+    started. Pages that failed are retried by the next run.
+
+    ``heartbeat``, if set, is called as each page is checkpointed, e.g. to
+    renew a leader lease for runs that outlast it. Once it returns False
+    the run stops early and leaves its checkpoint open.
+    """
+
+    def __init__(self, collection, checkpoints, client, catalog, workers=4, min_interval=0.5,
+                 max_age=7 * 86400, name='problem_details', heartbeat=None):
+        self.collection = collection
+        self.checkpoints = checkpoints
+        self.client = client
+        self.catalog = catalog
+        self.workers = workers
+        self.throttle = HostThrottle(min_interval)
+        self.max_age = max_age
+        self.name = name
+        self.heartbeat = heartbeat
+
+    @property
+    def host(self):
+        return urlparse(self.client.graphql_url).netloc
+
+    def get(self, slug):
+        return self.collection.find_one({'_id': slug}, {'content_hash': 0, 'list_hash': 0})
+
+    def pending(self, run_started_at):
+        """``(slug, list_hash, content_hash)`` for every problem this run still has to check."""
+        stored = {
+            doc['_id']: doc for doc in self.collection.find({}, {'list_hash': 1, 'content_hash': 1, 'checked_at': 1})
+        }
+        stale_before = run_started_at - timedelta(seconds=self.max_age)
+        todo = []
+        for question in self.catalog.questions():
+            slug = question['titleSlug']
+            list_hash = digest({field: question.get(field) for field in LIST_FIELDS})
+            doc = stored.get(slug)
+            if doc is not None:
+                if doc['checked_at'] >= run_started_at:
+                    continue
+                if doc['list_hash'] == list_hash and doc['checked_at'] >= stale_before:
+                    continue
+            todo.append((slug, list_hash, doc['content_hash'] if doc else None))
+        return todo
+
+    def fetch(self, slug, list_hash, content_hash):
+        """Fetch and store one page; returns ``'changed'`` or ``'unchanged'``."""
+        self.throttle.wait(self.host)
+        data = self.client.query(QUESTION_DETAIL_QUERY, {'titleSlug': slug})
+        question = (data.get('data') or {}).get('question')
+        if 'errors' in data or not question:
+            raise CrawlError(f'No question data for {slug}')
+
+        now = datetime.utcnow()
+        new_hash = digest(question)
+        if new_hash == content_hash:
+            self.collection.update_one({'_id': slug}, {'$set': {'checked_at': now, 'list_hash': list_hash}})
+            return 'unchanged'
+        doc = dict(parse_question(question), content_hash=new_hash, list_hash=list_hash,
+                   fetched_at=now, checked_at=now)
+        self.collection.update_one({'_id': slug}, {'$set': doc}, upsert=True)
+        return 'changed'
+
+    def run(self, limit=None):
+        """Crawl (or resume crawling) up to ``limit`` pages and return a report."""
+        checkpoint = self.checkpoints.find_one({'_id': self.name})
+        resumed = checkpoint is not None and checkpoint.get('finished_at') is None
+        if resumed:
+            started_at = checkpoint['started_at']
+        else:
+            started_at = datetime.utcnow()
+            self.checkpoints.replace_one(
+                {'_id': self.name},
+                {'started_at': started_at, 'finished_at': None, 'changed': 0, 'unchanged': 0, 'failed': 0},
+                upsert=True
+            )
+
+        todo = self.pending(started_at)
+        batch = todo[:limit] if limit is not None else todo
+        counts = {'changed': 0, 'unchanged': 0, 'failed': 0}
+        stop = threading.Event()
+        start = time.perf_counter()
+
+        def crawl(item):
+            # Pages queued behind an outage are left for the resumed run
+            if stop.is_set():
+                return None
+            try:
+                return self.fetch(*item)
+            except UpstreamUnavailableError:
+                stop.set()
+                raise
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='crawler') as pool:
+            futures = {pool.submit(crawl, item): item[0] for item in batch}
+            for future in as_completed(futures):
+                try:
+                    outcome = future.result()
+                except UpstreamUnavailableError:
+                    continue
+                except Exception as e:
+                    logger.warning('Could not crawl %s: %s', futures[future], e)
+                    outcome = 'failed'
+                if outcome is not None:
+                    counts[outcome] += 1
+                    self.checkpoints.update_one({'_id': self.name}, {'$inc': {outcome: 1}})
+                    if self.heartbeat is not None and not stop.is_set() and not self.heartbeat():
+                        # Another process may take the run over; pages already in flight still finish
+                        logger.warning('Crawl of %s lost its lease, stopping', self.name)
+                        stop.set()
+
+        seconds = time.perf_counter() - start
+        # Failed pages count as attempted: the next run retries them anyway, as
+        # they were never checked, and one bad page mustn't hold the run open forever
+        remaining = len(todo) - sum(counts.values())
+        if remaining == 0:
+            self.checkpoints.update_one({'_id': self.name}, {'$set': {'finished_at': datetime.utcnow()}})
+
+        pages = counts['changed'] + counts['unchanged']
+        report = dict(
+            counts,
+            resumed=resumed,
+            remaining=remaining,
+            seconds=round(seconds, 3),
+            pages_per_sec=round(pages / seconds, 2) if seconds else 0.0
+        )
+        logger.info('Crawl of %s: %s', self.name, report)
+        return report
+
+    def status(self):
+        checkpoint = self.checkpoints.find_one({'_id': self.name}, {'_id': 0}) or {}
+        return {
+            'stored': self.collection.count_documents({}),
+            'run': {
+                key: value.isoformat() if isinstance(value, datetime) else value
+                for key, value in checkpoint.items()
+            }
+        }
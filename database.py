@@ -0,0 +1,89 @@
+import os
+import threading
+
+import certifi
+from pymongo.mongo_client import MongoClient
+from pymongo.server_api import ServerApi
+
+
+def connect(uri, event_listeners=()):
+    return MongoClient(
+        uri,
+        server_api=ServerApi('1'),
+        tls=True,
+        tlsCAFile=certifi.where(),
+        event_listeners=list(event_listeners)
+    )
+
+
+class LazyCollection:
+    """A collection of a :class:`Mongo` database, resolved when first used."""
+
+    def __init__(self, mongo, name):
+        self._mongo = mongo
+        self._name = name
+        self._collection = None
+        self._generation = None
+
+    def _resolve(self):
+        database = self._mongo.database
+        if self._generation != self._mongo.generation:
+            self._collection = database[self._name]
+            self._generation = self._mongo.generation
+        return self._collection
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+    def __repr__(self):
+        return f'LazyCollection({self._name!r})'
+
+
+class Mongo:
+    """MongoDB database whose client is created on first use, once per process.
+
+    ``db.users`` and ``db['users']`` hand out :class:`LazyCollection` objects,
+    so modules can hold collections from import time without connecting.
+    pymongo clients must not cross a fork, so a process that finds a client
+    created by its parent builds its own; :meth:`close` drops the client
+    explicitly, e.g. in a gunicorn master after preloading.
+    """
+
+    def __init__(self, factory, name):
+        self.factory = factory
+        self.name = name
+        self.generation = 0
+        self._client = None
+        self._pid = None
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self._client = self.factory()
+                    self._pid = os.getpid()
+                    self.generation += 1
+        return self._client
+
+    @property
+    def database(self):
+        return self.client[self.name]
+
+    def close(self):
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = None
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = LazyCollection(self, name)
+        return self._collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
@@ -0,0 +1,62 @@
+import gc
+import os
+
+# gevent workers multiplex many in-flight upstream requests per process by
+# cooperatively yielding on socket I/O; set GUNICORN_WORKER_CLASS=sync to
+# fall back to one request per worker.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+# With preloading the master imports the app and loads the problem catalog
+# once; workers fork from it and share those pages instead of each
+# building their own copy.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() == 'true'
+if preload_app and worker_class == 'gevent':
+    # Locks and sockets the app creates at import must already be gevent's, as they will be in the workers
+    from gevent import monkey
+    monkey.patch_all()
+
+# Workers write Prometheus samples to this directory so /metrics can merge
+# them. It has to be set before any worker imports prometheus_client, and
+# emptied on startup so counters from a previous run don't leak in.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(os.getenv('TMPDIR', '/tmp'), 'leetcode_scraper_metrics')
+)
+
+
+# A preloading master creates its metrics while importing the app, before on_starting
+os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def on_starting(server):
+    own = f'_{os.getpid()}.db'
+    for name in os.listdir(PROMETHEUS_MULTIPROC_DIR):
+        if not name.endswith(own):
+            os.remove(os.path.join(PROMETHEUS_MULTIPROC_DIR, name))
+
+
+def when_ready(server):
+    if preload_app:
+        from app import warm_up
+        warm_up()
+        # Keep the collector from touching (and so copying) the preloaded objects in workers
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    # Threads started in the master would not survive the fork
+    from app import start_background_tasks
+    start_background_tasks()
+
+
+def worker_exit(server, worker):
+    # Write buffered toggles, and stop the password hashing processes with the worker that started them
+    from app import passwords, solved_writes
+    solved_writes.flush()
+    passwords.shutdown()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta, timezone
+
+# Compact field names used inside each bucket's samples
+FIELDS = {
+    'a': 'All',
+    'e': 'Easy',
+    'm': 'Medium',
+    'h': 'Hard'
+}
+
+
+def day_bucket(ts):
+    return datetime(ts.year, ts.month, ts.day)
+
+
+def extract_values(profile_data):
+    """Reduce a getUserProfile response to the values we track over time."""
+    user = profile_data['data']['matchedUser']
+    counts = {stat['difficulty'].capitalize(): stat['count'] for stat in user['submitStats']['acSubmissionNum']}
+    values = {key: counts.get(name, 0) for key, name in FIELDS.items()}
+    values['r'] = user['profile'].get('ranking')
+    return values
+
+
+def expand(values):
+    point = {name: values.get(key) for key, name in FIELDS.items()}
+    point['ranking'] = values.get('r')
+    return point
+
+
+class StatsHistory:
+    """Per-user stats history stored as one document per user per day.
+
+    A sample is appended only when the values differ from the user's last
+    recorded ones. Each day bucket also stores ``prev_values``, the state
+    it started from, and a user refreshed on a day with no change gets an
+    empty bucket. A date-range query therefore only reads the buckets
+    inside the range, via the ``(username, bucket)`` index.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def ensure_indexes(self):
+        self.collection.create_index([('username', 1), ('bucket', 1)], unique=True)
+
+    def record(self, username, values, ts=None):
+        """Record ``values`` for ``username``; returns whether they changed."""
+        ts = ts or datetime.utcnow()
+        bucket = day_bucket(ts)
+        last = self.collection.find_one(
+            {'username': username},
+            {'bucket': 1, 'last_values': 1, '_id': 0},
+            sort=[('bucket', -1)]
+        )
+        previous = last['last_values'] if last else None
+        changed = previous != values
+        if not changed and last['bucket'] == bucket:
+            return False
+
+        update = {'$setOnInsert': {'prev_values': previous, 'first': ts}}
+        if changed:
+            update['$push'] = {'samples': dict(values, t=ts)}
+            update['$set'] = {'last_values': values, 'last': ts}
+            update['$inc'] = {'count': 1}
+        else:
+            # First refresh of the day with nothing new: an empty bucket keeps the day's state queryable
+            update['$setOnInsert'].update(last_values=values, samples=[], count=0)
+
+        self.collection.update_one({'username': username, 'bucket': bucket}, update, upsert=True)
+        return changed
+
+    def record_profile(self, username, profile_data, ts=None):
+        return self.record(username, extract_values(profile_data), ts)
+
+    def progression(self, usernames, start, end):
+        """Each user's state at ``start`` plus every change up to ``end``.
+
+        A user with no bucket inside the range gets the state from their
+        latest bucket before it and no points. The baseline is None when
+        nothing was recorded for the user before ``start``.
+        """
+        pipeline = [
+            {'$match': {
+                'username': {'$in': usernames},
+                'bucket': {'$gte': day_bucket(start), '$lte': day_bucket(end)}
+            }},
+            {'$sort': {'username': 1, 'bucket': 1}},
+            {'$group': {
+                '_id': '$username',
+                'baseline': {'$first': '$prev_values'},
+                'buckets': {'$push': '$samples'}
+            }}
+        ]
+
+        series = {username: {'baseline': None, 'points': []} for username in usernames}
+        idle = set(usernames)
+        for doc in self.collection.aggregate(pipeline):
+            idle.discard(doc['_id'])
+            user_series = series[doc['_id']]
+            baseline = doc['baseline']
+            for samples in doc['buckets']:
+                for sample in samples:
+                    if sample['t'] < start:
+                        # Earlier the same day as ``start``: part of the starting state
+                        baseline = sample
+                    elif sample['t'] <= end:
+                        user_series['points'].append(dict(expand(sample), timestamp=sample['t'].isoformat()))
+            user_series['baseline'] = expand(baseline) if baseline else None
+
+        if idle:
+            # Nothing changed or was refreshed in the range, so the state is whatever it was last
+            before = self.collection.aggregate([
+                {'$match': {'username': {'$in': sorted(idle)}, 'bucket': {'$lt': day_bucket(start)}}},
+                {'$sort': {'username': 1, 'bucket': -1}},
+                {'$group': {'_id': '$username', 'baseline': {'$first': '$last_values'}}}
+            ])
+            for doc in before:
+                series[doc['_id']]['baseline'] = expand(doc['baseline'])
+        return series
+
+
+def parse_timestamp(value):
+    # Samples are stored as naive UTC, so an offset (or ``Z``) is converted to that
+    ts = datetime.fromisoformat(value)
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def parse_range(start, end, default_days=30):
+    """Parse ISO dates/datetimes; a bare ``end`` date covers that whole day."""
+    if end:
+        end_ts = parse_timestamp(end)
+        if len(end) == 10:
+            end_ts += timedelta(days=1, microseconds=-1)
+    else:
+        end_ts = datetime.utcnow()
+    start_ts = parse_timestamp(start) if start else end_ts - timedelta(days=default_days)
+    return start_ts, end_ts
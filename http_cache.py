@@ -0,0 +1,75 @@
+import gzip
+import hashlib
+from functools import wraps
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/html', 'text/css', 'application/javascript', 'text/plain')
+
+
+def cache_control(policy, etag=True):
+    """Apply ``policy`` as Cache-Control and a content-hash ETag to a view.
+
+    The ETag is derived from the response body, so anything that changes
+    the payload (including a user's solved flags) changes the ETag. A
+    matching If-None-Match on GET or HEAD returns 304 with no body.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            # Handlers report upstream failures as 200s with an error status; never cache those
+            if response.is_json and (response.get_json(silent=True) or {}).get('status') == 'error':
+                return response
+
+            response.headers['Cache-Control'] = policy
+            response.vary.update(['Cookie', 'x-api-key'])
+            if etag and request.method in ('GET', 'HEAD'):
+                # Weak, because compression re-encodes the same representation
+                response.set_etag(hashlib.blake2b(response.get_data(), digest_size=16).hexdigest(), weak=True)
+                response.make_conditional(request)
+            return response
+        return decorated_function
+    return decorator
+
+
+def choose_encoding(accept_encodings):
+    if brotli is not None and 'br' in accept_encodings:
+        return 'br'
+    if 'gzip' in accept_encodings:
+        return 'gzip'
+    return None
+
+
+def compress_response(response, min_size=1024, gzip_level=6, brotli_quality=5):
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    if encoding == 'br':
+        data = brotli.compress(data, quality=brotli_quality)
+    else:
+        data = gzip.compress(data, compresslevel=gzip_level)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
@@ -0,0 +1,163 @@
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+
+from history import expand, extract_values
+
+# Board name -> (value key from history.extract_values, whether higher is better)
+BOARDS = {
+    'total': ('a', True),
+    'hard': ('h', True),
+    'ranking': ('r', False)
+}
+
+
+def score_key(values, key, higher_is_better):
+    value = values.get(key)
+    if value is None:
+        # Users without a value sort after everyone who has one
+        return float('inf')
+    return -value if higher_is_better else value
+
+
+class Leaderboard:
+    """Ranked boards over every user whose LeetCode profile has been refreshed.
+
+    Latest values per user live in ``collection`` (``{'_id': username,
+    'values': {...}, 'updated_at': ts}``); each process keeps a sorted
+    ``(score, username)`` list per board. Top-K and neighbour queries are
+    slices of it and a user's rank is a binary search, so no query scans
+    the cohort. Values recorded in this process are applied immediately;
+    :meth:`reload_changed` picks up those recorded by other workers.
+    Writers stamp ``updated_at`` before their write lands, so each reload
+    re-reads ``overlap`` seconds before the newest stamp it has seen.
+
+    Ties share a rank (1, 2, 2, 4) and are listed by username.
+    """
+
+    def __init__(self, collection, overlap=30):
+        self.collection = collection
+        self.overlap = timedelta(seconds=overlap)
+        self.values = {}
+        self.keys = {board: [] for board in BOARDS}
+        self.last_updated = None
+        self.loaded = False
+        self._lock = threading.RLock()
+
+    def ensure_indexes(self):
+        self.collection.create_index('updated_at')
+
+    def __len__(self):
+        self.ensure_loaded()
+        return len(self.values)
+
+    def _apply(self, username, values):
+        previous = self.values.get(username)
+        if previous == values:
+            return False
+        for board, (key, higher_is_better) in BOARDS.items():
+            keys = self.keys[board]
+            if previous is not None:
+                old = (score_key(previous, key, higher_is_better), username)
+                del keys[bisect_left(keys, old)]
+            insort(keys, (score_key(values, key, higher_is_better), username))
+        self.values[username] = values
+        return True
+
+    def _apply_docs(self, docs):
+        for doc in docs:
+            self._apply(doc['_id'], doc['values'])
+            if self.last_updated is None or doc['updated_at'] > self.last_updated:
+                self.last_updated = doc['updated_at']
+
+    def load(self):
+        docs = list(self.collection.find({}))
+        with self._lock:
+            self.values = {}
+            self.keys = {board: [] for board in BOARDS}
+            self.last_updated = None
+            # Sorting once is much cheaper than thousands of inserts
+            for doc in docs:
+                self.values[doc['_id']] = doc['values']
+                if self.last_updated is None or doc['updated_at'] > self.last_updated:
+                    self.last_updated = doc['updated_at']
+            for board, (key, higher_is_better) in BOARDS.items():
+                self.keys[board] = sorted(
+                    (score_key(values, key, higher_is_better), username) for username, values in self.values.items()
+                )
+            self.loaded = True
+        return len(docs)
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load()
+
+    def reload_changed(self):
+        """Apply users updated since the last load or reload; returns how many documents were read."""
+        if not self.loaded or self.last_updated is None:
+            return self.load()
+        # A write stamped before the newest one seen may land after it; unchanged values apply as no-ops
+        docs = list(self.collection.find({'updated_at': {'$gte': self.last_updated - self.overlap}}))
+        with self._lock:
+            self._apply_docs(docs)
+        return len(docs)
+
+    def record(self, username, values, ts=None):
+        """Store a user's latest values; returns whether their entry changed in this process."""
+        ts = ts or datetime.utcnow()
+        with self._lock:
+            if self.values.get(username) == values:
+                return False
+        self.collection.update_one(
+            {'_id': username},
+            {'$set': {'values': values, 'updated_at': ts}},
+            upsert=True
+        )
+        with self._lock:
+            return self._apply(username, values)
+
+    def record_profile(self, username, profile_data, ts=None):
+        return self.record(username, extract_values(profile_data), ts)
+
+    def _entry(self, username, rank):
+        return dict(expand(self.values[username]), username=username, rank=rank)
+
+    def _rank_at(self, board, index):
+        # Competition rank: one more than the number of users strictly ahead
+        keys = self.keys[board]
+        return bisect_left(keys, (keys[index][0],)) + 1
+
+    def top(self, board, limit=10, offset=0):
+        self.ensure_loaded()
+        with self._lock:
+            keys = self.keys[board]
+            return [
+                self._entry(username, self._rank_at(board, i))
+                for i, (_, username) in enumerate(keys[offset:offset + limit], offset)
+            ]
+
+    def position(self, board, username, neighbours=5):
+        """The user's entry plus up to ``neighbours`` users either side, or None if untracked."""
+        self.ensure_loaded()
+        key, higher_is_better = BOARDS[board]
+        with self._lock:
+            values = self.values.get(username)
+            if values is None:
+                return None
+            keys = self.keys[board]
+            index = bisect_left(keys, (score_key(values, key, higher_is_better), username))
+            start = max(0, index - neighbours)
+            return {
+                'entry': self._entry(username, self._rank_at(board, index)),
+                'above': [
+                    self._entry(name, self._rank_at(board, i))
+                    for i, (_, name) in enumerate(keys[start:index], start)
+                ],
+                'below': [
+                    self._entry(name, self._rank_at(board, i))
+                    for i, (_, name) in enumerate(keys[index + 1:index + 1 + neighbours], index + 1)
+                ],
+                'total': len(keys)
+            }
@@ -0,0 +1,271 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import CACHE_LOOKUPS, CIRCUIT_OPEN, UPSTREAM_IN_FLIGHT, UPSTREAM_LATENCY, UPSTREAM_REQUESTS
+from resilience import CircuitBreaker, CircuitOpenError, RateLimitedError, UpstreamUnavailableError
+
+DEFAULT_HEADERS = {
+    'Content-Type': 'application/json',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+USER_PROFILE_QUERY = """
+query getUserProfile($username: String!) {
+  matchedUser(username: $username) {
+    profile {
+      ranking
+      reputation
+      starRating
+    }
+    submitStats: submitStatsGlobal {
+      acSubmissionNum {
+        difficulty
+        count
+        submissions
+      }
+    }
+  }
+}
+"""
+
+# Upstream statuses worth retrying with backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def make_session(pool_size=10, retries=2, backoff_factor=0.5, retry_after_max=5):
+    """Build a keep-alive session whose connection pool is shared by all threads.
+
+    A ``Retry-After`` longer than ``retry_after_max`` seconds is cut short
+    rather than slept through inside the request; throttling that lasts
+    longer is the circuit breaker's to handle.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'POST']),
+        respect_retry_after_header=True,
+        retry_after_max=retry_after_max,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class UpstreamHTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f'HTTP Error: {status_code}')
+        self.status_code = status_code
+
+
+class UpstreamThrottledError(UpstreamHTTPError, UpstreamUnavailableError):
+    """LeetCode still answered 429 or 5xx once retries ran out; ``retry_after`` is its hint, in seconds."""
+
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(status_code)
+        self.retry_after = retry_after
+
+
+class UpstreamTimeoutError(UpstreamUnavailableError):
+    """LeetCode timed out or couldn't be reached."""
+
+
+def parse_retry_after(value):
+    # Only the delay-seconds form; an HTTP date falls back to the caller's default
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class ResponseCache:
+    """Bounded LRU cache whose entries expire after a per-entry TTL.
+
+    A ``name`` also reports hits and misses to ``/metrics``.
+    """
+
+    def __init__(self, maxsize=256, name=None):
+        self.maxsize = maxsize
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return ``(hit, value)`` for ``key``."""
+        with self._lock:
+            hit, value = self._lookup(key)
+        if self.name:
+            CACHE_LOOKUPS.labels(self.name, 'hit' if hit else 'miss').inc()
+        return hit, value
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+            self.expirations += 1
+        self.misses += 1
+        return False, None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class LeetCodeClient:
+    """Shared GraphQL client for LeetCode.
+
+    Concurrent calls for the same ``(query, variables)`` share a single
+    upstream request. Nothing is cached here: profiles and the catalog are
+    kept in MongoDB by their stores.
+
+    Upstream calls go through an optional shared ``rate_limiter`` and a
+    circuit ``breaker``; while the circuit is open calls fail fast with
+    :class:`CircuitOpenError` instead of reaching LeetCode. Throttling,
+    server errors and timeouts that outlast the session's retries raise
+    :class:`UpstreamThrottledError` or :class:`UpstreamTimeoutError`, so
+    callers handle every kind of unavailability as
+    :class:`UpstreamUnavailableError`.
+    """
+
+    def __init__(self, graphql_url, session=None, timeout=(3.05, 10), rate_limiter=None, breaker=None):
+        self.graphql_url = graphql_url
+        self.coalesced = 0
+        self.session = session or make_session()
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker or CircuitBreaker()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def query(self, query, variables=None):
+        key = (query, json.dumps(variables or {}, sort_keys=True))
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            data = self._call(query, variables)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _call(self, query, variables):
+        if not self.breaker.allow():
+            UPSTREAM_REQUESTS.labels('circuit_open').inc()
+            raise CircuitOpenError('LeetCode circuit is open')
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+        except RateLimitedError:
+            self.breaker.cancel()
+            UPSTREAM_REQUESTS.labels('rate_limited').inc()
+            raise
+
+        outcome = 'ok'
+        start = time.perf_counter()
+        UPSTREAM_IN_FLIGHT.inc()
+        try:
+            data = self._post(query, variables)
+        except UpstreamHTTPError as e:
+            outcome = 'http_error'
+            # Only throttling and server errors say upstream is unhealthy
+            if e.status_code in RETRY_STATUSES:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        except (requests.Timeout, requests.ConnectionError) as e:
+            outcome = 'timeout' if isinstance(e, requests.Timeout) else 'error'
+            self.breaker.record_failure()
+            raise UpstreamTimeoutError(f'LeetCode request failed: {e}') from e
+        except Exception:
+            outcome = 'error'
+            self.breaker.record_failure()
+            raise
+        else:
+            self.breaker.record_success()
+            return data
+        finally:
+            UPSTREAM_IN_FLIGHT.dec()
+            UPSTREAM_LATENCY.labels(outcome).observe(time.perf_counter() - start)
+            UPSTREAM_REQUESTS.labels(outcome).inc()
+            CIRCUIT_OPEN.set(self.breaker.state == 'open')
+
+    def _post(self, query, variables):
+        response = self.session.post(
+            self.graphql_url,
+            json={'query': query, 'variables': variables or {}},
+            timeout=self.timeout
+        )
+        if response.status_code in RETRY_STATUSES:
+            raise UpstreamThrottledError(response.status_code, parse_retry_after(response.headers.get('Retry-After')))
+        if not response.ok:
+            raise UpstreamHTTPError(response.status_code)
+        return response.json()
+
+    def stats(self):
+        return {
+            'coalesced': self.coalesced,
+            'breaker': self.breaker.stats(),
+            'rate_limiter': self.rate_limiter.stats() if self.rate_limiter is not None else None
+        }
@@ -0,0 +1,152 @@
+"""Prometheus metrics for the app, the LeetCode client and MongoDB.
+
+Under gunicorn each worker writes its samples to files in
+``PROMETHEUS_MULTIPROC_DIR`` (set up in ``gunicorn.conf.py``), and
+``/metrics`` merges them, so any worker can answer a scrape. Without that
+variable the metrics are per-process, which is what ``python app.py`` wants.
+"""
+import os
+import time
+
+from flask import g, request, template_rendered, before_render_template
+from flask.json.provider import DefaultJSONProvider
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+from pymongo import monitoring
+
+# Upstream and request latencies span milliseconds to the upstream timeout
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Mongo commands, renders and serialization are mostly sub-millisecond
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+
+# prometheus_client picks its storage when the metrics below are created, so decide once here
+MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to handle a request, by endpoint',
+    ['method', 'endpoint'], buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter('http_requests_total', 'Requests handled', ['method', 'endpoint', 'status'])
+REQUESTS_IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests being handled', multiprocess_mode='livesum')
+
+UPSTREAM_LATENCY = Histogram(
+    'leetcode_request_duration_seconds', 'Time for a LeetCode GraphQL call',
+    ['outcome'], buckets=LATENCY_BUCKETS
+)
+UPSTREAM_REQUESTS = Counter(
+    'leetcode_requests_total',
+    'LeetCode calls by outcome (ok, http_error, timeout, error, rate_limited, circuit_open)',
+    ['outcome']
+)
+UPSTREAM_IN_FLIGHT = Gauge('leetcode_requests_in_flight', 'LeetCode calls awaiting a response', multiprocess_mode='livesum')
+CIRCUIT_OPEN = Gauge('leetcode_circuit_open', 'Whether a worker has its LeetCode circuit open', multiprocess_mode='livemax')
+
+MONGO_LATENCY = Histogram(
+    'mongodb_command_duration_seconds', 'Time for a MongoDB command',
+    ['command'], buckets=FAST_BUCKETS
+)
+MONGO_FAILURES = Counter('mongodb_command_failures_total', 'Failed MongoDB commands', ['command'])
+
+CACHE_LOOKUPS = Counter('cache_lookups_total', 'In-process cache lookups', ['cache', 'result'])
+
+USER_LOADER_LATENCY = Histogram(
+    'user_loader_duration_seconds', 'Time for Flask-Login to load the user, by source',
+    ['source'], buckets=FAST_BUCKETS
+)
+TEMPLATE_RENDER_LATENCY = Histogram(
+    'template_render_duration_seconds', 'Time to render a template',
+    ['template'], buckets=FAST_BUCKETS
+)
+JSON_SERIALIZE_LATENCY = Histogram(
+    'json_serialize_duration_seconds', 'Time to serialize a JSON response body', buckets=FAST_BUCKETS
+)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every command the driver sends; pass to ``MongoClient(event_listeners=...)``."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_LATENCY.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_LATENCY.labels(event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_FAILURES.labels(event.command_name).inc()
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            JSON_SERIALIZE_LATENCY.observe(time.perf_counter() - start)
+
+
+def init_app(app, profiler=None):
+    """Time every request of ``app``; call before registering other request hooks.
+
+    With a :class:`profiling.SlowRequestProfiler`, requests slower than its
+    threshold also get their sampled stacks written out.
+    """
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        if profiler is not None:
+            profiler.start_request()
+
+    @app.after_request
+    def record_request(response):
+        if 'metrics_start' in g:
+            duration = time.perf_counter() - g.metrics_start
+            # Endpoint names, not paths, so unmatched URLs can't blow up label cardinality
+            endpoint = request.endpoint or 'unmatched'
+            REQUEST_LATENCY.labels(request.method, endpoint).observe(duration)
+            REQUESTS.labels(request.method, endpoint, response.status_code).inc()
+            if profiler is not None:
+                profiler.finish_request(duration, f'{request.method} {request.path}')
+            g.metrics_recorded = True
+        return response
+
+    @app.teardown_request
+    def finish_request(exc):
+        if 'metrics_start' not in g:
+            return
+        REQUESTS_IN_FLIGHT.dec()
+        if profiler is not None and 'metrics_recorded' not in g:
+            # Unhandled exception: after_request never ran
+            profiler.discard_request()
+
+    def start_render(sender, template, context, **extra):
+        g.setdefault('template_starts', {})[template.name] = time.perf_counter()
+
+    def finish_render(sender, template, context, **extra):
+        start = g.get('template_starts', {}).pop(template.name, None)
+        if start is not None:
+            TEMPLATE_RENDER_LATENCY.labels(template.name).observe(time.perf_counter() - start)
+
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(finish_render, app, weak=False)
+
+
+def render_latest():
+    """Return ``(body, content_type)`` for a scrape, merging all workers when multi-process."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
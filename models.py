@@ -1,7 +1,11 @@
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from array import array
 from datetime import datetime
 from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+from versions import from_version, to_version
 
 class User(UserMixin):
     def __init__(self, username, email, password=None, _id=None):
@@ -38,25 +42,47 @@ class User(UserMixin):
         }
 
 class SolvedProblem:
-    def __init__(self, user_id, problem_id, solved=False, _id=None):
+    __slots__ = ('user_id', 'problem_id', 'solved', '_id', 'created_at', 'updated_at')
+
+    def __init__(self, user_id, problem_id, solved=False, _id=None, created_at=None, updated_at=None):
         self.user_id = user_id
         self.problem_id = problem_id
         self.solved = solved
         self._id = _id
-        self.created_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
+        # A new row gets one timestamp for both
+        if created_at is None:
+            created_at = updated_at or datetime.utcnow()
+        self.created_at = created_at
+        self.updated_at = updated_at or created_at
 
     @staticmethod
     def from_dict(data):
-        problem = SolvedProblem(
-            user_id=data['user_id'],
-            problem_id=data['problem_id'],
-            solved=data['solved'],
-            _id=data['_id']
+        return SolvedProblem(
+            data['user_id'],
+            data['problem_id'],
+            data['solved'],
+            data['_id'],
+            data['created_at'],
+            data['updated_at']
+        )
+
+    @staticmethod
+    def set_solved(solved):
+        # Update document for an upsert on (user_id, problem_id)
+        now = datetime.utcnow()
+        return {
+            '$set': {'solved': solved, 'updated_at': now},
+            '$setOnInsert': {'created_at': now}
+        }
+
+    @staticmethod
+    def upsert(user_id, problem_id, solved):
+        # Create or update the user's row for this problem in one atomic write
+        return UpdateOne(
+            {'user_id': user_id, 'problem_id': problem_id},
+            SolvedProblem.set_solved(solved),
+            upsert=True
         )
-        problem.created_at = data['created_at']
-        problem.updated_at = data['updated_at']
-        return problem
 
     def to_dict(self):
         return {
@@ -65,4 +91,79 @@ class SolvedProblem:
             'solved': self.solved,
             'created_at': self.created_at,
             'updated_at': self.updated_at
-        } 
\ No newline at end of file
+        } 
+
+class SolvedRows:
+    """Solved rows held column by column, for paths that handle thousands at once.
+
+    Instead of a dict or :class:`SolvedProblem` per row, problem ids sit in
+    a list, solved flags in a ``bytearray`` and timestamps in ``array('q')``
+    columns as milliseconds since the epoch (the versions ``/sync`` hands
+    out; 0 when a document didn't have one). User ids are shared between a
+    user's rows. :meth:`from_docs` fills the columns straight from a cursor,
+    so a projected query never builds an object per row.
+    """
+
+    __slots__ = ('user_ids', 'problem_ids', 'solved', 'created_at', 'updated_at')
+
+    def __init__(self):
+        self.user_ids = []
+        self.problem_ids = []
+        self.solved = bytearray()
+        self.created_at = array('q')
+        self.updated_at = array('q')
+
+    def __len__(self):
+        return len(self.problem_ids)
+
+    def __getitem__(self, index):
+        return SolvedProblem(
+            self.user_ids[index],
+            self.problem_ids[index],
+            bool(self.solved[index]),
+            created_at=from_version(self.created_at[index]),
+            updated_at=from_version(self.updated_at[index])
+        )
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    @classmethod
+    def from_docs(cls, docs):
+        """Columns for any iterable of solved_problems documents, e.g. a cursor."""
+        rows = cls()
+        # Bound once, as this runs per row
+        add_user, add_problem = rows.user_ids.append, rows.problem_ids.append
+        add_solved, add_created, add_updated = rows.solved.append, rows.created_at.append, rows.updated_at.append
+        users = {}
+        for doc in docs:
+            user_id = doc.get('user_id')
+            add_user(users.setdefault(user_id, user_id))
+            add_problem(doc['problem_id'])
+            add_solved(1 if doc.get('solved') else 0)
+            add_created(to_version(doc.get('created_at')))
+            add_updated(to_version(doc.get('updated_at')))
+        return rows
+
+    def to_docs(self):
+        """Yield one document per row, as ``insert_many`` takes them."""
+        for user_id, problem_id, solved, created_at, updated_at in zip(
+                self.user_ids, self.problem_ids, self.solved, self.created_at, self.updated_at):
+            yield {
+                'user_id': user_id,
+                'problem_id': problem_id,
+                'solved': bool(solved),
+                'created_at': from_version(created_at),
+                'updated_at': from_version(updated_at)
+            }
+
+    def split(self):
+        """Return ``(solved_ids, unsolved_ids)``."""
+        solved, unsolved = [], []
+        for problem_id, flag in zip(self.problem_ids, self.solved):
+            (solved if flag else unsolved).append(problem_id)
+        return solved, unsolved
+
+    def version(self):
+        """The newest ``updated_at`` as a version, 0 when empty."""
+        return max(self.updated_at, default=0)
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from leetcode_client import USER_PROFILE_QUERY
+
+
+def is_valid_profile(data):
+    return 'errors' not in data and bool((data.get('data') or {}).get('matchedUser'))
+
+
+class ProfileStore:
+    """Last known LeetCode profile per username, served stale-while-revalidate.
+
+    Each stored profile doubles as a watch entry: usernames looked up within
+    ``watch_days`` are refreshed by :meth:`refresh_watched`, so ``get``
+    normally answers from the ``user_profiles`` collection and only goes
+    upstream for usernames it has never seen.
+    """
+
+    def __init__(self, collection, client, executor, ttl=900, watch_days=7, history=None, leaderboard=None):
+        self.collection = collection
+        self.client = client
+        self.executor = executor
+        self.ttl = ttl
+        self.watch_days = watch_days
+        self.history = history
+        self.leaderboard = leaderboard
+
+    def get(self, username):
+        doc = self.collection.find_one({'_id': username})
+        if doc is None:
+            return self.refresh(username)
+
+        now = datetime.utcnow()
+        if now - doc['refreshed_at'] > timedelta(seconds=self.ttl):
+            # Serve what we have; the refresh lands for the next caller
+            self.executor.submit(self.refresh, username)
+        if now - doc.get('last_requested_at', doc['refreshed_at']) > timedelta(hours=1):
+            self.collection.update_one({'_id': username}, {'$set': {'last_requested_at': now}})
+        return doc['data']
+
+    def refresh(self, username):
+        data = self.client.query(USER_PROFILE_QUERY, {'username': username})
+        # Only real profiles are stored; errors and unknown users go back to the caller as-is
+        if is_valid_profile(data):
+            now = datetime.utcnow()
+            self.collection.update_one(
+                {'_id': username},
+                {
+                    '$set': {'data': data, 'refreshed_at': now},
+                    '$setOnInsert': {'last_requested_at': now}
+                },
+                upsert=True
+            )
+            if self.history is not None:
+                self.history.record_profile(username, data, now)
+            if self.leaderboard is not None:
+                self.leaderboard.record_profile(username, data, now)
+        return data
+
+    def watched_usernames(self):
+        cutoff = datetime.utcnow() - timedelta(days=self.watch_days)
+        stale_before = datetime.utcnow() - timedelta(seconds=self.ttl)
+        return [
+            doc['_id'] for doc in self.collection.find(
+                {'last_requested_at': {'$gte': cutoff}, 'refreshed_at': {'$lt': stale_before}},
+                {'_id': 1}
+            )
+        ]
+
+    def refresh_watched(self):
+        usernames = self.watched_usernames()
+        # Bounded by the executor's worker count
+        failed = 0
+        for future in [self.executor.submit(self.refresh, username) for username in usernames]:
+            try:
+                future.result()
+            except Exception:
+                failed += 1
+        return len(usernames) - failed
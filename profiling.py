@@ -0,0 +1,120 @@
+import _thread
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def fold_stack(frame):
+    """Render a frame's call stack root-first, in the collapsed format flamegraph tools read."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def gevent_patched():
+    # gunicorn's gevent worker patches threading before it imports the app
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('threading')
+
+
+class SlowRequestProfiler:
+    """Samples the stacks of in-flight requests and keeps those of slow ones.
+
+    A background thread records each request thread's stack every
+    ``interval`` seconds. When a request finishes after ``threshold``
+    seconds or more, its samples are written to ``output_dir`` as collapsed
+    stacks (one ``frame;frame;frame count`` line each), ready for
+    ``flamegraph.pl`` or speedscope; faster requests are dropped.
+
+    Under the sync and gthread gunicorn workers each request has its own
+    thread. Under gevent, where every request is a greenlet on one thread,
+    requests are tracked by greenlet: a suspended one is sampled from its
+    ``gr_frame``, the running one from its thread's frame. The sampler is a
+    real OS thread either way, so it keeps sampling while a greenlet holds
+    the CPU.
+    """
+
+    def __init__(self, threshold=1.0, interval=0.005, output_dir='profiles'):
+        self.threshold = threshold
+        self.interval = interval
+        self.output_dir = output_dir
+        self.dumped = 0
+        self.greenlets = gevent_patched()
+        if self.greenlets:
+            # gevent's replacements would make the sampler a greenlet, which only runs when requests yield
+            from gevent.monkey import get_original
+            self._start_thread, allocate_lock, self._get_ident = get_original(
+                '_thread', ['start_new_thread', 'allocate_lock', 'get_ident']
+            )
+            self._sleep = get_original('time', 'sleep')
+        else:
+            self._start_thread, allocate_lock, self._get_ident = (
+                _thread.start_new_thread, _thread.allocate_lock, _thread.get_ident
+            )
+            self._sleep = time.sleep
+        self._active = {}
+        self._lock = allocate_lock()
+        self._started = False
+
+    def _task(self):
+        if self.greenlets:
+            from greenlet import getcurrent
+            return getcurrent()
+        return self._get_ident()
+
+    def start_request(self):
+        with self._lock:
+            self._active[self._task()] = (self._get_ident(), Counter())
+            if not self._started:
+                self._start_thread(self._run, ())
+                self._started = True
+
+    def discard_request(self):
+        with self._lock:
+            entry = self._active.pop(self._task(), None)
+        return entry[1] if entry else None
+
+    def finish_request(self, duration, name):
+        samples = self.discard_request()
+        if samples and duration >= self.threshold:
+            try:
+                self._dump(samples, duration, name)
+            except OSError as e:
+                logger.warning('Could not write profile for %s: %s', name, e)
+
+    def _dump(self, samples, duration, name):
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = ''.join(c if c.isalnum() else '_' for c in name).strip('_')[:60]
+        path = os.path.join(
+            self.output_dir,
+            f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{os.getpid()}-{slug}.folded"
+        )
+        with open(path, 'w') as f:
+            f.write(f'# {name} took {duration * 1000:.1f} ms, {sum(samples.values())} samples\n')
+            for stack, count in samples.most_common():
+                f.write(f'{stack} {count}\n')
+        self.dumped += 1
+        logger.info('Slow request %s (%.0f ms) profiled to %s', name, duration * 1000, path)
+
+    def _run(self):
+        while True:
+            self._sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for task, (ident, samples) in self._active.items():
+                    # Only a suspended greenlet has a frame of its own; a running one is on its thread
+                    frame = task.gr_frame if self.greenlets else None
+                    if frame is None:
+                        frame = frames.get(ident)
+                    if frame is not None:
+                        samples[fold_stack(frame)] += 1
@@ -0,0 +1,363 @@
+import logging
+import threading
+from datetime import datetime
+from itertools import islice
+
+from pymongo import UpdateOne
+
+from models import SolvedProblem
+
+logger = logging.getLogger(__name__)
+
+DIFFICULTIES = ('Easy', 'Medium', 'Hard')
+
+# Users compared per summaries lookup while reconciling
+RECONCILE_BATCH_SIZE = 500
+
+
+def empty_counts():
+    return dict.fromkeys(DIFFICULTIES, 0)
+
+
+class ProgressStore:
+    """Per-user solved counts by difficulty, kept up to date as problems are toggled.
+
+    Each user has one document in ``collection``, ``{'_id': user_id,
+    'counts': {'Easy': n, 'Medium': n, 'Hard': n}}``. Toggles change it by
+    ``$inc`` only when a problem's solved state actually flips, so reading
+    a user's progress is a single ``_id`` lookup. The counter update is a
+    separate write from the toggle itself; :meth:`reconcile` recounts from
+    ``solved_problems`` and repairs whatever drifted.
+
+    Problems missing from the catalog (e.g. removed upstream) aren't counted.
+    """
+
+    def __init__(self, collection, solved_collection, catalog):
+        self.collection = collection
+        self.solved = solved_collection
+        self.catalog = catalog
+        self.last_report = None
+
+    def difficulty_of(self, problem_id):
+        table = self.catalog.table
+        row = table.row_of.get(problem_id)
+        return table.rows[row]['difficulty'] if row is not None else None
+
+    def toggle(self, user_id, problem_id, solved):
+        """Set one problem's solved state; returns whether it changed."""
+        # A fresh worker's catalog may not be loaded yet, and a flip it can't place would go uncounted
+        self.catalog.ensure_loaded()
+        before = self.solved.find_one_and_update(
+            {'user_id': user_id, 'problem_id': problem_id},
+            SolvedProblem.set_solved(solved),
+            projection={'solved': 1, '_id': 0},
+            upsert=True
+        )
+        changed = bool(before and before.get('solved')) != solved
+        if changed:
+            self._increment(user_id, {self.difficulty_of(problem_id): 1 if solved else -1})
+        return changed
+
+    def toggle_many(self, user_id, problem_ids, solved):
+        """Set the solved state of many problems; returns how many rows changed or were created."""
+        self.catalog.ensure_loaded()
+        groups = {}
+        for problem_id in dict.fromkeys(problem_ids):
+            groups.setdefault(self.difficulty_of(problem_id), []).append(problem_id)
+
+        # One bulk write per difficulty, since its result only has totals. Each
+        # problem gets a flip that only matches the opposite state, and an insert
+        # for a missing row that leaves existing ones alone, so the counts below
+        # are exact even with concurrent toggles.
+        now = datetime.utcnow()
+        updated = 0
+        deltas = {}
+        for difficulty, ids in groups.items():
+            operations = []
+            for problem_id in ids:
+                key = {'user_id': user_id, 'problem_id': problem_id}
+                operations.append(UpdateOne(
+                    dict(key, solved={'$ne': solved}),
+                    {'$set': {'solved': solved, 'updated_at': now}}
+                ))
+                operations.append(UpdateOne(
+                    key,
+                    {'$setOnInsert': {'solved': solved, 'created_at': now, 'updated_at': now}},
+                    upsert=True
+                ))
+            result = self.solved.bulk_write(operations, ordered=False)
+            updated += result.modified_count + result.upserted_count
+            if solved:
+                deltas[difficulty] = result.modified_count + result.upserted_count
+            else:
+                deltas[difficulty] = -result.modified_count
+        self._increment(user_id, deltas)
+        return updated
+
+    def _increment(self, user_id, deltas):
+        inc = {f'counts.{difficulty}': n for difficulty, n in deltas.items() if difficulty in DIFFICULTIES and n}
+        if inc:
+            self.collection.update_one(
+                {'_id': user_id},
+                {'$inc': inc, '$set': {'updated_at': datetime.utcnow()}},
+                upsert=True
+            )
+
+    def get(self, user_id):
+        """Solved, total and percentage per difficulty, plus ``All``."""
+        doc = self.collection.find_one({'_id': user_id}, {'counts': 1})
+        counts = dict(empty_counts(), **(doc.get('counts', {}) if doc else self.backfill(user_id)))
+        totals = self.catalog.counts()['byDifficulty']
+
+        progress = {}
+        for name in DIFFICULTIES + ('All',):
+            solved = sum(counts.values()) if name == 'All' else counts[name]
+            total = sum(totals.values()) if name == 'All' else totals.get(name, 0)
+            progress[name] = {
+                'solved': solved,
+                'total': total,
+                'percentage': round(100.0 * solved / total, 1) if total else 0.0
+            }
+        return progress
+
+    def count(self, user_id):
+        """Recount one user's solved problems by difficulty from ``solved_problems``."""
+        self.catalog.ensure_loaded()
+        counts = empty_counts()
+        for doc in self.solved.find({'user_id': user_id, 'solved': True}, {'problem_id': 1, '_id': 0}):
+            difficulty = self.difficulty_of(doc['problem_id'])
+            if difficulty in counts:
+                counts[difficulty] += 1
+        return counts
+
+    def backfill(self, user_id):
+        """Counts for a user without a summary yet (e.g. solved before counters existed), stored for next time.
+
+        Inserted only if still missing, so a toggle that created the
+        summary meanwhile wins; :meth:`reconcile` repairs any difference.
+        """
+        counts = self.count(user_id)
+        self.collection.update_one(
+            {'_id': user_id},
+            {'$setOnInsert': {'counts': counts, 'updated_at': datetime.utcnow()}},
+            upsert=True
+        )
+        return counts
+
+    def expected_counts(self):
+        """Yield ``(user_id, counts)`` recounted from one pass over solved rows, by user."""
+        user_id, counts = None, None
+        cursor = self.solved.find(
+            {'solved': True},
+            {'user_id': 1, 'problem_id': 1, '_id': 0}
+        ).sort('user_id', 1)
+        for doc in cursor:
+            if doc['user_id'] != user_id:
+                if user_id is not None:
+                    yield user_id, counts
+                user_id, counts = doc['user_id'], empty_counts()
+            difficulty = self.difficulty_of(doc['problem_id'])
+            if difficulty in counts:
+                counts[difficulty] += 1
+        if user_id is not None:
+            yield user_id, counts
+
+    def remove_duplicate_rows(self):
+        """Keep only the latest row per (user, problem) in ``solved_problems``; returns how many were removed.
+
+        Rows written before the unique index existed may repeat a pair,
+        which keeps the index from being built. Affected users' summaries
+        are dropped, so :meth:`get` recounts them from the surviving rows.
+        """
+        pipeline = [
+            {'$sort': {'updated_at': -1}},
+            {'$group': {
+                '_id': {'user_id': '$user_id', 'problem_id': '$problem_id'},
+                'ids': {'$push': '$_id'},
+                'count': {'$sum': 1}
+            }},
+            {'$match': {'count': {'$gt': 1}}}
+        ]
+        removed = 0
+        users = set()
+        for group in self.solved.aggregate(pipeline, allowDiskUse=True):
+            removed += self.solved.delete_many({'_id': {'$in': group['ids'][1:]}}).deleted_count
+            users.add(group['_id']['user_id'])
+        if users:
+            self.collection.delete_many({'_id': {'$in': list(users)}})
+        return removed
+
+    def reconcile(self, fix=True):
+        """Recount every user's progress and report (and by default repair) drift.
+
+        Users whose counts changed after the recount started are skipped;
+        the repair only lands if the stored document is still the one that
+        was compared.
+        """
+        self.catalog.ensure_loaded()
+        started = datetime.utcnow()
+        checked = 0
+        drift = []
+        operations = []
+        seen = set()
+
+        def compare(user_id, expected, stored):
+            stored_counts = dict(empty_counts(), **(stored or {}).get('counts', {}))
+            if stored is not None and stored.get('updated_at') and stored['updated_at'] >= started:
+                return
+            if stored_counts == expected:
+                return
+            drift.append({'user_id': user_id, 'stored': stored_counts, 'expected': expected})
+            if stored is None:
+                operations.append(UpdateOne(
+                    {'_id': user_id},
+                    {'$setOnInsert': {'counts': expected, 'updated_at': started}},
+                    upsert=True
+                ))
+            else:
+                operations.append(UpdateOne(
+                    {'_id': user_id, 'updated_at': stored.get('updated_at')},
+                    {'$set': {'counts': expected, 'updated_at': started}}
+                ))
+
+        recounted = self.expected_counts()
+        while True:
+            batch = list(islice(recounted, RECONCILE_BATCH_SIZE))
+            if not batch:
+                break
+            stored = {
+                doc['_id']: doc for doc in self.collection.find({'_id': {'$in': [user_id for user_id, _ in batch]}})
+            }
+            for user_id, expected in batch:
+                seen.add(user_id)
+                compare(user_id, expected, stored.get(user_id))
+            checked += len(batch)
+
+        # Stored counts for users who no longer have any solved rows
+        for doc in self.collection.find({}):
+            if doc['_id'] not in seen:
+                checked += 1
+                compare(doc['_id'], empty_counts(), doc)
+
+        fixed = 0
+        if fix and operations:
+            result = self.collection.bulk_write(operations, ordered=False)
+            fixed = result.modified_count + result.upserted_count
+
+        report = {
+            'checked': checked,
+            'drifted': len(drift),
+            'fixed': fixed,
+            'examples': drift[:10],
+            'finished_at': datetime.utcnow().isoformat()
+        }
+        if drift:
+            logger.warning('Progress drift for %d of %d users (%d fixed)', len(drift), checked, fixed)
+        self.last_report = report
+        return report
+
+
+class ToggleBuffer:
+    """Holds single toggles in memory and writes them through :meth:`ProgressStore.toggle_many`.
+
+    Rapid toggles coalesce: only each problem's last state per user is
+    kept, and a flush writes a user's problems in one bulk write per state
+    and difficulty, with counts as exact as :meth:`ProgressStore.toggle`.
+    Until then a toggle is only visible in this process, through
+    :meth:`pending`; other workers see it after the flush, and it is lost
+    if the process dies first. Reaching ``max_pending`` problems flushes
+    from :meth:`add`. ``on_flush`` is called with each user written.
+
+    Bulk toggles go through :meth:`toggle_many`, which waits for a running
+    flush and drops pending toggles of the same problems, so an older
+    buffered state never lands after the bulk write.
+    """
+
+    def __init__(self, store, max_pending=10000, on_flush=None):
+        self.store = store
+        self.max_pending = max_pending
+        self.on_flush = on_flush
+        self.added = 0
+        self.written = 0
+        self.failed = 0
+        self._pending = {}
+        # Taken out of _pending by a running flush, still visible to reads
+        self._flushing = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def add(self, user_id, problem_id, solved):
+        with self._lock:
+            states = self._pending.setdefault(user_id, {})
+            if problem_id not in states:
+                self._size += 1
+            states[problem_id] = solved
+            self.added += 1
+            full = self._size >= self.max_pending
+        if full:
+            self.flush()
+
+    def pending(self, user_id):
+        """``{problem_id: solved}`` for this user's toggles not yet written."""
+        with self._lock:
+            states = dict(self._flushing.get(user_id, ()))
+            states.update(self._pending.get(user_id, ()))
+        return states
+
+    def toggle_many(self, user_id, problem_ids, solved):
+        """:meth:`ProgressStore.toggle_many`, ordered after any buffered toggles of the same problems."""
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending.get(user_id, {})
+                for problem_id in problem_ids:
+                    if pending.pop(problem_id, None) is not None:
+                        self._size -= 1
+            return self.store.toggle_many(user_id, problem_ids, solved)
+
+    def flush(self):
+        """Write every pending toggle; returns how many problems were written."""
+        with self._flush_lock:
+            with self._lock:
+                self._flushing, self._pending, self._size = self._pending, {}, 0
+            written = 0
+            for user_id in list(self._flushing):
+                with self._lock:
+                    states = dict(self._flushing[user_id])
+                by_state = {}
+                for problem_id, solved in states.items():
+                    by_state.setdefault(solved, []).append(problem_id)
+                try:
+                    for solved, problem_ids in by_state.items():
+                        self.store.toggle_many(user_id, problem_ids, solved)
+                except Exception as e:
+                    # Not just Mongo errors: a catalog that can't load mustn't drop the users after this one.
+                    # Rewriting the whole user is safe: toggle_many only counts real flips
+                    logger.warning('Could not write buffered toggles for %s, keeping them: %s', user_id, e)
+                    self.failed += len(states)
+                    with self._lock:
+                        requeued = self._pending.setdefault(user_id, {})
+                        for problem_id, solved in states.items():
+                            if problem_id not in requeued:
+                                requeued[problem_id] = solved
+                                self._size += 1
+                else:
+                    written += len(states)
+                    if self.on_flush is not None:
+                        self.on_flush(user_id)
+                finally:
+                    with self._lock:
+                        del self._flushing[user_id]
+            self.written += written
+            return written
+
+    def stats(self):
+        with self._lock:
+            pending = self._size
+        return {
+            'pending': pending,
+            'added': self.added,
+            'written': self.written,
+            'failed': self.failed,
+            'max_pending': self.max_pending
+        }
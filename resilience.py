@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailableError(Exception):
+    pass
+
+
+class RateLimitedError(UpstreamUnavailableError):
+    pass
+
+
+class CircuitOpenError(UpstreamUnavailableError):
+    pass
+
+
+class TokenBucket:
+    """Token-bucket rate limiter whose state lives in one Mongo document.
+
+    Every gunicorn worker (and dyno) shares the same bucket. Refill and
+    take happen in a single atomic pipeline update, using the server clock,
+    so workers can't race each other or disagree about time. If MongoDB is
+    unreachable the limiter lets calls through rather than failing them.
+    """
+
+    def __init__(self, collection, name='leetcode', rate=5.0, capacity=10, max_wait=2.0):
+        self.collection = collection
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.max_wait = max_wait
+        self.granted = 0
+        self.waited = 0
+        self.denied = 0
+        self.errors = 0
+
+    def try_acquire(self):
+        """Take a token if one is available; returns ``(allowed, tokens_left)``."""
+        elapsed = {'$divide': [{'$subtract': ['$$NOW', {'$ifNull': ['$updated_at', '$$NOW']}]}, 1000]}
+        doc = self.collection.find_one_and_update(
+            {'_id': self.name},
+            [
+                {'$set': {
+                    'tokens': {'$min': [
+                        self.capacity,
+                        {'$add': [{'$ifNull': ['$tokens', self.capacity]}, {'$multiply': [elapsed, self.rate]}]}
+                    ]},
+                    'updated_at': '$$NOW'
+                }},
+                {'$set': {'allowed': {'$gte': ['$tokens', 1]}}},
+                {'$set': {'tokens': {'$cond': ['$allowed', {'$subtract': ['$tokens', 1]}, '$tokens']}}}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc['allowed'], doc['tokens']
+
+    def acquire(self):
+        deadline = time.monotonic() + self.max_wait
+        waited = False
+        while True:
+            try:
+                allowed, tokens = self.try_acquire()
+            except PyMongoError as e:
+                self.errors += 1
+                logger.warning('Rate limiter unavailable, letting the call through: %s', e)
+                return
+            if allowed:
+                self.granted += 1
+                if waited:
+                    self.waited += 1
+                return
+            delay = (1 - tokens) / self.rate
+            if time.monotonic() + delay > deadline:
+                self.denied += 1
+                raise RateLimitedError('LeetCode rate limit reached')
+            waited = True
+            time.sleep(delay)
+
+    def stats(self):
+        return {
+            'rate': self.rate,
+            'capacity': self.capacity,
+            'granted': self.granted,
+            'waited': self.waited,
+            'denied': self.denied,
+            'errors': self.errors
+        }
+
+
+class CircuitBreaker:
+    """Stops calling upstream after ``failure_threshold`` consecutive failures.
+
+    After ``reset_timeout`` seconds one probe call is let through
+    (half-open); its outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.opens = 0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open' and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._probing = False
+            if self.state == 'closed':
+                return True
+            if self.state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def cancel(self):
+        """Give back a call allowed by :meth:`allow` that never reached upstream."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.opens += 1
+                self.state = 'open'
+                self.opened_at = self.clock()
+                self._probing = False
+
+    def stats(self):
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'opens': self.opens,
+            'rejected': self.rejected
+        }
@@ -0,0 +1,168 @@
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLock:
+    """Named leases in a Mongo collection, so one process at a time leads a job.
+
+    A lease belongs to its owner until ``expires_at``; the owner extends it
+    each time it runs the job, and anyone may take it over once it lapses.
+    """
+
+    def __init__(self, collection, owner=None):
+        self.collection = collection
+        self.owner = owner or f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+    def acquire(self, name, ttl):
+        now = datetime.utcnow()
+        try:
+            self.collection.find_one_and_update(
+                {'_id': name, '$or': [{'owner': self.owner}, {'expires_at': {'$lt': now}}]},
+                {'$set': {'owner': self.owner, 'expires_at': now + timedelta(seconds=ttl)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return True
+        except DuplicateKeyError:
+            # Someone else holds an unexpired lease, so the upsert collided with it
+            return False
+
+    def release(self, name):
+        self.collection.delete_one({'_id': name, 'owner': self.owner})
+
+
+class Job:
+    def __init__(self, name, func, interval, jitter=0.1, leader_only=False, run_immediately=False,
+                 own_thread=False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.leader_only = leader_only
+        self.own_thread = own_thread
+        self.thread = None
+        self.next_run = time.monotonic() if run_immediately else self._next_time()
+        self.last_run = None
+        self.last_error = None
+        self.runs = 0
+        self.skipped = 0
+
+    def _next_time(self):
+        # Jitter keeps workers that start together from firing in lockstep
+        spread = self.interval * self.jitter
+        return time.monotonic() + self.interval + random.uniform(-spread, spread)
+
+    def schedule_next(self):
+        self.next_run = self._next_time()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def status(self):
+        return {
+            'interval': self.interval,
+            'leader_only': self.leader_only,
+            'running': self.running,
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'last_error': self.last_error,
+            'next_run_in': round(max(0.0, self.next_run - time.monotonic()), 1)
+        }
+
+
+class Scheduler:
+    """Runs periodic jobs on a background thread with jittered intervals.
+
+    Jobs marked ``leader_only`` run in just one process across all gunicorn
+    workers (and dynos), coordinated through :class:`LeaseLock`. Jobs that
+    run for a long time should be added with ``own_thread``, so they don't
+    hold up the others; such a job is skipped while its last run goes on.
+    """
+
+    def __init__(self, leases=None):
+        self.leases = leases
+        self.jobs = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def add_job(self, name, func, interval, jitter=0.1, leader_only=False, run_immediately=False,
+                own_thread=False):
+        if leader_only and self.leases is None:
+            raise ValueError('Leader-only jobs need a lease collection')
+        self.jobs[name] = Job(name, func, interval, jitter, leader_only, run_immediately, own_thread)
+        return self.jobs[name]
+
+    def lease_ttl(self, job):
+        # Lease outlives the interval so a slow run doesn't hand leadership over mid-job
+        return job.interval * 2
+
+    def renew(self, name):
+        """Extend a leader-only job's lease from inside a long run; False once another process holds it."""
+        return self.leases.acquire(name, self.lease_ttl(self.jobs[name]))
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_pending(self):
+        now = time.monotonic()
+        for job in list(self.jobs.values()):
+            if job.next_run <= now:
+                self.run_job(job)
+
+    def run_job(self, job):
+        job.schedule_next()
+        if job.own_thread:
+            if job.running:
+                job.skipped += 1
+                return
+            job.thread = threading.Thread(target=self._execute, args=(job,), name=f'job-{job.name}', daemon=True)
+            job.thread.start()
+        else:
+            self._execute(job)
+
+    def _execute(self, job):
+        try:
+            if job.leader_only and not self.leases.acquire(job.name, self.lease_ttl(job)):
+                job.skipped += 1
+                return
+            job.last_run = datetime.utcnow()
+            job.func()
+            job.runs += 1
+            job.last_error = None
+        except Exception as e:
+            job.last_error = str(e)
+            logger.warning('Scheduled job %s failed: %s', job.name, e)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_pending()
+            if self.jobs:
+                delay = min(job.next_run for job in self.jobs.values()) - time.monotonic()
+            else:
+                delay = 1.0
+            self._stop.wait(max(0.05, min(delay, 60.0)))
+
+    def status(self):
+        return {name: job.status() for name, job in self.jobs.items()}
@@ -0,0 +1,231 @@
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# How much a match in each field counts towards a problem's score
+FIELD_WEIGHTS = {
+    'id': 4.0,
+    'title': 3.0,
+    'tags': 2.0,
+    'slug': 1.0
+}
+EXACT_BOOST = 2.0
+PREFIX_BOOST = 1.0
+FUZZY_BOOST = 0.5
+
+# Caps that keep single-letter prefixes and fuzzy matching cheap
+MAX_PREFIX_TOKENS = 64
+MIN_FUZZY_LENGTH = 3
+MIN_FUZZY_SIMILARITY = 0.4
+# Per-term score maps are memoised until the next update; typeahead
+# queries repeat the same leading terms on every keystroke
+TERM_CACHE_SIZE = 4096
+
+
+# Everything a search reads, swapped in as one object by each update
+IndexState = namedtuple('IndexState', 'postings positions vocab trigrams term_cache')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def trigrams(token):
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def document_fields(question):
+    tags = question.get('topicTags') or []
+    return {
+        'id': [question['questionId'].lower()],
+        'title': tokenize(question['title']),
+        'slug': tokenize(question['titleSlug']),
+        'tags': [token for tag in tags for token in tokenize(f"{tag['name']} {tag['slug']}")]
+    }
+
+
+def document_key(question):
+    # Everything document_fields reads; unchanged keys skip re-tokenizing
+    tags = question.get('topicTags') or []
+    return (question['title'], question['titleSlug'], tuple((tag['name'], tag['slug']) for tag in tags))
+
+
+def patch_vocab(vocab, tri, added, removed):
+    """Copies of the sorted vocabulary and trigram map with ``added`` and ``removed`` tokens applied."""
+    if len(added) + len(removed) > len(vocab) // 8:
+        # A large change (or the first build) is cheaper to redo in one pass
+        vocab = sorted(set(vocab).difference(removed).union(added))
+        tri = {}
+        for token in vocab:
+            for gram in trigrams(token):
+                tri.setdefault(gram, []).append(token)
+        return vocab, tri
+
+    vocab = list(vocab)
+    tri = dict(tri)
+    copied = set()
+    for token in removed:
+        del vocab[bisect_left(vocab, token)]
+        for gram in trigrams(token):
+            if gram not in copied:
+                tri[gram] = list(tri[gram])
+                copied.add(gram)
+            tri[gram].remove(token)
+            if not tri[gram]:
+                del tri[gram]
+    for token in added:
+        insort(vocab, token)
+        for gram in trigrams(token):
+            if gram not in copied:
+                tri[gram] = list(tri.get(gram, ()))
+                copied.add(gram)
+            tri[gram].append(token)
+    return vocab, tri
+
+
+class SearchIndex:
+    """Inverted index over problem IDs, titles, slugs and topic tags.
+
+    Query terms match exactly, by prefix (for typeahead) or, failing both,
+    by trigram similarity (for typos). Every term must match; results are
+    ranked by score and then by catalog position. Updates are incremental
+    and copy-on-write, so searches never see a half-applied change.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._fields = {}
+        self._state = IndexState({}, {}, [], {}, {})
+
+    def __len__(self):
+        return len(self._fields)
+
+    def update(self, questions):
+        """Sync the index with ``questions``, touching only changed problems."""
+        with self._lock:
+            keys = {}
+            positions = {}
+            changed = []
+            for position, q in enumerate(questions):
+                qid = q['questionId']
+                keys[qid] = document_key(q)
+                positions[qid] = position
+                if self._keys.get(qid) != keys[qid]:
+                    changed.append(q)
+            removed = self._keys.keys() - keys.keys()
+
+            state = self._state
+            postings = dict(state.postings)
+            fields = dict(self._fields)
+            copied = set()
+
+            def writable(token):
+                # Copy a posting list the first time this update modifies it
+                if token not in copied:
+                    postings[token] = dict(postings.get(token, {}))
+                    copied.add(token)
+                return postings[token]
+
+            # Only changed problems are tokenized; their old tokens come from the previous fields
+            for qid in removed | {q['questionId'] for q in changed}:
+                for tokens in fields.pop(qid, {}).values():
+                    for token in tokens:
+                        writable(token).pop(qid, None)
+
+            for q in changed:
+                qid = q['questionId']
+                fields[qid] = document_fields(q)
+                for field, tokens in fields[qid].items():
+                    weight = FIELD_WEIGHTS[field]
+                    for token in tokens:
+                        posting = writable(token)
+                        posting[qid] = max(posting.get(qid, 0.0), weight)
+
+            added_tokens, removed_tokens = [], []
+            for token in copied:
+                if not postings[token]:
+                    del postings[token]
+                    if token in state.postings:
+                        removed_tokens.append(token)
+                elif token not in state.postings:
+                    added_tokens.append(token)
+
+            vocab, tri = state.vocab, state.trigrams
+            if added_tokens or removed_tokens:
+                vocab, tri = patch_vocab(vocab, tri, added_tokens, removed_tokens)
+
+            self._keys = keys
+            self._fields = fields
+            self._state = IndexState(postings, positions, vocab, tri, {})
+            return len(copied)
+
+    def search(self, query, limit=None):
+        """Return matching question IDs, best match first."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        state = self._state
+        term_cache = state.term_cache
+        matches = []
+        for term in dict.fromkeys(terms):
+            term_scores = term_cache.get(term)
+            if term_scores is None:
+                term_scores = self._match_term(term, state)
+                if len(term_cache) >= TERM_CACHE_SIZE:
+                    term_cache.clear()
+                term_cache[term] = term_scores
+            if not term_scores:
+                return []
+            matches.append(term_scores)
+
+        # Intersect starting from the most selective term
+        matches.sort(key=len)
+        scores = matches[0]
+        for term_scores in matches[1:]:
+            scores = {qid: score + term_scores[qid] for qid, score in scores.items() if qid in term_scores}
+            if not scores:
+                return []
+
+        # Catalog order first, then a stable sort by score keeps it as the tie-break
+        ranked = sorted(scores, key=state.positions.__getitem__)
+        ranked.sort(key=scores.__getitem__, reverse=True)
+        return ranked[:limit] if limit else ranked
+
+    def _match_term(self, term, state):
+        postings = state.postings
+        scores = {}
+
+        def add(token, boost):
+            for qid, weight in postings.get(token, {}).items():
+                score = weight * boost
+                if score > scores.get(qid, 0.0):
+                    scores[qid] = score
+
+        add(term, EXACT_BOOST)
+
+        vocab = state.vocab
+        index = bisect_left(vocab, term)
+        for token in vocab[index:index + MAX_PREFIX_TOKENS]:
+            if not token.startswith(term):
+                break
+            if token != term:
+                add(token, PREFIX_BOOST)
+
+        if not scores and len(term) >= MIN_FUZZY_LENGTH:
+            grams = trigrams(term)
+            shared = {}
+            for gram in grams:
+                for token in state.trigrams.get(gram, ()):
+                    shared[token] = shared.get(token, 0) + 1
+            for token, count in shared.items():
+                similarity = count / (len(grams) + len(token) + 1 - count)
+                if similarity >= MIN_FUZZY_SIMILARITY:
+                    add(token, FUZZY_BOOST * similarity)
+
+        return scores
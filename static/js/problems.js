@@ -0,0 +1,489 @@
+let currentPage = 1;
+let totalPages = 1;
+let currentSort = { field: 'id', direction: 'asc' };
+let problems = [];
+let currentDifficulty = 'all';
+let currentSearchQuery = '';
+
+// API Configuration
+const API_KEY = document.body.dataset.apiKey;
+const USER_ID = document.body.dataset.userId;
+const PER_PAGE = 50;
+
+// The whole catalog and this user's solved flags are mirrored in IndexedDB
+// and refreshed with /sync deltas, so paging, sorting and search don't touch
+// the network. Without IndexedDB (or if /sync fails) pages come from
+// /scrape-leetcode, with the next one prefetched.
+let catalog = null;
+let solvedIds = new Set();
+let localDb = null;
+let localMeta = null;
+const pageCache = new Map();
+const PAGE_CACHE_SIZE = 20;
+
+// Function to make API requests with API key
+async function makeApiRequest(url, options = {}) {
+    const defaultHeaders = {
+        'x-api-key': API_KEY,
+        'Content-Type': 'application/json'
+    };
+
+    const response = await fetch(url, {
+        ...options,
+        headers: {
+            ...defaultHeaders,
+            ...options.headers
+        }
+    });
+
+    if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.message || 'API request failed');
+    }
+
+    return response.json();
+}
+
+// Server-side sort parameters, for the paging fallback
+const SORT_FIELDS = { id: 'id', difficulty: 'difficulty', acceptance: 'acceptance_rate' };
+
+const DIFFICULTY_ORDER = { Easy: 0, Medium: 1, Hard: 2 };
+const byId = (a, b) => Number(a.id) - Number(b.id);
+const COMPARATORS = {
+  id: byId,
+  difficulty: (a, b) => DIFFICULTY_ORDER[a.difficulty] - DIFFICULTY_ORDER[b.difficulty] || byId(a, b),
+  acceptance: (a, b) => a.acceptance_rate - b.acceptance_rate || byId(a, b)
+};
+
+function problemUrl(problem) {
+  return `https://leetcode.com/problems/${problem.slug}/`;
+}
+
+function idbRequest(request) {
+  return new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+function openLocalStore() {
+  if (!window.indexedDB) {
+    return Promise.reject(new Error('IndexedDB unavailable'));
+  }
+  // One database per user, so solved flags never mix on a shared browser
+  const request = indexedDB.open(`leetcode-scraper-${USER_ID}`, 1);
+  request.onupgradeneeded = () => {
+    request.result.createObjectStore('problems', { keyPath: 'id' });
+    request.result.createObjectStore('meta');
+  };
+  return idbRequest(request);
+}
+
+function writeLocalStore(changes) {
+  const tx = localDb.transaction(['problems', 'meta'], 'readwrite');
+  if (changes) {
+    const store = tx.objectStore('problems');
+    if (changes.full) {
+      store.clear();
+    }
+    changes.rows.forEach(row => store.put(row));
+    changes.removed.forEach(id => store.delete(id));
+  }
+  tx.objectStore('meta').put(localMeta, 'state');
+  return new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve();
+    tx.onerror = () => reject(tx.error);
+  });
+}
+
+function showCounts(counts) {
+  document.getElementById('total-problems').textContent = counts.total;
+  document.getElementById('easy-problems').textContent = counts.byDifficulty.Easy;
+  document.getElementById('medium-problems').textContent = counts.byDifficulty.Medium;
+  document.getElementById('hard-problems').textContent = counts.byDifficulty.Hard;
+}
+
+function setCatalog(rows, solved) {
+  catalog = rows;
+  solvedIds = new Set(solved);
+  document.getElementById('loading').style.display = 'none';
+  loadProblems();
+}
+
+async function syncLocalStore() {
+  localDb = await openLocalStore();
+  const tx = localDb.transaction(['problems', 'meta'], 'readonly');
+  const [rows, meta] = await Promise.all([
+    idbRequest(tx.objectStore('problems').getAll()),
+    idbRequest(tx.objectStore('meta').get('state'))
+  ]);
+  localMeta = meta || { catalogVersion: 0, solvedVersion: 0, solved: [] };
+  if (localMeta.catalogVersion && rows.length) {
+    // Show the cached copy straight away; the delta below patches it
+    setCatalog(rows, localMeta.solved);
+  }
+
+  const data = await makeApiRequest(
+    `/sync?catalog_version=${localMeta.catalogVersion}&solved_version=${localMeta.solvedVersion}`
+  );
+  showCounts(data.counts);
+
+  const fields = data.catalog.fields;
+  const changed = data.catalog.rows.map(values => Object.fromEntries(fields.map((field, i) => [field, values[i]])));
+  const merged = new Map(data.catalog.full ? [] : rows.map(row => [row.id, row]));
+  changed.forEach(row => merged.set(row.id, row));
+  data.catalog.removed.forEach(id => merged.delete(id));
+
+  const solved = new Set(data.solved.full ? [] : localMeta.solved);
+  data.solved.solved.forEach(id => solved.add(id));
+  data.solved.unsolved.forEach(id => solved.delete(id));
+
+  localMeta = {
+    catalogVersion: data.catalog.version,
+    solvedVersion: data.solved.version,
+    solved: [...solved]
+  };
+  await writeLocalStore({ full: data.catalog.full, rows: changed, removed: data.catalog.removed });
+  setCatalog([...merged.values()], localMeta.solved);
+}
+
+function matchesSearch(problem, terms) {
+  const title = problem.title.toLowerCase();
+  return terms.every(term => title.includes(term) || problem.id === term);
+}
+
+function selectLocalPage() {
+  const terms = currentSearchQuery.toLowerCase().split(/\s+/).filter(Boolean);
+  // Paid problems are left out, as on the server
+  const rows = catalog.filter(problem =>
+    !problem.paid_only &&
+    (currentDifficulty === 'all' || problem.difficulty.toUpperCase() === currentDifficulty.toUpperCase()) &&
+    matchesSearch(problem, terms)
+  );
+  rows.sort(COMPARATORS[currentSort.field]);
+  if (currentSort.direction === 'desc') {
+    rows.reverse();
+  }
+  totalPages = Math.max(1, Math.ceil(rows.length / PER_PAGE));
+  currentPage = Math.min(currentPage, totalPages);
+  return rows
+    .slice((currentPage - 1) * PER_PAGE, currentPage * PER_PAGE)
+    .map(problem => ({ ...problem, solved: solvedIds.has(problem.id) }));
+}
+
+function fetchPage(page) {
+  let url = `/scrape-leetcode?page=${page}&per_page=${PER_PAGE}`;
+  if (currentSearchQuery) {
+      url += `&search=${encodeURIComponent(currentSearchQuery)}`;
+  }
+  if (currentDifficulty && currentDifficulty !== 'all') {
+      url += `&difficulty=${encodeURIComponent(currentDifficulty)}`;
+  }
+  if (currentSort.field !== 'id' || currentSort.direction !== 'asc') {
+      url += `&sort=${SORT_FIELDS[currentSort.field]}&order=${currentSort.direction}`;
+  }
+
+  if (!pageCache.has(url)) {
+    if (pageCache.size >= PAGE_CACHE_SIZE) {
+      pageCache.delete(pageCache.keys().next().value);
+    }
+    const request = makeApiRequest(url);
+    pageCache.set(url, request);
+    // Failed requests are retried next time
+    request.catch(() => pageCache.delete(url));
+  }
+  return pageCache.get(url);
+}
+
+function sortProblems() {
+  const [field, direction] = document.getElementById('sortSelect').value.split(':');
+  currentSort = { field, direction };
+  currentPage = 1;
+  loadProblems();
+}
+
+function renderProblems() {
+  const tableBody = document.getElementById('problemsTableBody');
+  tableBody.innerHTML = '';
+
+  problems.forEach(problem => {
+    const row = document.createElement('tr');
+    row.innerHTML = `
+      <td>${problem.id}</td>
+      <td>
+        <a href="${problemUrl(problem)}" target="_blank" class="problem-title">
+          ${problem.title}
+        </a>
+      </td>
+      <td class="difficulty-${problem.difficulty.toLowerCase()}">${problem.difficulty}</td>
+      <td>${problem.acceptance_rate}%</td>
+      <td>
+        <button class="btn btn-link p-0" onclick="toggleSolved('${problem.id}', ${!problem.solved})">
+          <i class="bi ${problem.solved ? 'bi-check-circle-fill text-success' : 'bi-circle'}"></i>
+        </button>
+      </td>
+      <td>
+        <a href="${problemUrl(problem)}" target="_blank" class="btn btn-sm btn-primary">
+          <i class="bi bi-box-arrow-up-right"></i> View
+        </a>
+      </td>
+    `;
+    tableBody.appendChild(row);
+  });
+}
+
+async function toggleSolved(problemId, solved) {
+    try {
+        const data = await makeApiRequest('/toggle-solved', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                problem_id: problemId,
+                solved: solved
+            })
+        });
+
+        if (data.status === 'success') {
+            if (solved) {
+                solvedIds.add(problemId);
+            } else {
+                solvedIds.delete(problemId);
+            }
+            pageCache.clear();
+            if (catalog && localDb && localMeta) {
+                // The next /sync returns this change too; keep the cache right until then
+                localMeta.solved = [...solvedIds];
+                writeLocalStore(null).catch(() => {});
+            }
+            const problem = problems.find(p => p.id === problemId);
+            if (problem) {
+                problem.solved = solved;
+                renderProblems();
+            }
+        }
+    } catch (error) {
+        // Handle error silently
+    }
+}
+
+function updatePagination() {
+  const pagination = document.getElementById('pagination');
+  pagination.innerHTML = '';
+
+  // First button
+  const firstLi = document.createElement('li');
+  firstLi.className = `page-item ${currentPage === 1 ? 'disabled' : ''}`;
+  firstLi.innerHTML = `
+    <a class="page-link" href="#" aria-label="First" ${currentPage === 1 ? 'tabindex="-1"' : ''}>
+      <i class="bi bi-chevron-double-left"></i>
+    </a>
+  `;
+  firstLi.addEventListener('click', (e) => {
+    if (currentPage > 1) {
+      currentPage = 1;
+      loadProblems();
+    }
+    e.preventDefault();
+  });
+  pagination.appendChild(firstLi);
+
+  // Previous button
+  const prevLi = document.createElement('li');
+  prevLi.className = `page-item ${currentPage === 1 ? 'disabled' : ''}`;
+  prevLi.innerHTML = `
+    <a class="page-link" href="#" aria-label="Previous" ${currentPage === 1 ? 'tabindex="-1"' : ''}>
+      <i class="bi bi-chevron-left"></i>
+    </a>
+  `;
+  prevLi.addEventListener('click', (e) => {
+    if (currentPage > 1) {
+      currentPage--;
+      loadProblems();
+    }
+    e.preventDefault();
+  });
+  pagination.appendChild(prevLi);
+
+  // Page numbers
+  const startPage = Math.max(1, currentPage - 2);
+  const endPage = Math.min(totalPages, currentPage + 2);
+
+  // Add ellipsis if needed before start page
+  if (startPage > 1) {
+    const ellipsisLi = document.createElement('li');
+    ellipsisLi.className = 'page-item disabled';
+    ellipsisLi.innerHTML = '<span class="page-link">...</span>';
+    pagination.appendChild(ellipsisLi);
+  }
+
+  for (let i = startPage; i <= endPage; i++) {
+    const pageLi = document.createElement('li');
+    pageLi.className = `page-item ${i === currentPage ? 'active' : ''}`;
+    pageLi.innerHTML = `<a class="page-link" href="#">${i}</a>`;
+    pageLi.addEventListener('click', (e) => {
+      currentPage = i;
+      loadProblems();
+      e.preventDefault();
+    });
+    pagination.appendChild(pageLi);
+  }
+
+  // Add ellipsis if needed after end page
+  if (endPage < totalPages) {
+    const ellipsisLi = document.createElement('li');
+    ellipsisLi.className = 'page-item disabled';
+    ellipsisLi.innerHTML = '<span class="page-link">...</span>';
+    pagination.appendChild(ellipsisLi);
+  }
+
+  // Next button
+  const nextLi = document.createElement('li');
+  nextLi.className = `page-item ${currentPage === totalPages ? 'disabled' : ''}`;
+  nextLi.innerHTML = `
+    <a class="page-link" href="#" aria-label="Next" ${currentPage === totalPages ? 'tabindex="-1"' : ''}>
+      <i class="bi bi-chevron-right"></i>
+    </a>
+  `;
+  nextLi.addEventListener('click', (e) => {
+    if (currentPage < totalPages) {
+      currentPage++;
+      loadProblems();
+    }
+    e.preventDefault();
+  });
+  pagination.appendChild(nextLi);
+
+  // Last button
+  const lastLi = document.createElement('li');
+  lastLi.className = `page-item ${currentPage === totalPages ? 'disabled' : ''}`;
+  lastLi.innerHTML = `
+    <a class="page-link" href="#" aria-label="Last" ${currentPage === totalPages ? 'tabindex="-1"' : ''}>
+      <i class="bi bi-chevron-double-right"></i>
+    </a>
+  `;
+  lastLi.addEventListener('click', (e) => {
+    if (currentPage < totalPages) {
+      currentPage = totalPages;
+      loadProblems();
+    }
+    e.preventDefault();
+  });
+  pagination.appendChild(lastLi);
+}
+
+async function loadProblems() {
+    if (catalog) {
+        problems = selectLocalPage();
+        renderProblems();
+        updatePagination();
+        return;
+    }
+
+    const loading = document.getElementById('loading');
+    const tableBody = document.getElementById('problemsTableBody');
+
+    loading.style.display = 'block';
+    tableBody.innerHTML = '';
+
+    try {
+        const data = await fetchPage(currentPage);
+        if (data.status === 'success') {
+            problems = data.problems;
+            totalPages = data.total_pages;
+            renderProblems();
+            updatePagination();
+            if (currentPage < totalPages) {
+                fetchPage(currentPage + 1).catch(() => {});
+            }
+        }
+    } catch (error) {
+        // Handle error silently
+    } finally {
+        loading.style.display = 'none';
+    }
+}
+
+async function loadCounts() {
+    try {
+        const countsData = await makeApiRequest('/problem-counts');
+        if (countsData.status === 'success') {
+            showCounts(countsData.data);
+        }
+    } catch (error) {
+        // Handle error silently
+    }
+}
+
+// Add debounce function for search
+function debounce(func, wait) {
+  let timeout;
+  return function executedFunction(...args) {
+    const later = () => {
+      clearTimeout(timeout);
+      func(...args);
+    };
+    clearTimeout(timeout);
+    timeout = setTimeout(later, wait);
+  };
+}
+
+// Add event listener for search input with debounce
+const searchInput = document.getElementById('searchInput');
+const searchButton = document.getElementById('searchButton');
+
+const debouncedSearch = debounce(() => {
+  currentSearchQuery = searchInput.value;
+  currentPage = 1;
+  loadProblems();
+}, 500);
+
+// Search when typing: at once over the local copy, debounced against the server
+searchInput.addEventListener('input', () => {
+  if (catalog) {
+    currentSearchQuery = searchInput.value;
+    currentPage = 1;
+    loadProblems();
+  } else {
+    debouncedSearch();
+  }
+});
+
+// Search when Enter key is pressed
+searchInput.addEventListener('keypress', (e) => {
+  if (e.key === 'Enter') {
+    e.preventDefault();
+    currentSearchQuery = searchInput.value;
+    currentPage = 1;
+    loadProblems();
+  }
+});
+
+// Search when Search button is clicked
+searchButton.addEventListener('click', () => {
+  currentSearchQuery = searchInput.value;
+  currentPage = 1;
+  loadProblems();
+});
+
+// Add event listener for sort select
+document.getElementById('sortSelect').addEventListener('change', () => {
+  sortProblems();
+});
+
+document.addEventListener('DOMContentLoaded', () => {
+  // Set initial sort option
+  document.getElementById('sortSelect').value = 'id:asc';
+  const loading = document.getElementById('loading');
+  loading.style.display = 'block';
+  syncLocalStore()
+    .catch(() => {
+      // Keep any cached copy already shown; otherwise page through the server
+      loadCounts();
+      loadProblems();
+    })
+    .finally(() => {
+      loading.style.display = 'none';
+    });
+});
@@ -0,0 +1,124 @@
+// API Configuration
+const API_KEY = document.body.dataset.apiKey;
+
+// Function to make API requests with API key
+async function makeApiRequest(url, options = {}) {
+    const defaultHeaders = {
+        'x-api-key': API_KEY,
+        'Content-Type': 'application/json'
+    };
+
+    const response = await fetch(url, {
+        ...options,
+        headers: {
+            ...defaultHeaders,
+            ...options.headers
+        }
+    });
+
+    if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.message || 'API request failed');
+    }
+
+    return response.json();
+}
+
+const searchForm = document.getElementById('searchForm');
+const loading = document.getElementById('loading');
+const errorMessage = document.getElementById('errorMessage');
+const statsContainer = document.getElementById('statsContainer');
+
+searchForm.addEventListener('submit', async (e) => {
+    e.preventDefault();
+    const username = document.getElementById('username').value.trim();
+
+    if (!username) {
+        showError('Please enter a username');
+        return;
+    }
+
+    showLoading();
+    hideError();
+    hideStats();
+
+    try {
+        const data = await makeApiRequest('/user-stats', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+            },
+            body: `username=${encodeURIComponent(username)}`
+        });
+
+        if (data.status === 'error') {
+            showError(data.message);
+            return;
+        }
+
+        updateStats(data.data);
+        showStats();
+    } catch (error) {
+        showError('An error occurred while fetching user statistics');
+    } finally {
+        hideLoading();
+    }
+});
+
+function updateStats(data) {
+  // Update profile stats
+  document.getElementById('ranking').textContent = data.profile.ranking.toLocaleString();
+  document.getElementById('reputation').textContent = data.profile.reputation;
+  document.getElementById('rating').textContent = data.profile.starRating;
+
+  // Create a map for quick lookup of solved counts by difficulty
+  const solvedMap = {};
+  data.submitStats.acSubmissionNum.forEach(stat => {
+    solvedMap[stat.difficulty] = stat.count;
+  });
+
+  // Update total solved count
+  const totalSolved = solvedMap['All'] || 0;
+  const totalProblems = data.totalProblems.total;
+  document.getElementById('totalSolved').textContent =
+    `${totalSolved.toLocaleString()} / ${totalProblems.toLocaleString()}`;
+
+  // Update each difficulty card with solved/total counts
+  ['Easy', 'Medium', 'Hard'].forEach(difficulty => {
+    const solved = solvedMap[difficulty] || 0;
+    const total = data.totalProblems.byDifficulty[difficulty];
+    document.getElementById(`${difficulty.toLowerCase()}Solved`).textContent =
+      `${solved.toLocaleString()} / ${total.toLocaleString()}`;
+  });
+}
+
+function showLoading() {
+  loading.style.display = 'block';
+}
+
+function hideLoading() {
+  loading.style.display = 'none';
+}
+
+function showError(message) {
+  errorMessage.textContent = message;
+  errorMessage.style.display = 'block';
+}
+
+function hideError() {
+  errorMessage.style.display = 'none';
+}
+
+function showStats() {
+  statsContainer.style.display = 'block';
+  setTimeout(() => {
+    statsContainer.classList.add('visible');
+  }, 50);
+}
+
+function hideStats() {
+  statsContainer.classList.remove('visible');
+  setTimeout(() => {
+    statsContainer.style.display = 'none';
+  }, 300);
+}
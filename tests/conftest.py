@@ -0,0 +1,29 @@
+import os
+import random
+import types
+
+import pytest
+
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+from benchmarks.suite import API_KEY, build_app, login_clients
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    # Hash inline; a process pool isn't worth starting for one login
+    os.environ['PASSWORD_HASH_WORKERS'] = '0'
+    server, upstream_url = serve_in_thread(create_app(200, 0.0))
+    try:
+        yield build_app(types.SimpleNamespace(mongo_latency_ms=0.0), upstream_url)
+    finally:
+        server.shutdown()
+
+
+@pytest.fixture(scope='session')
+def client(app_module):
+    client, = login_clients(app_module, 1, 200, random.Random(0))
+    return client
+
+
+def get(client, url, **headers):
+    return client.get(url, headers=dict(headers, **{'x-api-key': API_KEY}))
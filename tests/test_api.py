@@ -0,0 +1,114 @@
+from datetime import datetime
+
+import pytest
+
+from tests.conftest import get
+
+BULK = '/toggle-solved/bulk'
+
+
+@pytest.mark.parametrize('body', [
+    ['1', '2'],
+    'text',
+    {'problem_ids': '1', 'solved': True},
+    {'problem_ids': [], 'solved': True},
+    {'problem_ids': [['1']], 'solved': True},
+    {'problem_ids': [{'id': '1'}], 'solved': True},
+    {'problem_ids': [1], 'solved': True},
+    {'problem_ids': [''], 'solved': True},
+    {'problem_ids': ['1']},
+    {'problem_ids': ['1'], 'solved': 'yes'},
+])
+def test_bulk_toggle_rejects_malformed_bodies(client, body):
+    response = client.post(BULK, json=body)
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+
+
+def test_bulk_toggle_rejects_non_json(client):
+    response = client.post(BULK, data='problem_ids=1', content_type='application/x-www-form-urlencoded')
+    assert response.status_code == 400
+
+
+def test_bulk_toggle_limits_problem_count(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'BULK_TOGGLE_MAX_PROBLEMS', 2)
+    response = client.post(BULK, json={'problem_ids': ['1', '2', '3'], 'solved': True})
+    assert response.status_code == 400
+
+
+def test_bulk_toggle_writes_valid_bodies(client):
+    response = client.post(BULK, json={'problem_ids': ['1', '2'], 'solved': True})
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'success'
+    # Both were just set, so both flip
+    assert client.post(BULK, json={'problem_ids': ['1', '2'], 'solved': False}).get_json()['updated'] == 2
+
+
+def test_ensure_indexes_goes_on_after_a_failure(app_module, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('duplicate key')
+
+    users = app_module.db.users._resolve()
+    monkeypatch.setattr(users, 'create_index', fail)
+    app_module.ensure_indexes()
+    assert 'expires_at_1' in app_module.db.login_attempts._resolve()._indexes
+    assert 'username_1_bucket_1' in app_module.db.stats_history._resolve()._indexes
+
+
+def test_duplicate_solved_rows_are_removed_before_the_unique_index(app_module, monkeypatch):
+    from pymongo.errors import DuplicateKeyError
+
+    solved = app_module.db.solved_problems._resolve()
+    create_index = solved.create_index
+    attempts = []
+
+    def build(keys, unique=False, **kwargs):
+        attempts.append(keys)
+        if unique and len(attempts) == 1:
+            raise DuplicateKeyError('E11000 duplicate key error')
+        return create_index(keys, unique=unique, **kwargs)
+
+    monkeypatch.setattr(solved, 'create_index', build)
+    removed = []
+    monkeypatch.setattr(app_module.progress, 'remove_duplicate_rows', lambda: removed.append(1) or 0)
+    app_module.ensure_solved_index()
+    assert removed == [1]
+    assert len(attempts) == 2
+
+
+def test_history_rejects_a_reversed_range(client):
+    response = get(client, '/user-stats/history?usernames=alice&start=2024-02-01&end=2024-01-01')
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+
+
+def test_history_range_with_no_changes(client, app_module):
+    app_module.history.record('quiet', {'a': 5, 'e': 5, 'm': 0, 'h': 0, 'r': 9}, datetime(2024, 1, 1))
+    response = get(client, '/user-stats/history?usernames=quiet,unknown&start=2024-03-01&end=2024-03-31')
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['quiet'] == {'baseline': {'All': 5, 'Easy': 5, 'Medium': 0, 'Hard': 0, 'ranking': 9}, 'points': []}
+    assert data['unknown'] == {'baseline': None, 'points': []}
+
+
+@pytest.mark.parametrize('query', [
+    'min_acceptance=abc',
+    'max_acceptance=nan',
+    'min_acceptance=-1',
+    'max_acceptance=100.5',
+    'min_acceptance=inf',
+    'min_acceptance=60&max_acceptance=40',
+])
+@pytest.mark.parametrize('path', ['/scrape-leetcode', '/export'])
+def test_catalog_rejects_bad_acceptance_bounds(client, path, query):
+    response = get(client, f'{path}?{query}')
+    assert response.status_code == 400
+    assert 'acceptance' in response.get_json()['message']
+
+
+def test_catalog_applies_acceptance_bounds(client):
+    response = get(client, '/scrape-leetcode?min_acceptance=40&max_acceptance=60&per_page=1000&paid=include')
+    assert response.status_code == 200
+    rates = [problem['acceptance_rate'] for problem in response.get_json()['problems']]
+    assert rates and all(40 <= rate <= 60 for rate in rates)
+    assert get(client, '/scrape-leetcode?min_acceptance=&max_acceptance=').status_code == 200
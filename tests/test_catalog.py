@@ -0,0 +1,11 @@
+from benchmarks.fake_leetcode import make_problems
+from catalog import ProblemCatalog
+from tests.test_progress import StubClient
+
+
+def test_query_clamps_negative_skip_and_limit():
+    catalog = ProblemCatalog(None, StubClient(make_problems(120)))
+    catalog.sync()
+    total, first = catalog.query(skip=0, limit=50)
+    assert catalog.query(skip=-50, limit=50) == (total, first)
+    assert catalog.query(skip=0, limit=-1) == (total, [])
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+from benchmarks.fake_mongo import FakeMongoClient
+from catalog import ProblemCatalog
+from crawler import ProblemCrawler
+from leetcode_client import LeetCodeClient
+from scheduler import LeaseLock, Scheduler
+
+PROBLEMS = 20
+
+
+@pytest.fixture(scope='module')
+def client():
+    server, url = serve_in_thread(create_app(PROBLEMS, 0.0))
+    try:
+        yield LeetCodeClient(url)
+    finally:
+        server.shutdown()
+
+
+@pytest.fixture
+def crawler(client):
+    catalog = ProblemCatalog(None, client)
+    catalog.sync()
+    db = FakeMongoClient().test
+    return ProblemCrawler(db.problem_details, db.crawl_checkpoints, client, catalog, workers=1, min_interval=0)
+
+
+def test_crawl_stops_when_heartbeat_fails(crawler):
+    beats = []
+    crawler.heartbeat = lambda: beats.append(1) or len(beats) < 3
+    report = crawler.run()
+    assert len(beats) == 3
+    assert report['remaining'] > 0
+    assert crawler.status()['run']['finished_at'] is None
+
+    # The next leader resumes the open run
+    crawler.heartbeat = lambda: True
+    report = crawler.run()
+    assert report['resumed'] and report['remaining'] == 0
+
+
+def test_renew_extends_lease_and_fails_for_other_owner():
+    leases = FakeMongoClient().test.leases
+    leader = Scheduler(LeaseLock(leases, owner='leader'))
+    other = Scheduler(LeaseLock(leases, owner='other'))
+    for scheduler in (leader, other):
+        scheduler.add_job('crawl', lambda: None, 60, leader_only=True)
+
+    assert leader.renew('crawl')
+    expires_at = leases.find_one({'_id': 'crawl'})['expires_at']
+    assert leader.renew('crawl')
+    assert leases.find_one({'_id': 'crawl'})['expires_at'] >= expires_at
+    assert not other.renew('crawl')
+
+
+def test_own_thread_job_does_not_hold_up_others():
+    scheduler = Scheduler(LeaseLock(FakeMongoClient().test.leases))
+    started, release = threading.Event(), threading.Event()
+    ran = []
+
+    def crawl():
+        started.set()
+        release.wait(5)
+
+    scheduler.add_job('crawl', crawl, 60, leader_only=True, own_thread=True)
+    scheduler.add_job('flush', lambda: ran.append(1), 60)
+    scheduler.run_job(scheduler.jobs['crawl'])
+    assert started.wait(5)
+    scheduler.run_job(scheduler.jobs['flush'])
+    assert ran == [1]
+
+    # A second run is skipped while the first goes on
+    scheduler.run_job(scheduler.jobs['crawl'])
+    assert scheduler.jobs['crawl'].skipped == 1
+    release.set()
+    scheduler.jobs['crawl'].thread.join(5)
+    assert scheduler.jobs['crawl'].runs == 1
+    assert not scheduler.status()['crawl']['running']
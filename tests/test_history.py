@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+
+from benchmarks.fake_mongo import FakeMongoClient
+from history import StatsHistory
+
+
+def values(solved, ranking=100):
+    return {'a': solved, 'e': solved, 'm': 0, 'h': 0, 'r': ranking}
+
+
+@pytest.fixture
+def history():
+    history = StatsHistory(FakeMongoClient().test.stats_history)
+    history.ensure_indexes()
+    history.record('alice', values(1), datetime(2024, 1, 1, 9))
+    history.record('alice', values(2), datetime(2024, 1, 3, 9))
+    history.record('alice', values(3), datetime(2024, 1, 10, 9))
+    return history
+
+
+def test_range_starts_from_the_previous_state(history):
+    series = history.progression(['alice'], datetime(2024, 1, 2), datetime(2024, 1, 5))['alice']
+    assert series['baseline']['All'] == 1
+    assert [point['All'] for point in series['points']] == [2]
+
+
+def test_range_with_no_buckets_keeps_the_latest_state(history):
+    series = history.progression(['alice'], datetime(2024, 1, 5), datetime(2024, 1, 8))['alice']
+    assert series == {'baseline': {'All': 2, 'Easy': 2, 'Medium': 0, 'Hard': 0, 'ranking': 100}, 'points': []}
+
+
+def test_range_before_any_record_is_empty(history):
+    series = history.progression(['alice', 'bob'], datetime(2023, 12, 1), datetime(2023, 12, 31))
+    assert series == {
+        'alice': {'baseline': None, 'points': []},
+        'bob': {'baseline': None, 'points': []}
+    }
+
+
+def test_first_bucket_in_range_has_no_baseline(history):
+    series = history.progression(['alice'], datetime(2023, 12, 1), datetime(2024, 1, 1, 12))['alice']
+    assert series['baseline'] is None
+    assert [point['All'] for point in series['points']] == [1]
@@ -0,0 +1,36 @@
+import gzip
+
+from tests.conftest import get
+
+PAGE = '/scrape-leetcode?page=1&per_page=50'
+
+
+def test_matching_etag_returns_304(client):
+    first = get(client, PAGE)
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    revalidated = get(client, PAGE, **{'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.get_data() == b''
+
+
+def test_etag_changes_after_toggle(client):
+    first = get(client, PAGE)
+    problem = first.get_json()['problems'][0]
+    response = client.post('/toggle-solved', json={'problem_id': problem['id'], 'solved': not problem['solved']})
+    assert response.get_json()['status'] == 'success'
+
+    after = get(client, PAGE, **{'If-None-Match': first.headers['ETag']})
+    assert after.status_code == 200
+    assert after.headers['ETag'] != first.headers['ETag']
+    assert after.get_json()['problems'][0]['solved'] == (not problem['solved'])
+
+
+def test_compresses_when_accepted(client):
+    plain = get(client, PAGE)
+    compressed = get(client, PAGE, **{'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    # Same representation, so the same ETag
+    assert compressed.headers['ETag'] == plain.headers['ETag']
@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+from profiling import SlowRequestProfiler
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def read_profiles(directory):
+    return ''.join(path.read_text() for path in directory.glob('*.folded'))
+
+
+def test_samples_slow_request_threads(tmp_path):
+    profiler = SlowRequestProfiler(threshold=0.05, interval=0.002, output_dir=str(tmp_path))
+
+    def request(seconds, name):
+        profiler.start_request()
+        start = time.perf_counter()
+        busy(seconds)
+        profiler.finish_request(time.perf_counter() - start, name)
+
+    threads = [threading.Thread(target=request, args=(0.1, 'slow')),
+               threading.Thread(target=request, args=(0.01, 'fast'))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert profiler.dumped == 1
+    assert 'test_profiling.busy' in read_profiles(tmp_path)
+
+
+def test_samples_gevent_greenlets(tmp_path):
+    # Monkey patching is process-wide, so the gevent case runs in its own interpreter
+    script = textwrap.dedent(f'''
+        from gevent import monkey
+        monkey.patch_all()
+        import time
+        import gevent
+        from profiling import SlowRequestProfiler
+
+        profiler = SlowRequestProfiler(threshold=0.05, interval=0.002, output_dir={str(tmp_path)!r})
+        assert profiler.greenlets
+
+        def spin(seconds):
+            end = time.perf_counter() + seconds
+            while time.perf_counter() < end:
+                pass
+
+        def request():
+            profiler.start_request()
+            start = time.perf_counter()
+            gevent.sleep(0.05)
+            spin(0.05)
+            profiler.finish_request(time.perf_counter() - start, 'slow')
+
+        gevent.joinall([gevent.spawn(request), gevent.spawn(gevent.sleep, 0.02)])
+        assert profiler.dumped == 1
+    ''')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, '-c', script], check=True, timeout=30, cwd=root)
+    profile = read_profiles(tmp_path)
+    # Sampled both while waiting (suspended greenlet) and while holding the CPU (running greenlet)
+    assert '__main__.request;gevent' in profile
+    assert '__main__.spin' in profile
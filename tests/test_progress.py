@@ -0,0 +1,166 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.fake_leetcode import make_problems
+from benchmarks.fake_mongo import FakeMongoClient
+from catalog import ProblemCatalog
+from progress import ProgressStore, ToggleBuffer
+
+
+class StubClient:
+    def __init__(self, problems):
+        self.problems = problems
+
+    def query(self, query, variables):
+        skip, limit = variables['skip'], variables['limit']
+        return {'data': {'problemsetQuestionList': {
+            'total': len(self.problems),
+            'questions': self.problems[skip:skip + limit]
+        }}}
+
+
+@pytest.fixture
+def db():
+    return FakeMongoClient().test
+
+
+@pytest.fixture
+def store(db):
+    db.solved_problems.create_index([('user_id', 1), ('problem_id', 1)], unique=True)
+    # Not loaded: the store has to load it before counting
+    catalog = ProblemCatalog(db.problems, StubClient(make_problems(30)))
+    return ProgressStore(db.user_progress, db.solved_problems, catalog)
+
+
+def ids_of(store, difficulty, n):
+    store.catalog.ensure_loaded()
+    return [q['questionId'] for q in store.catalog.questions() if q['difficulty'] == difficulty][:n]
+
+
+def solved(store, user_id):
+    return {name: row['solved'] for name, row in store.get(user_id).items()}
+
+
+def test_toggle_counts_on_an_unloaded_catalog(store):
+    problem_id = make_problems(30)[0]['questionId']
+    difficulty = make_problems(30)[0]['difficulty']
+    assert store.toggle('u', problem_id, True)
+    assert solved(store, 'u')[difficulty] == 1
+    assert store.reconcile(fix=False)['drifted'] == 0
+
+
+def test_toggle_on_off_and_repeat(store):
+    easy, = ids_of(store, 'Easy', 1)
+    assert store.toggle('u', easy, True)
+    assert not store.toggle('u', easy, True)
+    assert solved(store, 'u')['Easy'] == 1
+    assert store.toggle('u', easy, False)
+    assert not store.toggle('u', easy, False)
+    assert solved(store, 'u')['Easy'] == 0
+    # Unsolving a problem never solved doesn't go negative
+    other, = ids_of(store, 'Medium', 1)
+    assert not store.toggle('u', other, False)
+    assert solved(store, 'u')['Medium'] == 0
+
+
+def test_bulk_toggle_with_mixed_states(store):
+    easy = ids_of(store, 'Easy', 3)
+    hard = ids_of(store, 'Hard', 2)
+    store.toggle('u', easy[0], True)
+    store.toggle('u', hard[0], False)
+    # One already solved, one stored unsolved, the rest new; duplicates counted once
+    assert store.toggle_many('u', easy + hard + easy[:1], True) == 4
+    assert solved(store, 'u') == {'Easy': 3, 'Medium': 0, 'Hard': 2, 'All': 5}
+    assert store.toggle_many('u', [easy[0], easy[1], hard[1]], False) == 3
+    assert solved(store, 'u') == {'Easy': 1, 'Medium': 0, 'Hard': 1, 'All': 2}
+    assert store.reconcile(fix=False)['drifted'] == 0
+
+
+def test_get_backfills_users_without_a_summary(store, db):
+    easy = ids_of(store, 'Easy', 2)
+    # Solved before the counters existed
+    db.solved_problems.insert_many([{'user_id': 'old', 'problem_id': p, 'solved': True} for p in easy])
+    assert solved(store, 'old')['Easy'] == 2
+    assert db.user_progress.find_one({'_id': 'old'})['counts']['Easy'] == 2
+    store.toggle('old', easy[0], False)
+    assert solved(store, 'old')['Easy'] == 1
+
+
+def test_buffered_toggles_coalesce(store):
+    easy, = ids_of(store, 'Easy', 1)
+    buffer = ToggleBuffer(store)
+    for state in (True, False, True):
+        buffer.add('u', easy, state)
+    assert buffer.pending('u') == {easy: True}
+    assert buffer.flush() == 1
+    assert solved(store, 'u')['Easy'] == 1
+    assert buffer.pending('u') == {}
+
+
+def test_failed_flush_keeps_every_users_toggles(store):
+    easy = ids_of(store, 'Easy', 3)
+    buffer = ToggleBuffer(store)
+    for user_id, problem_id in zip('abc', easy):
+        buffer.add(user_id, problem_id, True)
+
+    # Not a Mongo error, e.g. the catalog failing to load
+    def fail(*args):
+        raise RuntimeError('catalog unavailable')
+
+    write = store.toggle_many
+    store.toggle_many = fail
+    assert buffer.flush() == 0
+    assert buffer.stats()['pending'] == 3
+
+    store.toggle_many = write
+    assert buffer.flush() == 3
+    for user_id in 'abc':
+        assert solved(store, user_id)['Easy'] == 1
+
+
+def test_bulk_toggle_lands_after_a_running_flush(store):
+    easy, = ids_of(store, 'Easy', 1)
+    buffer = ToggleBuffer(store)
+    buffer.add('u', easy, True)
+
+    # Hold the flush mid-write while a bulk toggle of the same problem comes in
+    entered, release = threading.Event(), threading.Event()
+    write = store.toggle_many
+
+    def held(*args):
+        if not entered.is_set():
+            entered.set()
+            release.wait(5)
+        return write(*args)
+
+    store.toggle_many = held
+    flusher = threading.Thread(target=buffer.flush)
+    flusher.start()
+    entered.wait(5)
+    bulk = threading.Thread(target=buffer.toggle_many, args=('u', [easy], False))
+    bulk.start()
+    time.sleep(0.05)
+    release.set()
+    flusher.join()
+    bulk.join()
+    assert solved(store, 'u')['Easy'] == 0
+
+
+def test_remove_duplicate_rows_keeps_the_latest(store, db):
+    easy, = ids_of(store, 'Easy', 1)
+    # Without the unique index, as before it existed
+    store = ProgressStore(db.user_progress, db.legacy_solved, store.catalog)
+    start = datetime(2024, 1, 1)
+    for n, solved_state in enumerate((True, True, False)):
+        db.legacy_solved.insert_one({'user_id': 'dup', 'problem_id': easy, 'solved': solved_state,
+                                     'created_at': start, 'updated_at': start + timedelta(minutes=n)})
+    db.user_progress.insert_one({'_id': 'dup', 'counts': {'Easy': 2}})
+
+    assert store.remove_duplicate_rows() == 2
+    rows = list(db.legacy_solved.find({'user_id': 'dup'}))
+    assert [row['solved'] for row in rows] == [False]
+    assert solved(store, 'dup')['Easy'] == 0
+    assert store.remove_duplicate_rows() == 0
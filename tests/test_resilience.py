@@ -0,0 +1,207 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.fake_leetcode import create_app, serve_in_thread
+from benchmarks.fake_mongo import FakeMongoClient
+from leetcode_client import (
+    USER_PROFILE_QUERY,
+    LeetCodeClient,
+    UpstreamThrottledError,
+    UpstreamTimeoutError,
+    make_session
+)
+from resilience import CircuitBreaker, CircuitOpenError, RateLimitedError, TokenBucket, UpstreamUnavailableError
+
+
+class FakeClock:
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=FakeClock())
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_success_resets_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, clock=FakeClock())
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+
+
+def test_half_open_allows_one_probe_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.advance(9.9)
+    assert not breaker.allow()
+
+    clock.advance(0.1)
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    # Only the one probe until it reports back
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.advance(10)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert breaker.stats()['opens'] == 2
+    clock.advance(5)
+    assert not breaker.allow()
+
+
+def test_cancelled_probe_frees_the_slot():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.advance(10)
+    assert breaker.allow()
+    breaker.cancel()
+    assert breaker.allow()
+
+
+@pytest.fixture
+def server_time():
+    return {'now': datetime(2024, 1, 1)}
+
+
+@pytest.fixture
+def bucket(server_time):
+    # $$NOW in the limiter's pipeline update reads this clock
+    client = FakeMongoClient(clock=lambda: server_time['now'])
+    return TokenBucket(client.test.rate_limits, rate=2.0, capacity=3, max_wait=0)
+
+
+def test_bucket_starts_full_then_denies(bucket):
+    assert [bucket.try_acquire()[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_bucket_refills_at_rate_up_to_capacity(bucket, server_time):
+    for _ in range(3):
+        bucket.try_acquire()
+    server_time['now'] += timedelta(seconds=0.5)
+    allowed, tokens = bucket.try_acquire()
+    assert allowed and tokens == pytest.approx(0)
+    assert not bucket.try_acquire()[0]
+
+    server_time['now'] += timedelta(hours=1)
+    assert bucket.try_acquire() == (True, 2)
+
+
+def test_acquire_raises_when_the_wait_is_too_long(bucket):
+    for _ in range(3):
+        bucket.acquire()
+    with pytest.raises(RateLimitedError):
+        bucket.acquire()
+    assert bucket.stats()['granted'] == 3
+    assert bucket.stats()['denied'] == 1
+
+
+def test_acquire_waits_for_a_token():
+    # Real server time, so the short sleep refills the bucket
+    bucket = TokenBucket(FakeMongoClient().test.rate_limits, rate=50.0, capacity=1, max_wait=1.0)
+    bucket.acquire()
+    bucket.acquire()
+    assert bucket.stats()['waited'] == 1
+
+
+@pytest.fixture(scope='module')
+def upstream():
+    stub = create_app(10, 0.0, hang_seconds=1.0)
+    server, url = serve_in_thread(stub)
+    try:
+        yield stub, url
+    finally:
+        server.shutdown()
+
+
+def leetcode(url, timeout=(1, 5), **breaker):
+    # No retries: the mapping of the final response is what's under test
+    return LeetCodeClient(url, session=make_session(retries=0), timeout=timeout,
+                          breaker=CircuitBreaker(**breaker))
+
+
+def test_429_maps_to_throttled_with_retry_after(upstream, monkeypatch):
+    stub, url = upstream
+    monkeypatch.setitem(stub.config, 'ERROR_RATE', 1.0)
+    client = leetcode(url, failure_threshold=2)
+    with pytest.raises(UpstreamThrottledError) as raised:
+        client.query(USER_PROFILE_QUERY, {'username': 'someone'})
+    assert isinstance(raised.value, UpstreamUnavailableError)
+    assert raised.value.status_code == 429
+    assert raised.value.retry_after == 1
+
+    with pytest.raises(UpstreamThrottledError):
+        client.query(USER_PROFILE_QUERY, {'username': 'someone'})
+    # Two failures open the circuit, and the next call fails fast
+    with pytest.raises(CircuitOpenError):
+        client.query(USER_PROFILE_QUERY, {'username': 'someone'})
+
+
+def test_timeout_maps_to_unavailable(upstream, monkeypatch):
+    stub, url = upstream
+    monkeypatch.setitem(stub.config, 'TIMEOUT_RATE', 1.0)
+    client = leetcode(url, timeout=(1, 0.2))
+    with pytest.raises(UpstreamTimeoutError):
+        client.query(USER_PROFILE_QUERY, {'username': 'someone'})
+    assert client.breaker.failures == 1
+
+
+def test_unreachable_upstream_maps_to_unavailable():
+    client = leetcode('http://127.0.0.1:9/graphql')
+    with pytest.raises(UpstreamTimeoutError):
+        client.query(USER_PROFILE_QUERY, {'username': 'someone'})
+
+
+def test_healthy_upstream_closes_the_breaker(upstream):
+    _, url = upstream
+    client = leetcode(url)
+    client.breaker.record_failure()
+    data = client.query(USER_PROFILE_QUERY, {'username': 'someone'})
+    assert data['data']['matchedUser']
+    assert client.breaker.failures == 0
+
+
+def test_unavailable_response_uses_upstream_retry_after(app_module):
+    with app_module.app.test_request_context():
+        response, status = app_module.upstream_unavailable(UpstreamThrottledError(429, 7))
+        assert status == 503
+        assert response.headers['Retry-After'] == '7'
+        response, _ = app_module.upstream_unavailable(UpstreamTimeoutError('timed out'))
+        assert response.headers['Retry-After'] == str(int(app_module.BREAKER_RESET_TIMEOUT))
+
+
+def test_session_reuses_one_connection():
+    server, url = serve_in_thread(create_app(10, 0.0), keep_alive=True)
+    try:
+        client = leetcode(url)
+        for _ in range(5):
+            client.query(USER_PROFILE_QUERY, {'username': 'someone'})
+        assert server.connections == 1
+    finally:
+        server.shutdown()
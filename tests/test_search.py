@@ -0,0 +1,49 @@
+import random
+
+from benchmarks.fake_leetcode import make_problems
+from search import SearchIndex
+
+QUERIES = ['two sum', 'tree', 'zebra', 'quux', 'matrx', 'palindrom', '42']
+
+
+def rebuilt(questions):
+    index = SearchIndex()
+    index.update(questions)
+    return index
+
+
+def assert_same(index, full):
+    state, expected = index._state, full._state
+    assert state.postings == expected.postings
+    assert state.vocab == expected.vocab
+    assert state.positions == expected.positions
+    assert {gram: sorted(tokens) for gram, tokens in state.trigrams.items()} == \
+        {gram: sorted(tokens) for gram, tokens in expected.trigrams.items()}
+    for query in QUERIES:
+        assert index.search(query) == full.search(query)
+
+
+def test_update_matches_full_build():
+    rng = random.Random(0)
+    questions = make_problems(500)
+    index = rebuilt(questions)
+    for n in range(10):
+        questions = [dict(q) for q in questions]
+        for q in rng.sample(questions, 5):
+            q['title'] += ' ' + rng.choice(['zebra', f'quux{n}', 'tree'])
+            if rng.random() < 0.5:
+                q['topicTags'] = q['topicTags'][:1]
+        del questions[rng.randrange(len(questions))]
+        index.update(questions)
+        assert_same(index, rebuilt(questions))
+
+
+def test_update_skips_unchanged_questions():
+    questions = make_problems(100)
+    index = rebuilt(questions)
+    assert index.update([dict(q) for q in questions]) == 0
+
+    changed = [dict(q) for q in questions]
+    changed[0]['title'] = 'Zebra Crossing'
+    assert index.update(changed) > 0
+    assert index.search('zebra') == [changed[0]['questionId']]
@@ -0,0 +1,14 @@
+from datetime import datetime, timedelta
+
+# Versions handed to clients (/sync) are timestamps as milliseconds since the epoch
+EPOCH = datetime(1970, 1, 1)
+MILLISECOND = timedelta(milliseconds=1)
+
+
+def to_version(ts):
+    """Milliseconds since the epoch for a naive UTC datetime; 0 for None."""
+    return (ts - EPOCH) // MILLISECOND if ts is not None else 0
+
+
+def from_version(version):
+    return EPOCH + MILLISECOND * version if version else None